@@ -1,36 +1,148 @@
-from typing import Generator, Optional
-from fastapi import Depends, HTTPException, status
+from typing import AsyncGenerator, Generator, Optional
+from fastapi import Depends, HTTPException, Query, status
 from fastapi.security import OAuth2PasswordBearer
 from jose import jwt, JWTError
-from sqlalchemy.orm import Session
+from sqlalchemy import event, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, joinedload
 from pydantic import ValidationError
 
-from app.db.session import get_db
-from app.models.user import User
+from app.db.session import get_db, get_async_db, get_async_read_db_for, get_read_db_for
+from app.models.user import User, Company
+from app.core import security
 from app.core.config import settings
+from app.core.principal_cache import Principal, principal_cache
 from app.schemas.user import TokenPayload
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl=f"{settings.API_V1_STR}/auth/login/access-token")
+oauth2_scheme_optional = OAuth2PasswordBearer(
+    tokenUrl=f"{settings.API_V1_STR}/auth/login/access-token", auto_error=False
+)
 
-def get_current_user(
-    db: Session = Depends(get_db), token: str = Depends(oauth2_scheme)
-) -> User:
-    credentials_exception = HTTPException(
+def principal_from_user(user: User) -> Principal:
+    return Principal(
+        id=user.id,
+        email=user.email,
+        name=user.name,
+        role=user.role,
+        company_id=user.company_id,
+        company_name=user.company.name if user.company else None,
+        is_active=user.is_active,
+    )
+
+def _credentials_exception() -> HTTPException:
+    return HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
         headers={"WWW-Authenticate": "Bearer"},
     )
+
+def _user_id_from_token(token: str) -> int:
+    user_id = principal_cache.get_user_id(token)
+    if user_id is not None:
+        return user_id
     try:
         payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
-        user_id: str = payload.get("sub")
-        if user_id is None:
-            raise credentials_exception
-        token_data = TokenPayload(sub=user_id)
-    except (JWTError, ValidationError):
-        raise credentials_exception
-    
-    user = db.query(User).filter(User.id == token_data.sub).first()
+        sub: str = payload.get("sub")
+        if sub is None or payload.get("typ") == security.FILE_TOKEN_TYPE: # file tokens only open one /static/ file
+            raise _credentials_exception()
+        token_data = TokenPayload(sub=sub)
+        user_id = int(token_data.sub)
+    except (JWTError, ValidationError, ValueError):
+        raise _credentials_exception()
+    principal_cache.put_token(token, user_id, payload.get("exp"))
+    return user_id
+
+def _cache_principal(user: Optional[User]) -> Principal:
     if user is None:
-        raise credentials_exception
-    return user
+        raise _credentials_exception()
+    principal = principal_from_user(user)
+    principal_cache.put_principal(principal)
+    return principal
+
+def _principal_for_token(db: Session, token: str) -> Principal:
+    return _principal_for_user_id(db, _user_id_from_token(token))
+
+def _principal_for_user_id(db: Session, user_id: int) -> Principal:
+    principal = principal_cache.get_principal(user_id)
+    if principal is not None:
+        return principal
+
+    user = db.query(User).options(joinedload(User.company)).filter(User.id == user_id).first()
+    return _cache_principal(user)
+
+def get_current_user(
+    db: Session = Depends(get_db), token: str = Depends(oauth2_scheme)
+) -> Principal:
+    return _principal_for_token(db, token)
+
+def get_current_user_for_stream(
+    db: Session = Depends(get_db),
+    header_token: Optional[str] = Depends(oauth2_scheme_optional),
+    access_token: Optional[str] = Query(None),
+) -> Principal:
+    """
+    Same as get_current_user, but also accepts ?access_token= because the browser
+    EventSource API cannot send an Authorization header.
+    """
+    token = header_token or access_token
+    if not token:
+        raise _credentials_exception()
+    return _principal_for_token(db, token)
+
+def get_current_user_for_file(
+    file_path: str,
+    db: Session = Depends(get_db),
+    header_token: Optional[str] = Depends(oauth2_scheme_optional),
+    token: Optional[str] = Query(None),
+) -> Principal:
+    """
+    For /static/{file_path}: the Authorization header, or ?token= with a file token
+    for exactly this path (see security.signed_file_url) for <img> / <a> links.
+    """
+    if header_token:
+        return _principal_for_token(db, header_token)
+    user_id = security.user_id_from_file_token(token, file_path) if token else None
+    if user_id is None:
+        raise _credentials_exception()
+    return _principal_for_user_id(db, user_id)
+
+async def get_current_user_async(
+    db: AsyncSession = Depends(get_async_db), token: str = Depends(oauth2_scheme)
+) -> Principal:
+    user_id = _user_id_from_token(token)
+    principal = principal_cache.get_principal(user_id)
+    if principal is not None:
+        return principal
+
+    result = await db.execute(
+        select(User).options(joinedload(User.company)).where(User.id == user_id)
+    )
+    return _cache_principal(result.scalars().first())
+
+def get_read_db(current_user: Principal = Depends(get_current_user)) -> Generator[Session, None, None]:
+    """
+    Session for read-only endpoints: a read replica when DATABASE_READ_URLS is set,
+    except right after this user's own write (then the primary).
+    """
+    yield from get_read_db_for(current_user.id)
+
+async def get_async_read_db(
+    current_user: Principal = Depends(get_current_user_async),
+) -> AsyncGenerator[AsyncSession, None]:
+    async for db in get_async_read_db_for(current_user.id):
+        yield db
+
+# ロール・所属会社・パスワード等が変わったらキャッシュを破棄する（同一プロセス内）
+@event.listens_for(User, "after_update")
+def _invalidate_user_principal(mapper, connection, target: User) -> None:
+    principal_cache.invalidate_user(target.id)
+
+@event.listens_for(User, "after_delete")
+def _invalidate_deleted_user_principal(mapper, connection, target: User) -> None:
+    principal_cache.invalidate_user(target.id)
 
+# 会社名はスナップショットに含まれるため、会社の更新時は全体を破棄する
+@event.listens_for(Company, "after_update")
+def _invalidate_company_principals(mapper, connection, target: Company) -> None:
+    principal_cache.clear()
@@ -1,7 +1,22 @@
 from fastapi import APIRouter
-from app.api.v1.endpoints import auth, issues, messages, upload, users, companies
+from app.api.v1.endpoints import auth, export, issues, messages, search, stats, upload, users, companies
+from app.db.session import USE_ASYNC_DB
 
 api_router = APIRouter()
+
+# Static /issues/* paths go first so they are not captured by /issues/{issue_id}
+api_router.include_router(search.router, prefix="/issues", tags=["issues"])
+api_router.include_router(stats.router, prefix="/issues", tags=["issues"])
+api_router.include_router(export.router, prefix="/issues", tags=["issues"])
+
+# 非同期 DB スタック有効時は、同じパスの非同期版ルートを先に登録して優先させる
+if USE_ASYNC_DB:
+    from app.api.v1.endpoints import auth_async, issues_async, messages_async
+
+    api_router.include_router(auth_async.router, prefix="/auth", tags=["auth"])
+    api_router.include_router(issues_async.router, prefix="/issues", tags=["issues"])
+    api_router.include_router(messages_async.router, prefix="/issues", tags=["messages"])
+
 api_router.include_router(auth.router, prefix="/auth", tags=["auth"])
 api_router.include_router(issues.router, prefix="/issues", tags=["issues"])
 api_router.include_router(messages.router, prefix="/issues", tags=["messages"]) # Nested under /issues
@@ -1,6 +1,7 @@
 from datetime import timedelta
-from typing import Any
+from typing import Any, Optional
 from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi.concurrency import run_in_threadpool
 from fastapi.security import OAuth2PasswordRequestForm
 from sqlalchemy.orm import Session
 
@@ -12,29 +13,42 @@ from app.schemas.user import Token
 
 router = APIRouter()
 
+def token_response(user_id: int) -> dict:
+    access_token_expires = timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
+    return {
+        "access_token": security.create_access_token(
+            subject=user_id, expires_delta=access_token_expires
+        ),
+        "token_type": "bearer",
+    }
+
+def get_user_by_email(db: Session, email: str) -> Optional[User]:
+    return db.query(User).filter(User.email == email).first()
+
 @router.post("/login/access-token", response_model=Token)
-def login_access_token(
+async def login_access_token(
     db: Session = Depends(get_db), form_data: OAuth2PasswordRequestForm = Depends()
 ) -> Any:
     """
     OAuth2 compatible token login, get an access token for future requests
     """
+    # The route is async so that no threadpool thread is held while bcrypt runs:
+    # only the DB calls go to the threadpool, bcrypt waits on the auth executor.
     # 1. Find user by email
-    user = db.query(User).filter(User.email == form_data.username).first()
+    user = await run_in_threadpool(get_user_by_email, db, form_data.username)
     
     # 2. Authenticate
-    if not user or not security.verify_password(form_data.password, user.password_hash):
+    if not user or not await security.verify_password_async(form_data.password, user.password_hash):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect email or password",
         )
+    user_id = user.id # read before commit expires the instance
+    
+    # Transparently upgrade hashes made with an old BCRYPT_ROUNDS
+    if security.needs_rehash(user.password_hash):
+        user.password_hash = await security.get_password_hash_async(form_data.password)
+        await run_in_threadpool(db.commit)
     
     # 3. Generate token
-    access_token_expires = timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
-    return {
-        "access_token": security.create_access_token(
-            subject=user.id, expires_delta=access_token_expires
-        ),
-        "token_type": "bearer",
-    }
-
+    return token_response(user_id)
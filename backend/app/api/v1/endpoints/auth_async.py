@@ -0,0 +1,40 @@
+from typing import Any
+from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi.security import OAuth2PasswordRequestForm
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.db.session import get_async_db
+from app.core import security
+from app.models.user import User
+from app.schemas.user import Token
+from app.api.v1.endpoints.auth import token_response
+
+# USE_ASYNC_DB=true のときに auth.py の同名ルートより先に登録される非同期版
+router = APIRouter()
+
+@router.post("/login/access-token", response_model=Token)
+async def login_access_token_async(
+    db: AsyncSession = Depends(get_async_db), form_data: OAuth2PasswordRequestForm = Depends()
+) -> Any:
+    """
+    OAuth2 compatible token login, get an access token for future requests
+    """
+    # 1. Find user by email
+    result = await db.execute(select(User).where(User.email == form_data.username))
+    user = result.scalars().first()
+
+    # 2. Authenticate (bcrypt runs on the bounded auth executor, off the event loop)
+    if not user or not await security.verify_password_async(form_data.password, user.password_hash):
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Incorrect email or password",
+        )
+
+    # Transparently upgrade hashes made with an old BCRYPT_ROUNDS
+    if security.needs_rehash(user.password_hash):
+        user.password_hash = await security.get_password_hash_async(form_data.password)
+        await db.commit()
+
+    # 3. Generate token
+    return token_response(user.id)
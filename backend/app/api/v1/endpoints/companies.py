@@ -1,6 +1,6 @@
 from typing import Any, List
 from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from sqlalchemy.orm import Session, selectinload
 import uuid
 import logging
 
@@ -8,7 +8,8 @@ from app.db.session import get_db
 from app.models.user import User, UserRole, Company
 from app.schemas.user import CompanyCreate, CompanyRead, UserInviteResponse
 from app.api.deps import get_current_user
-from app.core.security import get_password_hash
+from app.core.principal_cache import Principal
+from app.core.security import make_unusable_password
 
 router = APIRouter()
 logger = logging.getLogger(__name__)
@@ -16,7 +17,7 @@ logger = logging.getLogger(__name__)
 @router.get("/", response_model=List[CompanyRead])
 def read_companies(
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_user),
     skip: int = 0,
     limit: int = 100,
 ) -> Any:
@@ -27,7 +28,8 @@ def read_companies(
     if "UNITEC" not in current_user.role.value:
         raise HTTPException(status_code=403, detail="Not authorized")
 
-    companies = db.query(Company).offset(skip).limit(limit).all()
+    # CompanyRead は users を含むので、ページ分をまとめて 1 クエリで読み込む（会社ごとの遅延ロードを避ける）
+    companies = db.query(Company).options(selectinload(Company.users)).order_by(Company.id).offset(skip).limit(limit).all()
     return companies
 
 @router.post("/", response_model=UserInviteResponse)
@@ -35,7 +37,7 @@ def create_company(
     *,
     db: Session = Depends(get_db),
     company_in: CompanyCreate,
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_user),
 ) -> Any:
     """
     Create new company and its first admin user (CLIENT_ADMIN).
@@ -74,7 +76,7 @@ def create_company(
     db_user = User(
         email=company_in.representative_email,
         name=company_in.representative_name,
-        password_hash=get_password_hash(str(uuid.uuid4())), # Placeholder password
+        password_hash=make_unusable_password(), # Cannot login until the invitation is accepted
         role=UserRole.CLIENT_ADMIN,
         company_id=db_company.id,
         invitation_token=invitation_token,
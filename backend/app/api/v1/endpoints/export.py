@@ -0,0 +1,131 @@
+import csv
+import io
+import json
+from datetime import date, datetime
+from enum import Enum
+from itertools import groupby
+from typing import Any, Dict, Iterator, List, Literal, Sequence
+from fastapi import APIRouter, Depends
+from fastapi.responses import StreamingResponse
+from sqlalchemy import Select, select
+from sqlalchemy.orm import aliased
+
+from app.db.session import close_read_session, open_read_session
+from app.core.config import settings
+from app.models.user import User, UserRole, Company
+from app.models.issue import Issue, Ingredient
+from app.api.deps import get_current_user
+from app.core.principal_cache import Principal
+
+# /issues/export は /issues/{issue_id} より先に登録する必要があるため、独立したルーターにしています
+router = APIRouter()
+
+Creator = aliased(User)
+
+# 列順は IssueCreate に合わせ、そのまま POST /issues/bulk に再投入できる形にしています
+EXPORT_COLUMNS = [
+    "id", "issue_code", "status", "ball_holder", "title", "category", "product_name",
+    "description", "urgency", "client_arbitrary_code", "desired_deadline",
+    "is_sample_provided", "sample_shipping_info", "company_id", "company_name",
+    "creator_id", "creator_name", "created_at", "updated_at", "ingredients",
+]
+
+def build_issue_export_query(current_user: Principal) -> Select:
+    # 一覧 (read_issues) と同じスコープ・並び順。ORM オブジェクトではなく列だけを読み、
+    # セッションの identity map が件数に比例して膨らまないようにする
+    query = (
+        select(
+            Issue.id, Issue.issue_code, Issue.status, Issue.ball_holder, Issue.title,
+            Issue.category, Issue.product_name, Issue.description, Issue.urgency,
+            Issue.client_arbitrary_code, Issue.desired_deadline, Issue.is_sample_provided,
+            Issue.sample_shipping_info, Issue.company_id, Company.name.label("company_name"),
+            Issue.creator_id, Creator.name.label("creator_name"), Issue.created_at, Issue.updated_at,
+        )
+        .outerjoin(Company, Issue.company_id == Company.id)
+        .outerjoin(Creator, Issue.creator_id == Creator.id)
+        .order_by(Issue.created_at.desc(), Issue.id.desc())
+    )
+    if current_user.role not in [UserRole.UNITEC_ADMIN, UserRole.UNITEC_RD, UserRole.UNITEC_SALES]:
+        query = query.where(Issue.company_id == current_user.company_id)
+    return query
+
+def _plain(value: Any) -> Any:
+    if isinstance(value, Enum):
+        return value.value
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    return value
+
+def iter_export_records(current_user: Principal) -> Iterator[List[Dict[str, Any]]]:
+    """
+    Yield the exported issues one chunk (EXPORT_CHUNK_SIZE rows) at a time.
+    Issues come from a single server-side cursor; ingredients are loaded per chunk
+    on a second connection, since MySQL cannot run another query on a connection
+    while an unbuffered result is still open.
+    """
+    # 時間のかかる読み取りなので、レプリカがあればそちらで行う
+    stream_db, stream_replica = open_read_session(current_user.id)
+    related_db, related_replica = open_read_session(current_user.id, prefer=stream_replica)
+    try:
+        result = stream_db.execute(
+            build_issue_export_query(current_user).execution_options(yield_per=settings.EXPORT_CHUNK_SIZE)
+        )
+        for rows in result.mappings().partitions():
+            issue_ids = [row["id"] for row in rows]
+            ingredient_rows = related_db.execute(
+                select(Ingredient.issue_id, Ingredient.name, Ingredient.amount)
+                .where(Ingredient.issue_id.in_(issue_ids))
+                .order_by(Ingredient.issue_id, Ingredient.id)
+            ).all()
+            related_db.rollback()
+            ingredients = {
+                issue_id: [{"name": name, "amount": amount} for _, name, amount in group]
+                for issue_id, group in groupby(ingredient_rows, key=lambda row: row[0])
+            }
+            yield [
+                {**{key: _plain(value) for key, value in row.items()}, "ingredients": ingredients.get(row["id"], [])}
+                for row in rows
+            ]
+    finally:
+        close_read_session(related_db, related_replica)
+        close_read_session(stream_db, stream_replica)
+
+def csv_export_stream(chunks: Iterator[Sequence[Dict[str, Any]]]) -> Iterator[str]:
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=EXPORT_COLUMNS, lineterminator="\r\n")
+    # BOM を付けて Excel でも文字化けせずに開けるようにする
+    buffer.write("\ufeff")
+    writer.writeheader()
+    yield buffer.getvalue()
+    for records in chunks:
+        buffer.seek(0)
+        buffer.truncate()
+        for record in records:
+            writer.writerow({**record, "ingredients": json.dumps(record["ingredients"], ensure_ascii=False)})
+        yield buffer.getvalue()
+
+def ndjson_export_stream(chunks: Iterator[Sequence[Dict[str, Any]]]) -> Iterator[str]:
+    for records in chunks:
+        yield "".join(json.dumps(record, ensure_ascii=False) + "\n" for record in records)
+
+@router.get("/export")
+def export_issues(
+    format: Literal["csv", "ndjson"] = "csv",
+    current_user: Principal = Depends(get_current_user),
+) -> Any:
+    """
+    Export every issue visible to the user (same scope as the list) with company,
+    creator and ingredients, as CSV or NDJSON. The body is streamed chunk by chunk,
+    so memory use does not grow with the number of issues.
+    """
+    chunks = iter_export_records(current_user)
+    filename = f"issues-{datetime.now().strftime('%Y%m%d')}.{format}"
+    if format == "csv":
+        body, media_type = csv_export_stream(chunks), "text/csv; charset=utf-8"
+    else:
+        body, media_type = ndjson_export_stream(chunks), "application/x-ndjson"
+    return StreamingResponse(
+        body,
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{filename}"', "X-Accel-Buffering": "no"},
+    )
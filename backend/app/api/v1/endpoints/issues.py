@@ -1,81 +1,256 @@
-from typing import Any, List, Optional
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from typing import Any, Iterable, List, Optional
+from collections import Counter
+import hashlib
+import json
+import logging
+import os
+from fastapi import APIRouter, Depends, Header, HTTPException, Request, Response, status
+from fastapi.concurrency import run_in_threadpool
+from pydantic import TypeAdapter, ValidationError
+from sqlalchemy import Row, Select, and_, insert, or_, select
+from sqlalchemy.orm import Session, aliased
+from sqlalchemy.orm.exc import StaleDataError
 from sqlalchemy.orm import joinedload
 
 from app.db.session import get_db
+from app.db import issue_stats, search
+from app.db.issue_codes import allocate_issue_codes
+from app.db.upsert import upsert_increment
 from app.core import security
-from app.models.user import User, UserRole
-from app.models.issue import Issue, Ingredient, IssueStatus, BallHolder, Attachment
-from app.schemas.issue import IssueCreate, IssueUpdate, IssueRead, IssueListSummary
-from app.api.deps import get_current_user
+from app.core import previews, storage
+from app.core.config import settings
+from app.core.etag import etag_matches, if_match_satisfied, not_modified, strong_etag, weak_etag
+from app.core.pagination import NEXT_CURSOR_HEADER, decode_cursor, next_cursor_for
+from app.core.record_stream import RecordError, iter_records
+from app.core.response_cache import CachedResponse, ResponseCache
+from app.models.user import User, UserRole, Company
+from app.models.issue import Issue, Ingredient, IssueStatus, BallHolder, Attachment, IssueListVersion, IssueStat
+from app.schemas.issue import (
+    IssueCreate, IssueUpdate, IssueRead, IssueListSummary, BulkImportResult, BulkImportRowError
+)
+from app.api.deps import get_current_user, get_read_db
+from app.core.principal_cache import Principal
 
 router = APIRouter()
+logger = logging.getLogger(__name__)
 
-# --- Endpoints ---
+_issue_list_adapter = TypeAdapter(List[IssueListSummary])
 
-@router.get("/", response_model=List[IssueListSummary])
-def read_issues(
-    db: Session = Depends(get_db),
+# --- Query helpers (shared with the async endpoints in issues_async.py) ---
+
+# List views select only the IssueListSummary columns (company / creator names joined in)
+# as plain rows, so no ORM objects are hydrated into the identity map.
+_creator = aliased(User)
+
+def build_issue_summary_query() -> Select:
+    return (
+        select(
+            Issue.id,
+            Issue.issue_code,
+            Issue.title,
+            Issue.status,
+            Issue.category,
+            Issue.urgency,
+            Issue.desired_deadline,
+            Issue.ball_holder,
+            Issue.created_at,
+            Issue.product_name,
+            Company.name.label("company_name"),
+            _creator.name.label("creator_name"),
+        )
+        .outerjoin(Company, Company.id == Issue.company_id)
+        .outerjoin(_creator, _creator.id == Issue.creator_id)
+    )
+
+def build_issue_list_query(
+    current_user: Principal,
     skip: int = 0,
     limit: int = 100,
-    current_user: User = Depends(get_current_user),
-) -> Any:
-    """
-    Retrieve issues.
-    Admin sees all issues.
-    Client sees only their company's issues.
-    """
-    query = db.query(Issue)
+    cursor: Optional[str] = None,
+) -> Select:
+    query = build_issue_summary_query()
     
     # Filter by role
     if current_user.role not in [UserRole.UNITEC_ADMIN, UserRole.UNITEC_RD, UserRole.UNITEC_SALES]:
         # Client Side: Filter by company
-        query = query.filter(Issue.company_id == current_user.company_id)
-    
-    issues = query.options(
+        query = query.where(Issue.company_id == current_user.company_id)
+
+    query = query.order_by(Issue.created_at.desc(), Issue.id.desc())
+
+    if cursor:
+        cursor_created_at, cursor_id = decode_cursor(cursor)
+        query = query.where(
+            or_(
+                Issue.created_at < cursor_created_at,
+                and_(Issue.created_at == cursor_created_at, Issue.id < cursor_id),
+            )
+        )
+    elif skip:
+        query = query.offset(skip)
+
+    return query.limit(limit)
+
+def to_issue_list_summaries(rows: Iterable[Row]) -> List[IssueListSummary]:
+    # Rows come straight from typed columns, so skip validation and build the models as-is;
+    # they are serialized once with issue_list_json().
+    return [IssueListSummary.model_construct(**row._mapping) for row in rows]
+
+def issue_list_json(rows: Iterable[Row]) -> bytes:
+    return _issue_list_adapter.dump_json(to_issue_list_summaries(rows))
+
+def build_issue_detail_query(issue_id: int) -> Select:
+    return select(Issue).options(
+        joinedload(Issue.ingredients),
+        joinedload(Issue.attachments),
         joinedload(Issue.company),
         joinedload(Issue.creator) # Added
-    ).order_by(Issue.created_at.desc()).offset(skip).limit(limit).all()
+    ).where(Issue.id == issue_id)
 
-    # Map to schema manually if needed, or rely on Pydantic's from_attributes if property exists
-    # Issue model has .company relationship, so issue.company.name should be accessible.
-    # However, Pydantic expects 'company_name' on the object.
-    # We can inject it or use a property on the model.
-    # Let's map it explicitly for list response if Pydantic doesn't map 'company.name' to 'company_name' automatically (it doesn't).
+def check_issue_permission(issue: Optional[Issue], current_user: Principal) -> Issue:
+    if not issue:
+        raise HTTPException(status_code=404, detail="Issue not found")
     
-    result = []
-    for issue in issues:
-        issue_data = IssueListSummary.model_validate(issue)
-        if issue.company:
-            issue_data.company_name = issue.company.name
-        if issue.creator:
-            issue_data.creator_name = issue.creator.name
-        result.append(issue_data)
+    # Permission check
+    if current_user.role not in [UserRole.UNITEC_ADMIN, UserRole.UNITEC_RD, UserRole.UNITEC_SALES]:
+        if issue.company_id != current_user.company_id:
+            raise HTTPException(status_code=400, detail="Not enough permissions")
+    return issue
+
+def attach_display_names(issue: Issue, user_id: Optional[int] = None) -> Issue:
+    # Convert to IssueRead and add company_name
+    # Since we're returning an ORM model but response_model is Pydantic, 
+    # FastAPI handles the conversion. However, 'company_name' is not a direct attribute of Issue.
+    # We can rely on the fact that Pydantic v2 (or v1) might not auto-map nested relations to flat fields unless configured.
+    # A safer way for 'company_name' is to map it explicitly if needed, or ensure the model has a property.
+    
+    # Let's verify if Pydantic can pull 'company.name' automatically? Not usually for flat 'company_name' field.
+    # We should manually validate or attach it.
+    
+    # Since response_model=IssueRead, we can let FastAPI validate the object.
+    # But 'company_name' needs to be on the object.
+    
+    # Dynamic attribute assignment on the instance (works if it's not frozen):
+    if issue.company:
+        setattr(issue, "company_name", issue.company.name)
+    
+    if issue.creator:
+        setattr(issue, "creator_name", issue.creator.name)
+
+    for att in issue.attachments:
+        ext = os.path.splitext(att.file_path or "")[1].lower()
+        preview = previews.ready_preview_url(att.sha256, ext)
+        if user_id is not None:
+            # <img> / <a> 用に、このユーザー専用の短命トークン付き URL にする
+            preview = security.signed_file_url(preview, user_id)
+            setattr(att, "download_url", security.signed_file_url(att.file_path, user_id))
+        setattr(att, "preview_url", preview)
 
+    return issue
+
+def new_attachments(db: Session, issue_id: int, attachments_data: List[dict]) -> List[Attachment]:
+    # Link each attachment to its content-addressed blob (if any) and take a reference on it
+    blobs = storage.known_blobs(db, [att['file_path'] for att in attachments_data])
+    result = []
+    for att in attachments_data:
+        blob = blobs.get(storage.sha256_from_path(att['file_path']))
+        result.append(
+            Attachment(
+                issue_id=issue_id,
+                file_name=att['file_name'],
+                file_path=att['file_path'],
+                file_type=att.get('file_type'),
+                sha256=blob.sha256 if blob else None,
+                file_size=blob.size if blob else None,
+            )
+        )
+    storage.add_blob_refs(db, [att.sha256 for att in result])
     return result
 
-@router.post("/", response_model=IssueRead)
-def create_issue(
-    *,
-    db: Session = Depends(get_db),
-    issue_in: IssueCreate,
-    current_user: User = Depends(get_current_user),
-) -> Any:
-    """
-    Create new issue.
-    """
+def issue_etag(issue: Issue) -> str:
+    return strong_etag("issue", issue.id, issue.version or 0)
+
+def sync_ingredients(issue: Issue, ingredients_data: List[dict]) -> bool:
+    # Ingredients are shown in id order, so match them up by position: rows whose
+    # content is unchanged are left alone, the rest are updated in place, and only
+    # the length difference turns into INSERTs / DELETEs.
+    existing = sorted(issue.ingredients, key=lambda ing: ing.id)
+    changed = False
+    for db_ing, ing in zip(existing, ingredients_data):
+        if (db_ing.name, db_ing.amount) != (ing['name'], ing['amount']):
+            db_ing.name = ing['name']
+            db_ing.amount = ing['amount']
+            changed = True
+    for db_ing in existing[len(ingredients_data):]:
+        issue.ingredients.remove(db_ing) # delete-orphan
+        changed = True
+    for ing in ingredients_data[len(existing):]:
+        issue.ingredients.append(Ingredient(name=ing['name'], amount=ing['amount']))
+        changed = True
+    return changed
+
+def sync_attachments(db: Session, issue: Issue, attachments_data: List[dict]) -> bool:
+    # Attachments are matched by file_path (the stored file), so blob references only
+    # move for files that were actually added or removed.
+    remaining: dict = {}
+    for db_att in sorted(issue.attachments, key=lambda att: att.id):
+        remaining.setdefault(db_att.file_path, []).append(db_att)
+    added = []
+    changed = False
+    for att in attachments_data:
+        matches = remaining.get(att['file_path'])
+        if not matches:
+            added.append(att)
+            continue
+        db_att = matches.pop(0)
+        if (db_att.file_name, db_att.file_type) != (att['file_name'], att.get('file_type')):
+            db_att.file_name = att['file_name']
+            db_att.file_type = att.get('file_type')
+            changed = True
+    removed = [db_att for matches in remaining.values() for db_att in matches]
+    if removed:
+        storage.release_blob_refs(db, [db_att.sha256 for db_att in removed])
+        for db_att in removed:
+            issue.attachments.remove(db_att) # delete-orphan
+    if added:
+        issue.attachments.extend(new_attachments(db, issue.id, added))
+    return changed or bool(removed) or bool(added)
+
+# --- Issue list cache ---
+# Cached per scope and keyed by the scope's IssueListVersion, so any write through
+# create_issue / update_issue (in any worker) makes older entries unreachable.
+# Company / creator renames do not bump the version and may show up late.
+
+issue_list_cache = ResponseCache(max_entries=settings.ISSUE_LIST_CACHE_SIZE)
+
+def issue_list_scope(current_user: Principal) -> str:
     if current_user.role in [UserRole.UNITEC_ADMIN, UserRole.UNITEC_RD, UserRole.UNITEC_SALES]:
-         # Ideally Admin shouldn't create request issues, but for MVP let's allow or restrict
-         # For now, let's assume only Clients create requests primarily
-         pass
+        return "all"
+    return f"company:{current_user.company_id}"
 
-    # 1. Generate Issue Code (Simple auto-increment like logic or random for MVP)
-    # In production, use a sequence or count
-    import uuid
-    issue_code = f"REQ-{uuid.uuid4().hex[:8].upper()}"
+def build_issue_list_version_query(scope: str) -> Select:
+    return select(IssueListVersion.version).where(IssueListVersion.scope == scope)
 
-    # 2. Create Issue
+def bump_issue_list_version(db: Session, company_ids: Iterable[Optional[int]]) -> None:
+    # Call as the last step before commit in the transaction that writes the issues:
+    # the "all" row is shared by every issue write, so its row lock (MySQL) must be
+    # held only for the commit, not while the issue rows / search index are written.
+    db.flush()
+    scopes = {"all"} | {f"company:{company_id}" for company_id in company_ids}
+    upsert_increment(db, IssueListVersion, [{"scope": scope} for scope in sorted(scopes)], "version")
+
+def issue_list_etag(scope: str, version: int, skip: int, limit: int, cursor: Optional[str]) -> str:
+    params = hashlib.sha1(f"{skip}:{limit}:{cursor or ''}".encode("utf-8")).hexdigest()[:12]
+    return weak_etag("issues", scope, version, params)
+
+def render_issue_list(rows: List[Row], limit: int, etag: str) -> CachedResponse:
+    headers = {}
+    next_cursor = next_cursor_for(rows, limit)
+    if next_cursor:
+        headers[NEXT_CURSOR_HEADER] = next_cursor
+    body = issue_list_json(rows)
+    return CachedResponse(body=body, etag=etag, headers=headers)
+
+def new_issue_values(issue_in: IssueCreate, issue_code: str, company_id: Optional[int], creator_id: int) -> dict:
     # Determine status (default UNTOUCHED, but allow DRAFT if passed?) 
     # For MVP, let's say if client saves as draft, status is DRAFT.
     # But issue_in.status default is UNTOUCHED in schema?
@@ -88,7 +263,7 @@ def create_issue(
     if initial_status == IssueStatus.DRAFT:
         initial_ball_holder = BallHolder.CLIENT # Ball stays with client for drafts
 
-    db_issue = Issue(
+    return dict(
         issue_code=issue_code,
         title=issue_in.title,
         category=issue_in.category,
@@ -103,12 +278,118 @@ def create_issue(
         status=initial_status,
         ball_holder=initial_ball_holder, 
         
-        company_id=current_user.company_id,
-        creator_id=current_user.id,
+        company_id=company_id,
+        creator_id=creator_id,
+    )
+
+def insert_issue_batch(db: Session, issues_in: List[IssueCreate], company_id: Optional[int], creator_id: int) -> List[int]:
+    """
+    Insert many issues with their ingredients and attachments using executemany,
+    and update the search index / stats / list version for the whole batch. Caller commits.
+    """
+    codes = allocate_issue_codes(company_id, len(issues_in))
+    issue_rows = [
+        new_issue_values(issue_in, code, company_id, creator_id)
+        for issue_in, code in zip(issues_in, codes)
+    ]
+    db.execute(insert(Issue), issue_rows)
+    # MySQL has no RETURNING, so map the generated ids back through the unique issue codes
+    ids_by_code = dict(db.execute(select(Issue.issue_code, Issue.id).where(Issue.issue_code.in_(codes))).all())
+    issue_ids = [ids_by_code[code] for code in codes]
+
+    ingredient_rows = [
+        {"issue_id": issue_id, "name": ing.name, "amount": ing.amount}
+        for issue_id, issue_in in zip(issue_ids, issues_in)
+        for ing in issue_in.ingredients
+    ]
+    if ingredient_rows:
+        db.execute(insert(Ingredient), ingredient_rows)
+
+    blobs = storage.known_blobs(db, [att.file_path for issue_in in issues_in for att in issue_in.attachments])
+    attachment_rows = []
+    for issue_id, issue_in in zip(issue_ids, issues_in):
+        for att in issue_in.attachments:
+            blob = blobs.get(storage.sha256_from_path(att.file_path))
+            attachment_rows.append({
+                "issue_id": issue_id,
+                "file_name": att.file_name,
+                "file_path": att.file_path,
+                "file_type": att.file_type,
+                "sha256": blob.sha256 if blob else None,
+                "file_size": blob.size if blob else None,
+            })
+    if attachment_rows:
+        db.execute(insert(Attachment), attachment_rows)
+        storage.add_blob_refs(db, [row["sha256"] for row in attachment_rows])
+
+    stat_counts = Counter(
+        tuple(issue_stats.stat_key(row["company_id"], row["status"], row["ball_holder"], row["urgency"]).items())
+        for row in issue_rows
     )
+    for key, count in stat_counts.items():
+        upsert_increment(db, IssueStat, [dict(key)], "count", count)
+
+    search.index_issues(db, issue_ids)
+    bump_issue_list_version(db, [company_id]) # last statement; callers commit right after
+    return issue_ids
+
+# --- Endpoints ---
+
+@router.get("/", response_model=List[IssueListSummary])
+def read_issues(
+    db: Session = Depends(get_read_db),
+    skip: int = 0,
+    limit: int = 100,
+    cursor: Optional[str] = None,
+    if_none_match: Optional[str] = Header(None),
+    current_user: Principal = Depends(get_current_user),
+) -> Any:
+    """
+    Retrieve issues.
+    Admin sees all issues.
+    Client sees only their company's issues.
+
+    Pass the X-Next-Cursor response header back as `cursor` to fetch the next page
+    (keyset pagination on (created_at, id)). `skip` is ignored when `cursor` is given.
+    Responds 304 when If-None-Match matches the current ETag.
+    """
+    scope = issue_list_scope(current_user)
+    version = db.execute(build_issue_list_version_query(scope)).scalar() or 0
+    etag = issue_list_etag(scope, version, skip, limit, cursor)
+    if etag_matches(if_none_match, etag):
+        issue_list_cache.record_not_modified()
+        return not_modified(etag)
+
+    cache_key = (scope, version, skip, limit, cursor)
+    cached = issue_list_cache.get(cache_key)
+    if cached is None:
+        rows = db.execute(build_issue_list_query(current_user, skip, limit, cursor)).all()
+        cached = issue_list_cache.put(cache_key, render_issue_list(rows, limit, etag))
+    return cached.to_response()
+
+@router.post("/", response_model=IssueRead)
+def create_issue(
+    *,
+    db: Session = Depends(get_db),
+    issue_in: IssueCreate,
+    current_user: Principal = Depends(get_current_user),
+) -> Any:
+    """
+    Create new issue.
+    """
+    if current_user.role in [UserRole.UNITEC_ADMIN, UserRole.UNITEC_RD, UserRole.UNITEC_SALES]:
+         # Ideally Admin shouldn't create request issues, but for MVP let's allow or restrict
+         # For now, let's assume only Clients create requests primarily
+         pass
+
+    # 1. Generate Issue Code
+    issue_code = allocate_issue_codes(current_user.company_id)[0]
+
+    # 2. Create Issue (flush for the id; everything below commits together)
+    db_issue = Issue(**new_issue_values(issue_in, issue_code, current_user.company_id, current_user.id))
     db.add(db_issue)
-    db.commit()
-    db.refresh(db_issue)
+    issue_stats.record_issue_created(db, db_issue)
+    db.flush()
 
     # 3. Create Ingredients
     for ing in issue_in.ingredients:
@@ -120,64 +401,118 @@ def create_issue(
         db.add(db_ing)
     
     # 4. Create Attachments
-    for att in issue_in.attachments:
-        db_att = Attachment(
-            issue_id=db_issue.id,
-            file_name=att.file_name,
-            file_path=att.file_path,
-            file_type=att.file_type
-        )
-        db.add(db_att)
+    db.add_all(new_attachments(db, db_issue.id, [att.model_dump() for att in issue_in.attachments]))
+    
+    search.index_issue(db, db_issue.id)
+    bump_issue_list_version(db, [db_issue.company_id])
     
     db.commit()
     db.refresh(db_issue)
     
     return db_issue
 
+def _parse_bulk_record(record: dict) -> IssueCreate:
+    # CSV cells carry nested lists as JSON text
+    for key in ("ingredients", "attachments"):
+        if isinstance(record.get(key), str):
+            try:
+                record[key] = json.loads(record[key])
+            except ValueError:
+                raise ValueError(f"{key}: must be a JSON array")
+    return IssueCreate.model_validate(record)
+
+def _validation_messages(error: ValidationError) -> List[str]:
+    return [f"{'.'.join(str(part) for part in err['loc'])}: {err['msg']}" for err in error.errors()]
+
+def _import_chunk(
+    db: Session,
+    chunk: List[tuple],
+    company_id: Optional[int],
+    creator_id: int,
+    result: BulkImportResult,
+) -> None:
+    row_numbers = [row_number for row_number, _ in chunk]
+    try:
+        issue_ids = insert_issue_batch(db, [issue_in for _, issue_in in chunk], company_id, creator_id)
+        db.commit()
+    except Exception as e:
+        db.rollback()
+        logger.error(f"Bulk import chunk failed: {e}")
+        result.failed += len(chunk)
+        result.errors.extend(
+            BulkImportRowError(row=row_number, errors=["Database error, chunk rolled back"])
+            for row_number in row_numbers
+        )
+        return
+    result.created += len(issue_ids)
+    result.issue_ids.extend(issue_ids)
+
+@router.post("/bulk", response_model=BulkImportResult)
+async def bulk_import_issues(
+    request: Request,
+    company_id: Optional[int] = None,
+    db: Session = Depends(get_db),
+    current_user: Principal = Depends(get_current_user),
+) -> Any:
+    """
+    Import many issues at once from a CSV, JSON array or NDJSON body (chosen by Content-Type).
+    Each record has the IssueCreate fields; in CSV, `ingredients` / `attachments` are JSON text.
+    The body is parsed while it streams in and inserted in batched transactions
+    of BULK_IMPORT_CHUNK_SIZE rows. Invalid rows are skipped and reported.
+    Unitec users may import on behalf of another company with `company_id`.
+    """
+    target_company_id = current_user.company_id
+    if company_id is not None and company_id != current_user.company_id:
+        if current_user.role not in [UserRole.UNITEC_ADMIN, UserRole.UNITEC_RD, UserRole.UNITEC_SALES]:
+            raise HTTPException(status_code=400, detail="Not enough permissions")
+        if await run_in_threadpool(db.get, Company, company_id) is None:
+            raise HTTPException(status_code=404, detail="Company not found")
+        target_company_id = company_id
+
+    records = iter_records(request.headers.get("content-type"), request.stream())
+    result = BulkImportResult(created=0, failed=0)
+    chunk: List[tuple] = []
+    row_number = 0
+    async for record in records:
+        row_number += 1
+        if isinstance(record, RecordError):
+            result.failed += 1
+            result.errors.append(BulkImportRowError(row=row_number, errors=[record.message]))
+            continue
+        try:
+            chunk.append((row_number, _parse_bulk_record(record)))
+        except ValidationError as e:
+            result.failed += 1
+            result.errors.append(BulkImportRowError(row=row_number, errors=_validation_messages(e)))
+            continue
+        except ValueError as e:
+            result.failed += 1
+            result.errors.append(BulkImportRowError(row=row_number, errors=[str(e)]))
+            continue
+        if len(chunk) >= settings.BULK_IMPORT_CHUNK_SIZE:
+            await run_in_threadpool(_import_chunk, db, chunk, target_company_id, current_user.id, result)
+            chunk = []
+    if chunk:
+        await run_in_threadpool(_import_chunk, db, chunk, target_company_id, current_user.id, result)
+
+    return result
+
 @router.get("/{issue_id}", response_model=IssueRead)
 def read_issue(
     *,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
     issue_id: int,
-    current_user: User = Depends(get_current_user),
+    response: Response,
+    current_user: Principal = Depends(get_current_user),
 ) -> Any:
     """
     Get issue by ID.
+    The ETag header can be sent back as If-Match on PUT.
     """
-    issue = db.query(Issue).options(
-        joinedload(Issue.ingredients),
-        joinedload(Issue.attachments),
-        joinedload(Issue.company),
-        joinedload(Issue.creator) # Added
-    ).filter(Issue.id == issue_id).first()
-    if not issue:
-        raise HTTPException(status_code=404, detail="Issue not found")
-    
-    # Permission check
-    if current_user.role not in [UserRole.UNITEC_ADMIN, UserRole.UNITEC_RD, UserRole.UNITEC_SALES]:
-        if issue.company_id != current_user.company_id:
-            raise HTTPException(status_code=400, detail="Not enough permissions")
-    
-    # Convert to IssueRead and add company_name
-    # Since we're returning an ORM model but response_model is Pydantic, 
-    # FastAPI handles the conversion. However, 'company_name' is not a direct attribute of Issue.
-    # We can rely on the fact that Pydantic v2 (or v1) might not auto-map nested relations to flat fields unless configured.
-    # A safer way for 'company_name' is to map it explicitly if needed, or ensure the model has a property.
-    
-    # Let's verify if Pydantic can pull 'company.name' automatically? Not usually for flat 'company_name' field.
-    # We should manually validate or attach it.
-    
-    # Since response_model=IssueRead, we can let FastAPI validate the object.
-    # But 'company_name' needs to be on the object.
-    
-    # Dynamic attribute assignment on the instance (works if it's not frozen):
-    if issue.company:
-        setattr(issue, "company_name", issue.company.name)
-    
-    if issue.creator:
-        setattr(issue, "creator_name", issue.creator.name)
-
-    return issue
+    issue = db.execute(build_issue_detail_query(issue_id)).unique().scalars().first()
+    check_issue_permission(issue, current_user)
+    response.headers["ETag"] = issue_etag(issue)
+    return attach_display_names(issue, current_user.id)
 
 @router.put("/{issue_id}", response_model=IssueRead)
 def update_issue(
@@ -185,69 +520,71 @@ def update_issue(
     db: Session = Depends(get_db),
     issue_id: int,
     issue_in: IssueUpdate,
-    current_user: User = Depends(get_current_user),
+    response: Response,
+    if_match: Optional[str] = Header(None),
+    current_user: Principal = Depends(get_current_user),
 ) -> Any:
     """
     Update issue.
+    Ingredients and attachments are diffed against the stored rows and only the
+    differences are written; a save that changes nothing writes nothing.
+    Send the ETag from GET / PUT as If-Match to get 412 instead of overwriting
+    someone else's newer changes.
     """
     issue = db.query(Issue).options(
         joinedload(Issue.ingredients),
         joinedload(Issue.attachments)
     ).filter(Issue.id == issue_id).first()
-    if not issue:
-        raise HTTPException(status_code=404, detail="Issue not found")
-        
-    # Permission check
-    if current_user.role not in [UserRole.UNITEC_ADMIN, UserRole.UNITEC_RD, UserRole.UNITEC_SALES]:
-        if issue.company_id != current_user.company_id:
-            raise HTTPException(status_code=400, detail="Not enough permissions")
+    check_issue_permission(issue, current_user)
+    if not if_match_satisfied(if_match, issue_etag(issue)):
+        raise HTTPException(status_code=status.HTTP_412_PRECONDITION_FAILED, detail="Issue has been modified")
+    old_stat_key = issue_stats.issue_stat_key(issue)
 
     # Update Issue Fields
     update_data = issue_in.model_dump(exclude_unset=True)
-    
-    # Handle ingredients separately
-    if "ingredients" in update_data:
-        ingredients_data = update_data.pop("ingredients")
-        # Clear existing
-        db.query(Ingredient).filter(Ingredient.issue_id == issue.id).delete()
-        # Add new
-        for ing in ingredients_data:
-            db_ing = Ingredient(
-                issue_id=issue.id,
-                name=ing['name'],
-                amount=ing['amount']
-            )
-            db.add(db_ing)
-    
-    # Handle attachments separately
-    if "attachments" in update_data:
-        attachments_data = update_data.pop("attachments")
-        # Clear existing (Optimistic approach: delete all and recreate. 
-        # In reality, we might want to keep existing ones if IDs match, but for MVP simplified)
-        # NOTE: Deleting attachments from DB doesn't delete files from disk in this simple logic.
-        # We should ideally clean up files, but skipping for MVP.
-        db.query(Attachment).filter(Attachment.issue_id == issue.id).delete()
-        
-        for att in attachments_data:
-            db_att = Attachment(
-                issue_id=issue.id,
-                file_name=att['file_name'],
-                file_path=att['file_path'],
-                file_type=att.get('file_type')
-            )
-            db.add(db_att)
+    ingredients_data = update_data.pop("ingredients", None)
+    attachments_data = update_data.pop("attachments", None)
+    changed = False
+    reindex = False
 
     # Update Ball Holder if status changes
     if "status" in update_data:
         new_status = update_data["status"]
+        old_ball_holder = issue.ball_holder
         if new_status == IssueStatus.DRAFT:
             issue.ball_holder = BallHolder.CLIENT
         elif new_status == IssueStatus.UNTOUCHED and issue.status == IssueStatus.DRAFT:
             issue.ball_holder = BallHolder.UNITEC
-    
+        changed = issue.ball_holder != old_ball_holder
+
     for field, value in update_data.items():
-        setattr(issue, field, value)
+        if getattr(issue, field) != value:
+            setattr(issue, field, value)
+            changed = True
+            reindex = reindex or field in search.SEARCH_COLUMNS
 
-    db.commit()
-    db.refresh(issue)
+    if ingredients_data is not None and sync_ingredients(issue, ingredients_data):
+        changed = reindex = True
+    if attachments_data is not None and sync_attachments(db, issue, attachments_data):
+        changed = True
+
+    if changed:
+        # Issue.version is the mapper's version_id_col, so the UPDATE of the issue row
+        # carries WHERE version = <the version If-Match was checked against>; if a
+        # concurrent PUT committed first, the flush raises StaleDataError.
+        issue.version = (issue.version or 0) + 1
+        try:
+            issue_stats.record_issue_changed(db, old_stat_key, issue_stats.issue_stat_key(issue))
+            if reindex:
+                search.index_issue(db, issue.id)
+            bump_issue_list_version(db, [issue.company_id])
+            db.commit()
+        except StaleDataError:
+            db.rollback()
+            if if_match is not None:
+                raise HTTPException(status_code=status.HTTP_412_PRECONDITION_FAILED, detail="Issue has been modified")
+            raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="Issue was modified concurrently, please retry")
+        db.refresh(issue)
+
+    response.headers["ETag"] = issue_etag(issue)
     return issue
@@ -0,0 +1,67 @@
+from typing import Any, List, Optional
+from fastapi import APIRouter, Depends, Header, Response
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.etag import etag_matches, not_modified
+from app.schemas.issue import IssueRead, IssueListSummary
+from app.api.deps import get_async_read_db, get_current_user_async
+from app.core.principal_cache import Principal
+from app.api.v1.endpoints.issues import (
+    attach_display_names,
+    build_issue_detail_query,
+    build_issue_list_query,
+    build_issue_list_version_query,
+    check_issue_permission,
+    issue_etag,
+    issue_list_cache,
+    issue_list_etag,
+    issue_list_scope,
+    render_issue_list,
+)
+
+# USE_ASYNC_DB=true のときに issues.py の同名ルートより先に登録される非同期版
+# クエリ構築とレスポンス整形は issues.py と共通
+router = APIRouter()
+
+@router.get("/", response_model=List[IssueListSummary])
+async def read_issues_async(
+    db: AsyncSession = Depends(get_async_read_db),
+    skip: int = 0,
+    limit: int = 100,
+    cursor: Optional[str] = None,
+    if_none_match: Optional[str] = Header(None),
+    current_user: Principal = Depends(get_current_user_async),
+) -> Any:
+    """
+    Retrieve issues (async DB path).
+    """
+    scope = issue_list_scope(current_user)
+    version = (await db.execute(build_issue_list_version_query(scope))).scalar() or 0
+    etag = issue_list_etag(scope, version, skip, limit, cursor)
+    if etag_matches(if_none_match, etag):
+        issue_list_cache.record_not_modified()
+        return not_modified(etag)
+
+    cache_key = (scope, version, skip, limit, cursor)
+    cached = issue_list_cache.get(cache_key)
+    if cached is None:
+        result = await db.execute(build_issue_list_query(current_user, skip, limit, cursor))
+        cached = issue_list_cache.put(cache_key, render_issue_list(result.all(), limit, etag))
+    return cached.to_response()
+
+@router.get("/{issue_id}", response_model=IssueRead)
+async def read_issue_async(
+    *,
+    db: AsyncSession = Depends(get_async_read_db),
+    issue_id: int,
+    response: Response,
+    current_user: Principal = Depends(get_current_user_async),
+) -> Any:
+    """
+    Get issue by ID (async DB path).
+    """
+    result = await db.execute(build_issue_detail_query(issue_id))
+    issue = result.unique().scalars().first()
+    check_issue_permission(issue, current_user)
+    response.headers["ETag"] = issue_etag(issue)
+    return attach_display_names(issue, current_user.id)
@@ -1,50 +1,58 @@
-from typing import Any, List
-from fastapi import APIRouter, Depends, HTTPException
+from typing import Any, AsyncIterator, List, Optional
+import asyncio
+import json
+from fastapi import APIRouter, Depends, Header, Response
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
+from sqlalchemy import Select, func, select
 from sqlalchemy.orm import Session, joinedload
 
-from app.db.session import get_db
+from app.db.session import get_db, SessionLocal
+from app.core.broker import broker, issue_topic
+from app.core.config import settings
 from app.models.user import User, UserRole
 from app.models.issue import Issue, Message
 from app.schemas.message import MessageCreate, MessageRead
-from app.api.deps import get_current_user
+from app.api.deps import get_current_user, get_current_user_for_stream, get_read_db
+from app.core.etag import etag_matches, not_modified, weak_etag
+from app.api.v1.endpoints.issues import check_issue_permission
+from app.core.principal_cache import Principal
 
 router = APIRouter()
 
-def get_formatted_sender_name(user: User) -> str:
-    if not user:
-        return "Unknown User"
-    
+def format_sender_name(role: UserRole, name: str, company_name: Optional[str]) -> str:
     # Check if Unitec side
-    if user.role in [UserRole.UNITEC_ADMIN, UserRole.UNITEC_RD, UserRole.UNITEC_SALES]:
-        return user.name
+    if role in [UserRole.UNITEC_ADMIN, UserRole.UNITEC_RD, UserRole.UNITEC_SALES]:
+        return name
     else:
         # Client side
-        company_name = user.company.name if user.company else ""
-        return f"{company_name} {user.name}".strip()
+        return f"{company_name or ''} {name}".strip()
 
-@router.get("/{issue_id}/messages", response_model=List[MessageRead])
-def read_messages(
-    issue_id: int,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user),
-) -> Any:
-    """
-    Get all messages for a specific issue.
-    """
-    issue = db.query(Issue).filter(Issue.id == issue_id).first()
-    if not issue:
-        raise HTTPException(status_code=404, detail="Issue not found")
-
-    # Permission check
-    if current_user.role not in [UserRole.UNITEC_ADMIN, UserRole.UNITEC_RD, UserRole.UNITEC_SALES]:
-        if issue.company_id != current_user.company_id:
-            raise HTTPException(status_code=400, detail="Not enough permissions")
+def get_formatted_sender_name(user: User) -> str:
+    if not user:
+        return "Unknown User"
+    company_name = user.company.name if user.company else None
+    return format_sender_name(user.role, user.name, company_name)
 
+def build_messages_query(issue_id: int, after_id: Optional[int] = None) -> Select:
     # Eager load sender and sender's company to avoid N+1 and detached session errors
-    messages = db.query(Message).options(
+    query = select(Message).options(
         joinedload(Message.sender).joinedload(User.company)
-    ).filter(Message.issue_id == issue_id).order_by(Message.sent_at.asc()).all()
-    
+    ).where(Message.issue_id == issue_id)
+    if after_id is not None:
+        # Incremental sync: only messages newer than the last one the client has
+        query = query.where(Message.id > after_id)
+    return query.order_by(Message.sent_at.asc(), Message.id.asc())
+
+def build_thread_version_query(issue_id: int) -> Select:
+    # Answered from the (issue_id, sent_at, id) index alone
+    return select(func.max(Message.id), func.count(Message.id)).where(Message.issue_id == issue_id)
+
+def thread_etag(issue_id: int, last_id: Optional[int], count: int) -> str:
+    # Messages are never edited or deleted, so the last id + count identify the thread state
+    return weak_etag("msgs", issue_id, last_id or 0, count)
+
+def to_message_reads(messages: List[Message]) -> List[MessageRead]:
     # Enrich with sender name
     result = []
     for msg in messages:
@@ -61,45 +69,145 @@ def read_messages(
         )
     return result
 
+def new_message(issue_id: int, msg_in: MessageCreate, current_user: Principal) -> Message:
+    return Message(
+        issue_id=issue_id,
+        sender_id=current_user.id,
+        content=msg_in.content,
+        has_attachment=msg_in.has_attachment
+    )
+
+def to_created_message_read(db_msg: Message, current_user: Principal) -> MessageRead:
+    # current_user is a cached snapshot that already carries the company name.
+    sender_name = format_sender_name(current_user.role, current_user.name, current_user.company_name)
+
+    return MessageRead(
+        id=db_msg.id,
+        content=db_msg.content,
+        has_attachment=db_msg.has_attachment,
+        sender_id=db_msg.sender_id,
+        sender_name=sender_name,
+        sent_at=db_msg.sent_at
+    )
+
+@router.get("/{issue_id}/messages", response_model=List[MessageRead])
+def read_messages(
+    issue_id: int,
+    response: Response,
+    after_id: Optional[int] = None,
+    if_none_match: Optional[str] = Header(None),
+    db: Session = Depends(get_read_db),
+    current_user: Principal = Depends(get_current_user),
+) -> Any:
+    """
+    Get all messages for a specific issue.
+    With `after_id`, only messages newer than that id are returned.
+    Responds 304 when If-None-Match matches the thread's current ETag.
+    """
+    issue = db.query(Issue).filter(Issue.id == issue_id).first()
+    check_issue_permission(issue, current_user)
+
+    last_id, count = db.execute(build_thread_version_query(issue_id)).one()
+    etag = thread_etag(issue_id, last_id, count)
+    if etag_matches(if_none_match, etag):
+        return not_modified(etag)
+    response.headers["ETag"] = etag
+
+    messages = db.execute(build_messages_query(issue_id, after_id)).scalars().all()
+    return to_message_reads(messages)
+
 @router.post("/{issue_id}/messages", response_model=MessageRead)
 def create_message(
     issue_id: int,
     msg_in: MessageCreate,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_user),
 ) -> Any:
     """
     Create a new message in a issue.
     """
     issue = db.query(Issue).filter(Issue.id == issue_id).first()
-    if not issue:
-        raise HTTPException(status_code=404, detail="Issue not found")
-
-    # Permission check
-    if current_user.role not in [UserRole.UNITEC_ADMIN, UserRole.UNITEC_RD, UserRole.UNITEC_SALES]:
-        if issue.company_id != current_user.company_id:
-            raise HTTPException(status_code=400, detail="Not enough permissions")
+    check_issue_permission(issue, current_user)
 
     # Create message
-    db_msg = Message(
-        issue_id=issue_id,
-        sender_id=current_user.id,
-        content=msg_in.content,
-        has_attachment=msg_in.has_attachment
-    )
+    db_msg = new_message(issue_id, msg_in, current_user)
     db.add(db_msg)
     db.commit()
     db.refresh(db_msg)
-    
-    # We need to reload the user to get company info for formatting, 
-    # but current_user already has it loaded usually.
-    sender_name = get_formatted_sender_name(current_user)
 
-    return MessageRead(
-        id=db_msg.id,
-        content=db_msg.content,
-        has_attachment=db_msg.has_attachment,
-        sender_id=db_msg.sender_id,
-        sender_name=sender_name,
-        sent_at=db_msg.sent_at
+    msg_read = to_created_message_read(db_msg, current_user)
+    publish_message(issue_id, msg_read)
+    return msg_read
+
+# --- Real-time push (Server-Sent Events) ---
+
+def publish_message(issue_id: int, msg_read: MessageRead) -> None:
+    # Messages too large for the broker are announced by id only; streams load them from the DB
+    broker.publish(
+        issue_topic(issue_id),
+        msg_read.model_dump_json(),
+        fallback=json.dumps({"id": msg_read.id, "ref": True}),
+    )
+
+def _load_messages_after(issue_id: int, after_id: int) -> List[MessageRead]:
+    db = SessionLocal()
+    try:
+        return to_message_reads(db.execute(build_messages_query(issue_id, after_id)).scalars().all())
+    finally:
+        db.close()
+
+def _format_sse(message_id: int, data: str) -> str:
+    return f"id: {message_id}\nevent: message\ndata: {data}\n\n"
+
+async def message_event_stream(issue_id: int, after_id: Optional[int]) -> AsyncIterator[str]:
+    # Subscribe before loading the backlog so nothing published in between is lost
+    subscription = broker.subscribe(issue_topic(issue_id))
+    try:
+        yield "retry: 3000\n\n"
+        last_id = 0
+        if after_id is not None:
+            for msg in await run_in_threadpool(_load_messages_after, issue_id, after_id):
+                last_id = msg.id
+                yield _format_sse(msg.id, msg.model_dump_json())
+        while True:
+            try:
+                data = await subscription.get(timeout=settings.SSE_KEEPALIVE_SECONDS)
+            except asyncio.TimeoutError:
+                # Keeps proxies (Azure front end etc.) from closing an idle connection
+                yield ": keep-alive\n\n"
+                continue
+            event = json.loads(data)
+            message_id = event["id"]
+            if message_id <= last_id:
+                continue  # already sent as part of the backlog
+            if event.get("ref"):
+                loaded = await run_in_threadpool(_load_messages_after, issue_id, message_id - 1)
+                if not loaded or loaded[0].id != message_id:
+                    continue
+                data = loaded[0].model_dump_json()
+            yield _format_sse(message_id, data)
+    finally:
+        subscription.close()
+
+@router.get("/{issue_id}/events")
+def stream_message_events(
+    issue_id: int,
+    after_id: Optional[int] = None,
+    last_event_id: Optional[int] = Header(None),
+    db: Session = Depends(get_db),
+    current_user: Principal = Depends(get_current_user_for_stream),
+) -> Any:
+    """
+    Stream new messages of an issue as Server-Sent Events (event: message, data: MessageRead).
+    Reconnecting clients get everything after Last-Event-ID (or `after_id`) first.
+    The access token may be passed as ?access_token= for EventSource.
+    """
+    issue = db.query(Issue).filter(Issue.id == issue_id).first()
+    check_issue_permission(issue, current_user)
+
+    resume_after = last_event_id if last_event_id is not None else after_id
+    return StreamingResponse(
+        message_event_stream(issue_id, resume_after),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
     )
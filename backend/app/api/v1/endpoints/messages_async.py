@@ -0,0 +1,72 @@
+from typing import Any, List, Optional
+from fastapi import APIRouter, Depends, Header, Response
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.db.session import get_async_db
+from app.models.issue import Issue
+from app.schemas.message import MessageCreate, MessageRead
+from app.api.deps import get_async_read_db, get_current_user_async
+from app.core.principal_cache import Principal
+from app.core.etag import etag_matches, not_modified
+from app.api.v1.endpoints.issues import check_issue_permission
+from app.api.v1.endpoints.messages import (
+    build_messages_query,
+    build_thread_version_query,
+    new_message,
+    publish_message,
+    thread_etag,
+    to_created_message_read,
+    to_message_reads,
+)
+
+# USE_ASYNC_DB=true のときに messages.py の同名ルートより先に登録される非同期版
+router = APIRouter()
+
+async def _get_issue_for_user(db: AsyncSession, issue_id: int, current_user: Principal) -> Issue:
+    result = await db.execute(select(Issue).where(Issue.id == issue_id))
+    return check_issue_permission(result.scalars().first(), current_user)
+
+@router.get("/{issue_id}/messages", response_model=List[MessageRead])
+async def read_messages_async(
+    issue_id: int,
+    response: Response,
+    after_id: Optional[int] = None,
+    if_none_match: Optional[str] = Header(None),
+    db: AsyncSession = Depends(get_async_read_db),
+    current_user: Principal = Depends(get_current_user_async),
+) -> Any:
+    """
+    Get all messages for a specific issue (async DB path).
+    """
+    await _get_issue_for_user(db, issue_id, current_user)
+
+    last_id, count = (await db.execute(build_thread_version_query(issue_id))).one()
+    etag = thread_etag(issue_id, last_id, count)
+    if etag_matches(if_none_match, etag):
+        return not_modified(etag)
+    response.headers["ETag"] = etag
+
+    result = await db.execute(build_messages_query(issue_id, after_id))
+    return to_message_reads(result.scalars().all())
+
+@router.post("/{issue_id}/messages", response_model=MessageRead)
+async def create_message_async(
+    issue_id: int,
+    msg_in: MessageCreate,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Principal = Depends(get_current_user_async),
+) -> Any:
+    """
+    Create a new message in a issue (async DB path).
+    """
+    await _get_issue_for_user(db, issue_id, current_user)
+
+    db_msg = new_message(issue_id, msg_in, current_user)
+    db.add(db_msg)
+    await db.commit()
+    await db.refresh(db_msg)
+
+    msg_read = to_created_message_read(db_msg, current_user)
+    publish_message(issue_id, msg_read)
+    return msg_read
@@ -0,0 +1,40 @@
+from typing import Any, List
+from fastapi import APIRouter, Depends, Query, Response
+from sqlalchemy.orm import Session
+
+from app.db import search
+from app.models.user import UserRole
+from app.models.issue import Issue
+from app.schemas.issue import IssueListSummary
+from app.api.deps import get_current_user, get_read_db
+from app.core.principal_cache import Principal
+from app.api.v1.endpoints.issues import build_issue_summary_query, issue_list_json
+
+# /issues/search は /issues/{issue_id} より先に登録する必要があるため、独立したルーターにしています
+router = APIRouter()
+
+@router.get("/search", response_model=List[IssueListSummary])
+def search_issues(
+    q: str = Query(..., min_length=1, max_length=200),
+    limit: int = Query(50, ge=1, le=100),
+    db: Session = Depends(get_read_db),
+    current_user: Principal = Depends(get_current_user),
+) -> Any:
+    """
+    Full-text search over title, description, product name, client code and ingredient names.
+    Whitespace-separated terms must all match. Client users only see their company's issues.
+    """
+    company_id = None
+    if current_user.role not in [UserRole.UNITEC_ADMIN, UserRole.UNITEC_RD, UserRole.UNITEC_SALES]:
+        company_id = current_user.company_id
+
+    issue_ids = search.search_issue_ids(db, q, company_id, limit)
+    if not issue_ids:
+        return []
+
+    rows = db.execute(build_issue_summary_query().where(Issue.id.in_(issue_ids))).all()
+    # Keep the relevance order from the search index
+    by_id = {row.id: row for row in rows}
+    body = issue_list_json(by_id[issue_id] for issue_id in issue_ids if issue_id in by_id)
+    # 既に IssueListSummary としてシリアライズ済みなので、response_model による再検証を通さずに返す
+    return Response(content=body, media_type="application/json")
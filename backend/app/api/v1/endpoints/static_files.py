@@ -0,0 +1,219 @@
+import gzip
+import mimetypes
+import os
+import re
+import shutil
+import tempfile
+from typing import Any, Iterator, Optional, Tuple
+from fastapi import APIRouter, Depends, Header, HTTPException, Response
+from fastapi.responses import FileResponse, StreamingResponse
+from sqlalchemy import exists, select
+from sqlalchemy.orm import Session
+
+from app.db.session import get_db
+from app.core import storage
+from app.core.config import settings
+from app.core.etag import etag_matches, strong_etag
+from app.core.previews import PREVIEW_SUFFIX
+from app.models.user import UserRole
+from app.models.issue import Attachment, Blob, Issue
+from app.api.deps import get_current_user_for_file
+from app.core.principal_cache import Principal
+
+# /static/ 配下のアップロードファイル配信（main.py でルート直下に登録）
+# blob とプレビューはファイル名が内容の SHA-256 なので、ブラウザに 1 年間・immutable でキャッシュさせ、
+# ETag もハッシュから作ります。閲覧権限は添付先の課題の会社で判定します。
+# <img> / <a> からは Authorization ヘッダーを送れないため、API が返す preview_url / download_url に付いている
+# ?token=（そのパス専用・短命の署名トークン、security.signed_file_url）でも認証できます。
+# ログイン用のアクセストークンは URL に載せません（アクセスログや Referer に残るため）。
+router = APIRouter()
+
+_BLOB_NAME_RE = re.compile(
+    r"^" + storage.BLOB_DIR + r"/[0-9a-f]{2}/[0-9a-f]{2}/(?P<sha>[0-9a-f]{64})(?P<suffix>\.[a-z0-9]+|"
+    + re.escape(PREVIEW_SUFFIX) + r")$"
+)
+_LEGACY_NAME_RE = re.compile(r"^[A-Za-z0-9_-]+\.[a-z0-9]+$")
+
+IMMUTABLE_CACHE_CONTROL = "private, max-age=31536000, immutable"
+LEGACY_CACHE_CONTROL = "private, max-age=86400"
+
+# zip ベースの xlsx/docx や JPEG/PNG は既に圧縮済みなので対象外
+COMPRESSIBLE_EXTENSIONS = {".xls", ".doc", ".pdf"}
+# gzip 版が元より 10% 以上小さい場合だけ使う
+_MIN_GZIP_SAVING = 0.9
+
+
+def _is_staff(current_user: Principal) -> bool:
+    return current_user.role in [UserRole.UNITEC_ADMIN, UserRole.UNITEC_RD, UserRole.UNITEC_SALES]
+
+
+def can_read_blob(db: Session, sha256: str, current_user: Principal) -> bool:
+    if _is_staff(current_user):
+        return db.get(Blob, sha256) is not None
+    attached_to_own_company = db.execute(
+        select(
+            exists().where(
+                Attachment.sha256 == sha256,
+                Attachment.issue_id == Issue.id,
+                Issue.company_id == current_user.company_id,
+            )
+        )
+    ).scalar()
+    if attached_to_own_company:
+        return True
+    # どの課題にも添付されていない blob（アップロード直後・添付を外した後）はアップロードした本人だけ
+    blob = db.get(Blob, sha256)
+    return blob is not None and blob.ref_count == 0 and blob.uploaded_by == current_user.id
+
+
+def can_read_legacy_file(db: Session, name: str, current_user: Principal) -> bool:
+    query = select(
+        exists().where(Attachment.file_path == f"/static/{name}", Attachment.issue_id == Issue.id)
+    )
+    if not _is_staff(current_user):
+        query = select(
+            exists().where(
+                Attachment.file_path == f"/static/{name}",
+                Attachment.issue_id == Issue.id,
+                Issue.company_id == current_user.company_id,
+            )
+        )
+    return bool(db.execute(query).scalar())
+
+
+def parse_range(range_header: str, size: int) -> Optional[Tuple[int, int]]:
+    """
+    Parse a single `bytes=` range into inclusive (start, end).
+    Returns None when the header should be ignored (other units, multiple ranges);
+    raises 416 when the range cannot be satisfied.
+    """
+    unit, _, spec = range_header.partition("=")
+    if unit.strip().lower() != "bytes" or "," in spec:
+        return None
+    first, _, last = spec.strip().partition("-")
+    try:
+        if first:
+            start = int(first)
+            end = int(last) if last else size - 1
+        else:
+            start = max(size - int(last), 0)
+            end = size - 1
+    except ValueError:
+        return None
+    if start >= size or start > end or size == 0:
+        raise HTTPException(
+            status_code=416,
+            detail="Requested range not satisfiable",
+            headers={"Content-Range": f"bytes */{size}"},
+        )
+    return start, min(end, size - 1)
+
+
+def iter_file_range(path: str, start: int, end: int) -> Iterator[bytes]:
+    with open(path, "rb") as f:
+        f.seek(start)
+        remaining = end - start + 1
+        while remaining > 0:
+            chunk = f.read(min(settings.UPLOAD_CHUNK_SIZE, remaining))
+            if not chunk:
+                break
+            remaining -= len(chunk)
+            yield chunk
+
+
+def gzip_variant(path: str, size: int) -> Optional[str]:
+    """Path of a precompressed <file>.gz next to the file, created on first use; None if not worth it."""
+    gz_path = path + ".gz"
+    if not os.path.exists(gz_path):
+        fd, tmp_path = tempfile.mkstemp(suffix=".gz.tmp", dir=os.path.dirname(path))
+        try:
+            with open(path, "rb") as src, os.fdopen(fd, "wb") as raw, gzip.GzipFile(
+                fileobj=raw, mode="wb", compresslevel=6, mtime=0
+            ) as out:
+                shutil.copyfileobj(src, out, settings.UPLOAD_CHUNK_SIZE)
+            os.replace(tmp_path, gz_path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+    if os.path.getsize(gz_path) >= size * _MIN_GZIP_SAVING:
+        return None
+    return gz_path
+
+
+@router.api_route("/{file_path:path}", methods=["GET", "HEAD"])
+def read_static_file(
+    file_path: str,
+    db: Session = Depends(get_db),
+    current_user: Principal = Depends(get_current_user_for_file),
+    if_none_match: Optional[str] = Header(None),
+    range_header: Optional[str] = Header(None, alias="Range"),
+    if_range: Optional[str] = Header(None),
+    accept_encoding: Optional[str] = Header(None),
+) -> Any:
+    """
+    Serve an uploaded file (blob, preview or legacy upload) to users who may see it.
+    Supports If-None-Match (304), single byte ranges (206) and a precompressed gzip
+    variant for compressible document types.
+    """
+    blob_match = _BLOB_NAME_RE.match(file_path)
+    if blob_match:
+        sha256, suffix = blob_match.group("sha"), blob_match.group("suffix")
+        allowed = can_read_blob(db, sha256, current_user)
+        etag = strong_etag(sha256, "preview") if suffix == PREVIEW_SUFFIX else strong_etag(sha256)
+        cache_control = IMMUTABLE_CACHE_CONTROL
+        ext = suffix
+    elif _LEGACY_NAME_RE.match(file_path):
+        allowed = can_read_legacy_file(db, file_path, current_user)
+        etag = None
+        cache_control = LEGACY_CACHE_CONTROL
+        ext = os.path.splitext(file_path)[1]
+    else:
+        allowed = False
+    disk_path = os.path.join(storage.UPLOAD_DIR, *file_path.split("/"))
+    if not allowed or not os.path.isfile(disk_path):
+        raise HTTPException(status_code=404, detail="File not found")
+
+    stat = os.stat(disk_path)
+    if etag is None:
+        etag = strong_etag(int(stat.st_mtime), stat.st_size)
+    headers = {
+        "ETag": etag,
+        "Cache-Control": cache_control,
+        "Accept-Ranges": "bytes",
+        "X-Content-Type-Options": "nosniff",
+    }
+    compressible = ext in COMPRESSIBLE_EXTENSIONS
+    if compressible:
+        headers["Vary"] = "Accept-Encoding"
+    gzip_etag = strong_etag(etag.strip('"'), "gzip")
+    for candidate in (etag, gzip_etag) if compressible else (etag,):
+        if etag_matches(if_none_match, candidate):
+            headers["ETag"] = candidate
+            return Response(status_code=304, headers=headers)
+
+    media_type = mimetypes.guess_type(disk_path)[0] or "application/octet-stream"
+
+    # If-Range が現在の ETag と一致しない場合は範囲指定を無視して全体を返す
+    if range_header and (not if_range or if_range.strip() == etag):
+        byte_range = parse_range(range_header, stat.st_size)
+        if byte_range is not None:
+            start, end = byte_range
+            headers["Content-Range"] = f"bytes {start}-{end}/{stat.st_size}"
+            headers["Content-Length"] = str(end - start + 1)
+            return StreamingResponse(
+                iter_file_range(disk_path, start, end),
+                status_code=206,
+                media_type=media_type,
+                headers=headers,
+            )
+
+    if compressible and accept_encoding and "gzip" in accept_encoding.lower():
+        gz_path = gzip_variant(disk_path, stat.st_size)
+        if gz_path:
+            headers["ETag"] = gzip_etag
+            headers["Content-Encoding"] = "gzip"
+            headers.pop("Accept-Ranges")
+            return FileResponse(gz_path, media_type=media_type, headers=headers)
+
+    return FileResponse(disk_path, media_type=media_type, headers=headers, stat_result=stat)
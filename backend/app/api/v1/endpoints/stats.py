@@ -0,0 +1,52 @@
+from typing import Any, Dict
+from fastapi import APIRouter, Depends
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app.models.user import UserRole, Company
+from app.models.issue import IssueStat, IssueStatus, BallHolder, Urgency
+from app.schemas.issue import IssueStats, CompanyIssueCount
+from app.api.deps import get_current_user, get_read_db
+from app.core.principal_cache import Principal
+
+# /issues/stats は /issues/{issue_id} より先に登録する必要があるため、独立したルーターにしています
+router = APIRouter()
+
+@router.get("/stats", response_model=IssueStats)
+def read_issue_stats(
+    db: Session = Depends(get_read_db),
+    current_user: Principal = Depends(get_current_user),
+) -> Any:
+    """
+    Issue counts by status, ball holder, urgency and company for the dashboard.
+    Read from the issue_stats summary table. Client users only see their own company.
+    """
+    query = select(IssueStat).where(IssueStat.count > 0)
+    if current_user.role not in [UserRole.UNITEC_ADMIN, UserRole.UNITEC_RD, UserRole.UNITEC_SALES]:
+        query = query.where(IssueStat.company_id == current_user.company_id)
+    rows = db.execute(query).scalars().all()
+
+    by_status: Dict[IssueStatus, int] = {status: 0 for status in IssueStatus}
+    by_ball_holder: Dict[BallHolder, int] = {holder: 0 for holder in BallHolder}
+    by_urgency: Dict[Urgency, int] = {urgency: 0 for urgency in Urgency}
+    by_company: Dict[int, int] = {}
+    for row in rows:
+        by_status[row.status] += row.count
+        by_ball_holder[row.ball_holder] += row.count
+        by_urgency[row.urgency] += row.count
+        by_company[row.company_id] = by_company.get(row.company_id, 0) + row.count
+
+    company_names = dict(
+        db.execute(select(Company.id, Company.name).where(Company.id.in_(by_company))).all()
+    ) if by_company else {}
+
+    return IssueStats(
+        total=sum(by_company.values()),
+        by_status=by_status,
+        by_ball_holder=by_ball_holder,
+        by_urgency=by_urgency,
+        by_company=[
+            CompanyIssueCount(company_id=company_id, company_name=company_names.get(company_id), count=count)
+            for company_id, count in sorted(by_company.items(), key=lambda item: -item[1])
+        ],
+    )
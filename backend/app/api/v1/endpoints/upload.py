@@ -1,51 +1,56 @@
 from typing import Any
 from fastapi import APIRouter, Depends, UploadFile, File, HTTPException
+from fastapi.concurrency import run_in_threadpool
 from sqlalchemy.orm import Session
-import shutil
 import os
 from datetime import datetime
-import uuid
+import logging
 
 from app.db.session import get_db
 from app.core import security
-from app.models.user import User
+from app.core import previews, storage
 from app.api.deps import get_current_user
-from app.schemas.issue import AttachmentRead
+from app.api.v1.endpoints.static_files import can_read_blob
+from app.core.principal_cache import Principal
+from app.schemas.issue import AttachmentByHash, AttachmentRead
 
 router = APIRouter()
+logger = logging.getLogger(__name__)
 
-UPLOAD_DIR = "uploads"
+UPLOAD_DIR = storage.UPLOAD_DIR
 
 @router.post("/", response_model=AttachmentRead)
 async def upload_file(
     file: UploadFile = File(...),
-    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db),
+    current_user: Principal = Depends(get_current_user),
 ) -> Any:
     """
     Upload a file.
     Returns the file path and metadata.
     Note: In a real app, we would upload to S3 here.
     For MVP, we save to local disk and return a relative URL.
+    Files are stored once per SHA-256 under /static/blobs/; identical uploads share one file.
+    Images and PDFs get a WebP preview rendered in the background (see preview_url on the issue).
     """
     
-    # Validate file size (mock check, FastAPI handles stream but we can check content-length header if needed)
     # Validate file type (extension check)
-    allowed_extensions = {".png", ".jpg", ".jpeg", ".pdf", ".xlsx", ".xls", ".doc", ".docx"}
     ext = os.path.splitext(file.filename)[1].lower()
-    if ext not in allowed_extensions:
+    if ext not in storage.ALLOWED_EXTENSIONS:
          raise HTTPException(status_code=400, detail="File type not allowed")
 
-    # Generate unique filename
-    file_id = str(uuid.uuid4())
-    secure_filename = f"{file_id}{ext}"
-    file_path = os.path.join(UPLOAD_DIR, secure_filename)
-    
-    # Save file
+    # Validate file size up front when the multipart parser already knows it
+    if file.size is not None and file.size > storage.max_upload_bytes():
+        raise storage.too_large_exception()
+
+    # Save file (chunked copy + hashing runs in a worker thread, not on the event loop)
     try:
-        with open(file_path, "wb") as buffer:
-            shutil.copyfileobj(file.file, buffer)
+        stored = await run_in_threadpool(storage.store_blob, file.file, ext)
+        await run_in_threadpool(storage.register_blob, db, stored, current_user.id)
+    except HTTPException:
+        raise
     except Exception as e:
-        print(f"Error saving file: {e}")
+        logger.error(f"Error saving file: {e}")
         raise HTTPException(status_code=500, detail="Could not save file")
 
     # Return metadata (We don't save to DB yet, the caller will link it to an Issue)
@@ -59,8 +64,40 @@ async def upload_file(
     return {
         "id": 0, # Temporary ID, will be real DB ID after Issue creation
         "file_name": file.filename,
-        "file_path": f"/static/{secure_filename}", # Public URL
+        "file_path": stored.url, # Public URL
         "file_type": file.content_type,
+        "file_size": stored.size,
+        "sha256": stored.sha256,
+        "preview_url": security.signed_file_url(previews.ready_preview_url(stored.sha256, ext), current_user.id), # Queues generation on first upload
+        "download_url": security.signed_file_url(stored.url, current_user.id),
         "uploaded_at": datetime.now()
     }
 
+@router.post("/known", response_model=AttachmentRead)
+def upload_known_file(
+    *,
+    db: Session = Depends(get_db),
+    known_in: AttachmentByHash,
+    current_user: Principal = Depends(get_current_user),
+) -> Any:
+    """
+    Skip the upload when the server already stores a file with this SHA-256.
+    Returns the same metadata as POST /upload/, or 404 if the content is unknown
+    or the user may not read it (then the client uploads the file itself).
+    """
+    blob = storage.get_stored_blob(db, known_in.sha256)
+    if not blob or not can_read_blob(db, blob.sha256, current_user):
+        raise HTTPException(status_code=404, detail="Unknown file hash")
+    storage.touch_blob(blob.sha256, blob.file_ext)
+
+    return {
+        "id": 0,
+        "file_name": known_in.file_name,
+        "file_path": storage.blob_url(blob.sha256, blob.file_ext),
+        "file_type": known_in.file_type,
+        "file_size": blob.size,
+        "sha256": blob.sha256,
+        "preview_url": security.signed_file_url(previews.ready_preview_url(blob.sha256, blob.file_ext), current_user.id),
+        "download_url": security.signed_file_url(storage.blob_url(blob.sha256, blob.file_ext), current_user.id),
+        "uploaded_at": datetime.now()
+    }
@@ -8,7 +8,8 @@ from app.db.session import get_db
 from app.models.user import User, UserRole, Company
 from app.schemas.user import UserInvite, UserInviteResponse, UserAcceptInvite, User as UserSchema, CompanyRead
 from app.api.deps import get_current_user
-from app.core.security import get_password_hash
+from app.core.principal_cache import Principal, principal_cache
+from app.core.security import get_password_hash, make_unusable_password
 
 router = APIRouter()
 logger = logging.getLogger(__name__)
@@ -18,7 +19,7 @@ def invite_user(
     *,
     db: Session = Depends(get_db),
     invite_in: UserInvite,
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_user),
 ) -> Any:
     """
     Invite a new member to the company.
@@ -43,11 +44,11 @@ def invite_user(
     invitation_token = str(uuid.uuid4())
     
     # Create user with placeholder password (cannot login) and token
-    # We set a random unusable password initially
+    # We set an unusable password sentinel initially (no bcrypt work needed)
     db_user = User(
         email=invite_in.email,
         name=invite_in.name,
-        password_hash=get_password_hash(str(uuid.uuid4())), 
+        password_hash=make_unusable_password(),
         role=UserRole.CLIENT_MEMBER,
         company_id=current_user.company_id,
         invitation_token=invitation_token,
@@ -90,12 +91,14 @@ def accept_invite(
     
     db.add(user)
     db.commit()
+    # after_update リスナーでも破棄されるが、明示的にキャッシュを無効化しておく
+    principal_cache.invalidate_user(user.id)
     
     return {"message": "Password set successfully. You can now login."}
 
 @router.get("/me", response_model=UserSchema)
 def read_user_me(
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_user),
 ) -> Any:
     """
     Get current user.
@@ -105,7 +108,7 @@ def read_user_me(
 @router.get("/company", response_model=CompanyRead)
 def read_company_info(
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_user),
 ) -> Any:
     """
     Get current user's company info with members.
@@ -0,0 +1,81 @@
+import asyncio
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Dict
+
+from fastapi import HTTPException
+
+from app.core.config import settings
+
+# bcrypt 等の CPU 負荷の高い認証処理専用のワーカープール
+# 始業時のログイン集中で全スレッドが bcrypt に占有されないよう、同時実行数と待ち行列を制限します。
+# bcrypt の C 実装は GIL を解放するため、プロセスではなくスレッドで十分に並列化できます。
+
+
+class AuthWorkExecutor:
+    def __init__(self, max_workers: int, max_queue: int):
+        self.max_workers = max(1, max_workers)
+        self.max_queue = max(0, max_queue)
+        self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="auth-work")
+        self._lock = threading.Lock()
+        self._pending = 0  # running + queued
+        self.completed = 0
+        self.rejected = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+
+    def submit(self, fn: Callable[..., Any], *args: Any) -> Future:
+        with self._lock:
+            if self._pending >= self.max_workers + self.max_queue:
+                self.rejected += 1
+                raise HTTPException(
+                    status_code=503,
+                    detail="Authentication service is busy, please retry",
+                    headers={"Retry-After": "1"},
+                )
+            self._pending += 1
+        enqueued_at = time.monotonic()
+
+        def task():
+            wait = time.monotonic() - enqueued_at
+            try:
+                return fn(*args)
+            finally:
+                with self._lock:
+                    self._pending -= 1
+                    self.completed += 1
+                    self.total_wait += wait
+                    self.max_wait = max(self.max_wait, wait)
+
+        try:
+            return self._executor.submit(task)
+        except BaseException:
+            with self._lock:
+                self._pending -= 1
+            raise
+
+    def run(self, fn: Callable[..., Any], *args: Any) -> Any:
+        """Run on the pool and block the calling (threadpool) thread until done."""
+        return self.submit(fn, *args).result()
+
+    async def run_async(self, fn: Callable[..., Any], *args: Any) -> Any:
+        return await asyncio.wrap_future(self.submit(fn, *args))
+
+    def stats(self) -> Dict[str, float]:
+        with self._lock:
+            return {
+                "workers": self.max_workers,
+                "in_flight": min(self._pending, self.max_workers),
+                "queued": max(0, self._pending - self.max_workers),
+                "completed": self.completed,
+                "rejected": self.rejected,
+                "avg_wait_ms": round(self.total_wait / self.completed * 1000, 2) if self.completed else 0.0,
+                "max_wait_ms": round(self.max_wait * 1000, 2),
+            }
+
+
+auth_executor = AuthWorkExecutor(
+    max_workers=settings.AUTH_WORKERS,
+    max_queue=settings.AUTH_MAX_QUEUE,
+)
@@ -0,0 +1,194 @@
+import asyncio
+import glob
+import json
+import logging
+import os
+import socket
+import threading
+import uuid
+from typing import Callable, Dict, List, Optional, Set
+
+from app.core.config import settings
+
+# プロセス内 Pub/Sub ブローカー（SSE 配信用）
+# publish はスレッドプール（同期エンドポイント）からも呼べます。購読側は asyncio.Queue で受け取ります。
+# バックエンドを差し替えることで、複数の gunicorn ワーカー間でもイベントを共有できます
+# （UnixSocketBackend は Redis Pub/Sub 等の代わりとなるローカル実装）。
+
+logger = logging.getLogger(__name__)
+
+SUBSCRIBER_QUEUE_SIZE = 100
+
+# UnixSocketBackend で 1 データグラムとして送るイベントの上限。これを超えるイベントは
+# publish の fallback（id だけ等の小さいイベント。購読側が DB から読み直す）に置き換えて送る
+MAX_PACKET_BYTES = 64 * 1024
+
+Deliver = Callable[[str, str], None]
+
+
+class InMemoryBackend:
+    """Delivers only to subscribers in this process."""
+
+    def start(self, deliver: Deliver) -> None:
+        self._deliver = deliver
+
+    def publish(self, topic: str, data: str, fallback: Optional[str] = None) -> None:
+        self._deliver(topic, data)
+
+
+class UnixSocketBackend:
+    """
+    Each worker binds a datagram socket in a shared directory; publish sends the
+    event to every socket there (including our own), so all workers on the host see it.
+    """
+
+    def __init__(self, socket_dir: str):
+        self.socket_dir = socket_dir
+        self._sock = None
+        self._send_sock = None
+        self._path = None
+
+    def start(self, deliver: Deliver) -> None:
+        os.makedirs(self.socket_dir, exist_ok=True)
+        self._path = os.path.join(self.socket_dir, f"{os.getpid()}-{uuid.uuid4().hex[:8]}.sock")
+        self._sock = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+        self._sock.bind(self._path)
+        self._send_sock = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+        # 受信バッファはソケットの受信バッファ以上にし、それでも切り詰められたら（MSG_TRUNC）捨てる
+        bufsize = max(MAX_PACKET_BYTES, self._sock.getsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF))
+
+        def receive_loop():
+            while True:
+                try:
+                    packet, _, flags, _ = self._sock.recvmsg(bufsize)
+                    if flags & socket.MSG_TRUNC:
+                        logger.warning(f"Broker dropped a truncated event (larger than {bufsize} bytes)")
+                        continue
+                    topic, data = json.loads(packet.decode("utf-8"))
+                    deliver(topic, data)
+                except Exception as e:
+                    logger.warning(f"Broker receive failed: {e}")
+
+        threading.Thread(target=receive_loop, name="broker-recv", daemon=True).start()
+
+    def publish(self, topic: str, data: str, fallback: Optional[str] = None) -> None:
+        if self._send_sock is None:
+            self._send_sock = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+        packet = json.dumps([topic, data]).encode("utf-8")
+        if len(packet) > MAX_PACKET_BYTES:
+            if fallback is None:
+                logger.warning(f"Broker event on {topic} is {len(packet)} bytes (limit {MAX_PACKET_BYTES}); not sent")
+                return
+            packet = json.dumps([topic, fallback]).encode("utf-8")
+        for path in glob.glob(os.path.join(self.socket_dir, "*.sock")):
+            try:
+                self._send_sock.sendto(packet, path)
+            except (ConnectionRefusedError, FileNotFoundError):
+                # 終了したワーカーのソケットを掃除
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+            except OSError as e:
+                logger.warning(f"Broker publish to {path} failed: {e}")
+
+
+class Subscription:
+    def __init__(self, broker: "Broker", topic: str):
+        self.broker = broker
+        self.topic = topic
+        self.loop = asyncio.get_running_loop()
+        self.queue: "asyncio.Queue[str]" = asyncio.Queue(maxsize=SUBSCRIBER_QUEUE_SIZE)
+
+    def _put(self, data: str) -> None:
+        # 遅いクライアントのせいでメモリが膨らまないよう、溢れたら古いイベントを捨てる
+        if self.queue.full():
+            self.queue.get_nowait()
+        self.queue.put_nowait(data)
+
+    def deliver(self, data: str) -> None:
+        self.loop.call_soon_threadsafe(self._put, data)
+
+    async def get(self, timeout: float) -> str:
+        return await asyncio.wait_for(self.queue.get(), timeout)
+
+    def close(self) -> None:
+        self.broker.unsubscribe(self)
+
+
+class Broker:
+    def __init__(self, backend):
+        self.backend = backend
+        self._lock = threading.Lock()
+        self._started = False
+        self._subscribers: Dict[str, Set[Subscription]] = {}
+        self._listeners: Dict[str, List[Callable[[str], None]]] = {}
+
+    def _ensure_started(self) -> None:
+        with self._lock:
+            if not self._started:
+                self.backend.start(self._deliver)
+                self._started = True
+
+    def _deliver(self, topic: str, data: str) -> None:
+        with self._lock:
+            subscribers = list(self._subscribers.get(topic, ()))
+            listeners = list(self._listeners.get(topic, ()))
+        for listener in listeners:
+            try:
+                listener(data)
+            except Exception as e:
+                logger.warning(f"Broker listener for {topic} failed: {e}")
+        for subscription in subscribers:
+            try:
+                subscription.deliver(data)
+            except RuntimeError:
+                # event loop already closed
+                self.unsubscribe(subscription)
+
+    def publish(self, topic: str, data: str, fallback: Optional[str] = None) -> None:
+        """
+        Send `data` to every subscriber of `topic`. `fallback` is sent instead when `data`
+        is too large for the backend (subscribers then re-fetch what it refers to).
+        """
+        try:
+            self._ensure_started()
+            self.backend.publish(topic, data, fallback)
+        except Exception as e:
+            # 配信失敗でメッセージ投稿自体を失敗させない
+            logger.warning(f"Broker publish failed: {e}")
+
+    def subscribe(self, topic: str) -> Subscription:
+        """Must be called from the event loop that will consume the subscription."""
+        self._ensure_started()
+        subscription = Subscription(self, topic)
+        with self._lock:
+            self._subscribers.setdefault(topic, set()).add(subscription)
+        return subscription
+
+    def add_listener(self, topic: str, callback: Callable[[str], None]) -> None:
+        """Call `callback(data)` for every event on `topic` (on the delivering thread; keep it quick)."""
+        self._ensure_started()
+        with self._lock:
+            self._listeners.setdefault(topic, []).append(callback)
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        with self._lock:
+            subscribers = self._subscribers.get(subscription.topic)
+            if subscribers is not None:
+                subscribers.discard(subscription)
+                if not subscribers:
+                    del self._subscribers[subscription.topic]
+
+
+def _create_backend():
+    if settings.MESSAGE_BROKER_BACKEND == "unix":
+        return UnixSocketBackend(settings.MESSAGE_BROKER_SOCKET_DIR)
+    return InMemoryBackend()
+
+
+def issue_topic(issue_id: int) -> str:
+    return f"issue:{issue_id}:messages"
+
+
+broker = Broker(_create_backend())
@@ -11,6 +11,52 @@ class Settings:
     ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 60 * 24 * 8 # 8 days
 
+    # 認証キャッシュ (get_current_user)。TTL を 0 にすると無効化されます
+    AUTH_CACHE_TTL_SECONDS: int = int(os.getenv("AUTH_CACHE_TTL_SECONDS", "60"))
+    AUTH_CACHE_MAX_ENTRIES: int = int(os.getenv("AUTH_CACHE_MAX_ENTRIES", "1024"))
+
+    # パスワードハッシュ (bcrypt)。ROUNDS を変更すると次回ログイン時に自動で再ハッシュされます
+    BCRYPT_ROUNDS: int = int(os.getenv("BCRYPT_ROUNDS", "12"))
+    AUTH_WORKERS: int = int(os.getenv("AUTH_WORKERS", str(min(4, os.cpu_count() or 1))))
+    AUTH_MAX_QUEUE: int = int(os.getenv("AUTH_MAX_QUEUE", "64")) # これを超える待ちは 503 で即時拒否
+
+    # アップロード設定
+    UPLOAD_DIR: str = os.getenv("UPLOAD_DIR", "uploads")
+    MAX_UPLOAD_SIZE_MB: int = int(os.getenv("MAX_UPLOAD_SIZE_MB", "20"))
+    # 未添付・参照数 0 のアップロードを `python -m app.db.upload_gc` で削除するまでの猶予（時間）
+    UPLOAD_GC_GRACE_HOURS: float = float(os.getenv("UPLOAD_GC_GRACE_HOURS", "24"))
+    UPLOAD_CHUNK_SIZE: int = 1024 * 1024 # 1MB
+    # /static/ の <img> / <a> 用 URL に付ける署名トークンの有効期間の単位（分）。URL はこの単位で変わる
+    FILE_TOKEN_MINUTES: int = int(os.getenv("FILE_TOKEN_MINUTES", "10"))
+
+    # リアルタイム配信 (SSE) のブローカー
+    # "memory": 単一プロセス内のみ / "unix": 同一ホストの gunicorn ワーカー間で Unix ソケット経由で共有
+    MESSAGE_BROKER_BACKEND: str = os.getenv("MESSAGE_BROKER_BACKEND", "memory")
+    MESSAGE_BROKER_SOCKET_DIR: str = os.getenv("MESSAGE_BROKER_SOCKET_DIR", "/tmp/unitec-broker")
+    SSE_KEEPALIVE_SECONDS: int = int(os.getenv("SSE_KEEPALIVE_SECONDS", "15"))
+
+    # 課題一覧レスポンスキャッシュの最大件数（0 で無効）
+    ISSUE_LIST_CACHE_SIZE: int = int(os.getenv("ISSUE_LIST_CACHE_SIZE", "512"))
+
+    # 画像・PDF 添付のプレビュー (WebP) 生成。長辺のピクセル数・画質・生成スレッド数
+    PREVIEW_ENABLED: bool = os.getenv("PREVIEW_ENABLED", "true").lower() in ("1", "true", "yes")
+    PREVIEW_MAX_SIZE: int = int(os.getenv("PREVIEW_MAX_SIZE", "480"))
+    PREVIEW_QUALITY: int = int(os.getenv("PREVIEW_QUALITY", "80"))
+    PREVIEW_WORKERS: int = int(os.getenv("PREVIEW_WORKERS", "2"))
+
+    # 課題コード (REQ-2025-0001) の採番。ワーカーごとにまとめて予約する件数と、会社ごとの連番にするか
+    ISSUE_CODE_BLOCK_SIZE: int = int(os.getenv("ISSUE_CODE_BLOCK_SIZE", "10"))
+    ISSUE_CODE_PER_COMPANY: bool = os.getenv("ISSUE_CODE_PER_COMPANY", "false").lower() in ("1", "true", "yes")
+
+    # 一括インポートで 1 トランザクションにまとめる件数
+    BULK_IMPORT_CHUNK_SIZE: int = int(os.getenv("BULK_IMPORT_CHUNK_SIZE", "500"))
+    # エクスポートでサーバーサイドカーソルから一度に取り出す件数
+    EXPORT_CHUNK_SIZE: int = int(os.getenv("EXPORT_CHUNK_SIZE", "1000"))
+
+    # 起動時にマイグレーションと初期データ投入も行うか（ローカル開発用）。
+    # false（既定）ではワーカーはスキーマのバージョンを確認するだけなので、デプロイ時に `python -m app.db.migrate` を実行する
+    DB_MIGRATE_ON_STARTUP: bool = os.getenv("DB_MIGRATE_ON_STARTUP", "false").lower() in ("1", "true", "yes")
+
     # CORS
     # Azureでは環境変数 BACKEND_CORS_ORIGINS にフロントエンドのURLをカンマ区切りで設定します
     # 例: "https://unitech-request-platform-frontend.azurewebsites.net,http://localhost:3000"
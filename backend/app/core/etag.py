@@ -0,0 +1,43 @@
+from typing import Any, Optional
+
+from fastapi import Response
+
+# 条件付きリクエスト (ETag / If-None-Match / If-Match) 用のヘルパー
+
+
+def weak_etag(*parts: Any) -> str:
+    return 'W/"' + "-".join(str(part) for part in parts) + '"'
+
+
+def strong_etag(*parts: Any) -> str:
+    return '"' + "-".join(str(part) for part in parts) + '"'
+
+
+def _opaque(tag: str) -> str:
+    tag = tag.strip()
+    return tag[2:] if tag.startswith("W/") else tag
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Weak comparison as used for If-None-Match (RFC 9110 13.1.2)."""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    return any(_opaque(candidate) == _opaque(etag) for candidate in if_none_match.split(","))
+
+
+def if_match_satisfied(if_match: Optional[str], etag: str) -> bool:
+    """Strong comparison as used for If-Match (RFC 9110 13.1.1). A missing header always passes."""
+    if not if_match:
+        return True
+    if if_match.strip() == "*":
+        return True
+    return any(
+        candidate.strip() == etag and not etag.startswith("W/")
+        for candidate in if_match.split(",")
+    )
+
+
+def not_modified(etag: str) -> Response:
+    return Response(status_code=304, headers={"ETag": etag})
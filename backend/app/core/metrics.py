@@ -0,0 +1,300 @@
+import bisect
+import os
+import threading
+import time
+from contextvars import ContextVar
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine, make_url
+from sqlalchemy.pool import Pool
+
+# Prometheus 形式のメトリクス（/metrics）
+# 依存ライブラリを増やさないよう最小限のカウンタ・ゲージ・ヒストグラムを自前で持ち、テキスト形式で出力します。
+# 値はワーカープロセスごと（gunicorn の各ワーカーが自分の値を返す）です。どのワーカーの値かは process_pid で分かります。
+# 記録はロック 1 回と二分探索だけなので、常時有効にしたままで問題ない負荷です。
+
+LabelValues = Tuple[str, ...]
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304, 16777216)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+DB_TIME_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0)
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str]) -> str:
+    if not names:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(str(value))}"' for name, value in zip(names, values)) + "}"
+
+
+def _format_number(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def header(self) -> List[str]:
+        return [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[LabelValues, float] = {}
+
+    def inc(self, labels: LabelValues = (), amount: float = 1) -> None:
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def collect(self) -> List[str]:
+        with self._lock:
+            items = list(self._values.items())
+        return self.header() + [
+            f"{self.name}{_format_labels(self.labelnames, labels)} {_format_number(value)}" for labels, value in items
+        ]
+
+
+class Gauge(Counter):
+    kind = "gauge"
+
+    def dec(self, labels: LabelValues = (), amount: float = 1) -> None:
+        self.inc(labels, -amount)
+
+
+class CallbackGauge(_Metric):
+    """Gauge whose values are read at scrape time."""
+    kind = "gauge"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._callbacks: Dict[LabelValues, Callable[[], float]] = {}
+
+    def set_function(self, callback: Callable[[], float], labels: LabelValues = ()) -> None:
+        with self._lock:
+            self._callbacks[labels] = callback
+
+    def collect(self) -> List[str]:
+        with self._lock:
+            items = list(self._callbacks.items())
+        return self.header() + [
+            f"{self.name}{_format_labels(self.labelnames, labels)} {_format_number(callback())}" for labels, callback in items
+        ]
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (), buckets: Iterable[float] = LATENCY_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # labels -> [per-bucket counts..., +Inf count, sum]
+        self._values: Dict[LabelValues, List[float]] = {}
+
+    def observe(self, value: float, labels: LabelValues = ()) -> None:
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            row = self._values.get(labels)
+            if row is None:
+                row = self._values[labels] = [0] * (len(self.buckets) + 2)
+            row[index] += 1
+            row[-1] += value
+
+    def collect(self) -> List[str]:
+        with self._lock:
+            items = [(labels, list(row)) for labels, row in self._values.items()]
+        lines = self.header()
+        names = self.labelnames + ("le",)
+        for labels, row in items:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), row[:-1]):
+                cumulative += count
+                lines.append(f"{self.name}_bucket{_format_labels(names, labels + (_format_number(bound),))} {cumulative}")
+            label_text = _format_labels(self.labelnames, labels)
+            lines.append(f"{self.name}_sum{label_text} {_format_number(row[-1])}")
+            lines.append(f"{self.name}_count{label_text} {cumulative}")
+        return lines
+
+
+class Registry:
+    def __init__(self) -> None:
+        self._metrics: List[_Metric] = []
+
+    def register(self, metric: _Metric) -> _Metric:
+        self._metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        lines: List[str] = []
+        for metric in self._metrics:
+            lines.extend(metric.collect())
+        return "\n".join(lines) + "\n"
+
+
+registry = Registry()
+
+http_requests = registry.register(Counter(
+    "http_requests_total", "HTTP requests by route and status.", ("method", "route", "status")))
+http_request_duration = registry.register(Histogram(
+    "http_request_duration_seconds", "Time until the response body was fully sent.", ("method", "route")))
+http_response_size = registry.register(Histogram(
+    "http_response_size_bytes", "Response body size.", ("method", "route"), SIZE_BUCKETS))
+http_in_flight = registry.register(Gauge(
+    "http_requests_in_flight", "Requests currently being handled.", ("method",)))
+db_queries_per_request = registry.register(Histogram(
+    "http_request_db_queries", "SQL statements executed per request.", ("method", "route"), QUERY_COUNT_BUCKETS))
+db_time_per_request = registry.register(Histogram(
+    "http_request_db_seconds", "Total SQL execution time per request.", ("method", "route"), DB_TIME_BUCKETS))
+db_query_duration = registry.register(Histogram(
+    "db_query_duration_seconds", "Duration of individual SQL statements.", ("engine",), DB_TIME_BUCKETS))
+db_pool_checkout_wait = registry.register(Histogram(
+    "db_pool_checkout_wait_seconds", "Time spent waiting for a pooled DB connection.", ("engine",), DB_TIME_BUCKETS))
+db_pool_checkouts = registry.register(Counter(
+    "db_pool_checkouts_total", "Connections checked out of the pool.", ("engine",)))
+db_pool_connects = registry.register(Counter(
+    "db_pool_connects_total", "New DB connections opened by the pool.", ("engine",)))
+db_pool_checked_out = registry.register(Gauge(
+    "db_pool_checked_out", "Connections currently checked out of the pool.", ("engine",)))
+db_pool_hold_time = registry.register(Histogram(
+    "db_pool_hold_seconds", "Time a connection stayed checked out of the pool.", ("engine",), LATENCY_BUCKETS))
+process_pid = registry.register(CallbackGauge("process_pid", "PID of the worker that served this scrape."))
+process_pid.set_function(os.getpid)
+
+
+# --- Per-request DB accounting ---
+
+class RequestDbStats:
+    __slots__ = ("queries", "seconds")
+
+    def __init__(self) -> None:
+        self.queries = 0
+        self.seconds = 0.0
+
+
+# run_in_threadpool はコンテキストをコピーするので、スレッドで実行されたクエリもリクエストに集計される
+current_db_stats: ContextVar[Optional[RequestDbStats]] = ContextVar("current_db_stats", default=None)
+
+
+def instrument_engine(engine: Engine, name: str = "sync") -> None:
+    """Time every SQL statement of `engine` (a sync Engine) and track its pool checkouts.
+    The checkout wait itself is timed by the pool class from timed_pool_class()."""
+    labels = (name,)
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+    def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        starts = conn.info.get("query_start")
+        if not starts:
+            return
+        elapsed = time.perf_counter() - starts.pop()
+        db_query_duration.observe(elapsed, labels)
+        stats = current_db_stats.get()
+        if stats is not None:
+            stats.queries += 1
+            stats.seconds += elapsed
+
+    event.listen(engine, "before_cursor_execute", before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", after_cursor_execute)
+
+    # プールの公開イベントで取得・返却・新規接続を数える（返却までの保持時間も記録）
+    def on_connect(dbapi_connection, connection_record):
+        db_pool_connects.inc(labels)
+
+    def on_checkout(dbapi_connection, connection_record, connection_proxy):
+        connection_record.info["checked_out_at"] = time.perf_counter()
+        db_pool_checkouts.inc(labels)
+        db_pool_checked_out.inc(labels)
+
+    def on_checkin(dbapi_connection, connection_record):
+        started = connection_record.info.pop("checked_out_at", None)
+        if started is None:
+            return
+        db_pool_checked_out.dec(labels)
+        db_pool_hold_time.observe(time.perf_counter() - started, labels)
+
+    event.listen(engine.pool, "connect", on_connect)
+    event.listen(engine.pool, "checkout", on_checkout)
+    event.listen(engine.pool, "checkin", on_checkin)
+
+
+def timed_pool_class(url: str, name: str = "sync") -> type:
+    """
+    The dialect's default pool class, subclassed so that Pool.connect() (the checkout,
+    including waiting for a free connection and pre-ping) is timed into
+    db_pool_checkout_wait_seconds. Pass as create_engine(url, poolclass=...).
+    """
+    parsed = make_url(url)
+    base: type = parsed.get_dialect().get_pool_class(parsed)
+    labels = (name,)
+
+    def connect(self: Pool):
+        started = time.perf_counter()
+        try:
+            return base.connect(self)
+        finally:
+            db_pool_checkout_wait.observe(time.perf_counter() - started, labels)
+
+    # 名前をクラスに持たせるので、dispose() で作り直されたプールでも計測が続く
+    return type(f"Timed{base.__name__}", (base,), {"connect": connect})
+
+
+# --- ASGI middleware ---
+
+class MetricsMiddleware:
+    """Records latency, response size, status and DB usage per route template."""
+
+    def __init__(self, app, skip_paths: Iterable[str] = ("/metrics",)):
+        self.app = app
+        self.skip_paths = set(skip_paths)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"] in self.skip_paths:
+            await self.app(scope, receive, send)
+            return
+
+        method = scope["method"]
+        started = time.perf_counter()
+        status = ["500"]
+        size = [0]
+        stats = RequestDbStats()
+        token = current_db_stats.set(stats)
+        http_in_flight.inc((method,))
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                status[0] = str(message["status"])
+            elif message["type"] == "http.response.body":
+                size[0] += len(message.get("body", b""))
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            current_db_stats.reset(token)
+            http_in_flight.dec((method,))
+            route = scope.get("route")
+            # 未定義パスは個別のラベルにしない（ラベルの種類が際限なく増えるのを防ぐ）
+            labels = (method, getattr(route, "path", None) or "unmatched")
+            http_requests.inc(labels + (status[0],))
+            http_request_duration.observe(time.perf_counter() - started, labels)
+            http_response_size.observe(size[0], labels)
+            db_queries_per_request.observe(stats.queries, labels)
+            db_time_per_request.observe(stats.seconds, labels)
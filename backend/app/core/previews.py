@@ -0,0 +1,162 @@
+import logging
+import os
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Optional, Set
+
+from app.core.config import settings
+from app.core.storage import UPLOAD_DIR, blob_disk_path, blob_relative_path
+
+# 画像・PDF 添付ファイルのプレビュー（縮小 WebP）生成
+# アップロード後にバックグラウンドのワーカープールで生成し、blob と同じディレクトリに
+# <sha256>.preview.webp として保存します（内容が同じなら何度でも同じファイルを再利用）。
+# Pillow / pypdfium2 が未インストールの環境ではプレビューは生成されず、preview_url は常に null です。
+
+logger = logging.getLogger(__name__)
+
+try:
+    from PIL import Image, ImageOps
+except ImportError:  # pragma: no cover - optional dependency
+    Image = None
+
+try:
+    import pypdfium2
+except ImportError:  # pragma: no cover - optional dependency
+    pypdfium2 = None
+
+IMAGE_EXTENSIONS = {".png", ".jpg", ".jpeg"}
+PDF_EXTENSIONS = {".pdf"}
+PREVIEW_SUFFIX = ".preview.webp"
+
+# PDFium はスレッドセーフではないため、pypdfium2 の呼び出し（open / render / close）は
+# すべてこのロックの内側で行う（Pillow だけで済む画像プレビューは並列のまま）
+_pdfium_lock = threading.Lock()
+
+
+def is_previewable(ext: Optional[str]) -> bool:
+    if Image is None or not settings.PREVIEW_ENABLED:
+        return False
+    return ext in IMAGE_EXTENSIONS or (ext in PDF_EXTENSIONS and pypdfium2 is not None)
+
+
+def preview_relative_path(sha256: str) -> str:
+    return blob_relative_path(sha256, PREVIEW_SUFFIX)
+
+
+def preview_disk_path(sha256: str) -> str:
+    return os.path.join(UPLOAD_DIR, *preview_relative_path(sha256).split("/"))
+
+
+def preview_url(sha256: str) -> str:
+    return f"/static/{preview_relative_path(sha256)}"
+
+
+def _open_source(sha256: str, ext: str) -> "Image.Image":
+    source = blob_disk_path(sha256, ext)
+    if ext in PDF_EXTENSIONS:
+        with _pdfium_lock:
+            pdf = pypdfium2.PdfDocument(source)
+            try:
+                page = pdf[0]
+                # 長辺が PREVIEW_MAX_SIZE 程度になる倍率でラスタライズ（PDF の単位は 1/72 インチ）
+                width, height = page.get_size()
+                scale = settings.PREVIEW_MAX_SIZE / max(width, height, 1)
+                bitmap = page.render(scale=max(scale, 0.1))
+                # to_pil() はビットマップのバッファを参照するので、close 前にコピーしておく
+                image = bitmap.to_pil().copy()
+                page.close()
+                bitmap.close()
+                return image
+            finally:
+                pdf.close()
+    image = Image.open(source)
+    image.draft("RGB", (settings.PREVIEW_MAX_SIZE, settings.PREVIEW_MAX_SIZE))  # JPEG は縮小デコード
+    return ImageOps.exif_transpose(image)
+
+
+def render_preview(sha256: str, ext: str) -> bool:
+    """Write the WebP preview for a stored blob. Returns False if it could not be rendered."""
+    target = preview_disk_path(sha256)
+    if os.path.exists(target):
+        return True
+    try:
+        image = _open_source(sha256, ext)
+        if image.mode not in ("RGB", "RGBA"):
+            image = image.convert("RGBA" if "A" in image.getbands() else "RGB")
+        image.thumbnail((settings.PREVIEW_MAX_SIZE, settings.PREVIEW_MAX_SIZE))
+        fd, tmp_path = tempfile.mkstemp(suffix=".webp", dir=os.path.dirname(target))
+        try:
+            with os.fdopen(fd, "wb") as out:
+                image.save(out, "WEBP", quality=settings.PREVIEW_QUALITY, method=4)
+            os.replace(tmp_path, target)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+    except Exception as e:
+        logger.warning(f"Preview generation failed for {sha256}{ext}: {e}")
+        return False
+    return True
+
+
+class PreviewWorker:
+    """Background pool that renders previews; the same blob is never queued twice at once."""
+
+    def __init__(self, max_workers: int):
+        self.max_workers = max(1, max_workers)
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._lock = threading.Lock()
+        self._pending: Set[str] = set()
+        self.generated = 0
+        self.failed = 0
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        # 起動後（fork 後）に初めて使われた時点でスレッドを作る
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="preview")
+        return self._executor
+
+    def schedule(self, sha256: Optional[str], ext: Optional[str]) -> None:
+        if not sha256 or not is_previewable(ext) or os.path.exists(preview_disk_path(sha256)):
+            return
+        with self._lock:
+            if sha256 in self._pending:
+                return
+            self._pending.add(sha256)
+            executor = self._get_executor()
+        executor.submit(self._run, sha256, ext)
+
+    def _run(self, sha256: str, ext: str) -> None:
+        try:
+            ok = render_preview(sha256, ext)
+        finally:
+            with self._lock:
+                self._pending.discard(sha256)
+        with self._lock:
+            if ok:
+                self.generated += 1
+            else:
+                self.failed += 1
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "workers": self.max_workers,
+                "queued": len(self._pending),
+                "generated": self.generated,
+                "failed": self.failed,
+            }
+
+
+preview_worker = PreviewWorker(max_workers=settings.PREVIEW_WORKERS)
+
+
+def ready_preview_url(sha256: Optional[str], ext: Optional[str]) -> Optional[str]:
+    """URL of the preview if it has been generated; otherwise queue it and return None."""
+    if not sha256 or not is_previewable(ext):
+        return None
+    if os.path.exists(preview_disk_path(sha256)):
+        return preview_url(sha256)
+    preview_worker.schedule(sha256, ext)
+    return None
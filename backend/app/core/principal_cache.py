@@ -0,0 +1,122 @@
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Dict, Optional, Tuple
+
+from app.core.config import settings
+
+# 認証済みユーザーのキャッシュ
+# get_current_user は全リクエストで JWT デコード + users テーブル参照を行うため、
+# デコード済みトークンとユーザーの軽量スナップショットをプロセス内に保持します。
+# ワーカー間では共有されないので、他ワーカーでの変更は TTL 経過で反映されます。
+
+
+@dataclass(frozen=True)
+class Principal:
+    """Lightweight snapshot of the authenticated user (no ORM session attached)."""
+    id: int
+    email: str
+    name: Optional[str]
+    role: object  # UserRole
+    company_id: Optional[int]
+    company_name: Optional[str]
+    is_active: bool
+
+
+class PrincipalCache:
+    def __init__(self, ttl_seconds: float, max_entries: int):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        # token -> (user_id, expires_at)
+        self._tokens: "OrderedDict[str, Tuple[int, float]]" = OrderedDict()
+        # user_id -> (principal, expires_at)
+        self._users: "OrderedDict[int, Tuple[Principal, float]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.ttl_seconds > 0 and self.max_entries > 0
+
+    def _get(self, store: OrderedDict, key):
+        entry = store.get(key)
+        if entry is None:
+            return None
+        value, expires_at = entry
+        if expires_at <= time.monotonic():
+            del store[key]
+            return None
+        store.move_to_end(key)
+        return value
+
+    def _put(self, store: OrderedDict, key, value, expires_at: float) -> None:
+        store[key] = (value, expires_at)
+        store.move_to_end(key)
+        while len(store) > self.max_entries:
+            store.popitem(last=False)
+
+    def get_user_id(self, token: str) -> Optional[int]:
+        if not self.enabled:
+            return None
+        with self._lock:
+            return self._get(self._tokens, token)
+
+    def put_token(self, token: str, user_id: int, token_exp: Optional[float] = None) -> None:
+        """
+        Remember a verified token. `token_exp` is the JWT exp claim (unix time);
+        the entry never outlives the token itself.
+        """
+        if not self.enabled:
+            return
+        ttl = self.ttl_seconds
+        if token_exp is not None:
+            ttl = min(ttl, token_exp - time.time())
+            if ttl <= 0:
+                return
+        with self._lock:
+            self._put(self._tokens, token, user_id, time.monotonic() + ttl)
+
+    def get_principal(self, user_id: int) -> Optional[Principal]:
+        if not self.enabled:
+            return None
+        with self._lock:
+            principal = self._get(self._users, user_id)
+            if principal is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+            return principal
+
+    def put_principal(self, principal: Principal) -> None:
+        if not self.enabled:
+            return
+        with self._lock:
+            self._put(self._users, principal.id, principal, time.monotonic() + self.ttl_seconds)
+
+    def invalidate_user(self, user_id: int) -> None:
+        with self._lock:
+            self._users.pop(user_id, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._tokens.clear()
+            self._users.clear()
+
+    def stats(self) -> Dict[str, float]:
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / total, 4) if total else 0.0,
+                "tokens": len(self._tokens),
+                "users": len(self._users),
+            }
+
+
+principal_cache = PrincipalCache(
+    ttl_seconds=settings.AUTH_CACHE_TTL_SECONDS,
+    max_entries=settings.AUTH_CACHE_MAX_ENTRIES,
+)
@@ -0,0 +1,161 @@
+import codecs
+import csv
+import json
+from dataclasses import dataclass
+from typing import AsyncIterator, List, Optional, Union
+
+from fastapi import HTTPException
+
+# リクエストボディを読みながら 1 レコードずつ取り出すパーサー（CSV / JSON 配列 / NDJSON）
+# ボディ全体をメモリに載せずに大量データを取り込むために使います。
+
+
+@dataclass
+class RecordError:
+    message: str
+
+
+Record = Union[dict, RecordError]
+
+CSV_TYPES = ("text/csv", "application/csv")
+NDJSON_TYPES = ("application/x-ndjson", "application/ndjson", "application/jsonl")
+JSON_TYPES = ("application/json",)
+
+
+async def _iter_text(chunks: AsyncIterator[bytes]) -> AsyncIterator[str]:
+    decoder = codecs.getincrementaldecoder("utf-8-sig")()
+    async for chunk in chunks:
+        text = decoder.decode(chunk)
+        if text:
+            yield text
+    tail = decoder.decode(b"", final=True)
+    if tail:
+        yield tail
+
+
+async def _iter_lines(chunks: AsyncIterator[bytes]) -> AsyncIterator[str]:
+    buffer = ""
+    async for text in _iter_text(chunks):
+        buffer += text
+        *lines, buffer = buffer.split("\n")
+        for line in lines:
+            yield line
+    if buffer:
+        yield buffer
+
+
+async def iter_ndjson(chunks: AsyncIterator[bytes]) -> AsyncIterator[Record]:
+    async for line in _iter_lines(chunks):
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            record = json.loads(line)
+        except ValueError as e:
+            yield RecordError(f"Invalid JSON: {e}")
+            continue
+        yield record if isinstance(record, dict) else RecordError("Each line must be a JSON object")
+
+
+async def iter_json_array(chunks: AsyncIterator[bytes]) -> AsyncIterator[Record]:
+    decoder = json.JSONDecoder()
+    buffer = ""
+    pos = 0
+    started = False
+    # Each element is located by scanning for the next top-level "," / "]" (or its closing
+    # bracket) before it is decoded, so a malformed element only fails its own row, and a
+    # complete-but-invalid element is never mistaken for one that needs more data.
+    # The scanner state survives across chunks, so a long element is scanned only once.
+    scan: Optional[int] = None
+    depth = 0
+    in_string = escaped = False
+    async for text in _iter_text(chunks):
+        buffer = buffer[pos:] + text
+        if scan is not None:
+            scan -= pos
+        pos = 0
+        while True:
+            if scan is None:
+                # Skip whitespace, the opening bracket and separators
+                while pos < len(buffer) and (buffer[pos].isspace() or buffer[pos] == "," or (not started and buffer[pos] == "[")):
+                    if buffer[pos] == "[":
+                        started = True
+                    pos += 1
+                if pos >= len(buffer):
+                    break
+                if not started:
+                    yield RecordError("Body must be a JSON array")
+                    return
+                if buffer[pos] == "]":
+                    return
+                scan, depth, in_string, escaped = pos, 0, False, False
+            end = None
+            while scan < len(buffer):
+                char = buffer[scan]
+                scan += 1
+                if in_string:
+                    if escaped:
+                        escaped = False
+                    elif char == "\\":
+                        escaped = True
+                    elif char == '"':
+                        in_string = False
+                elif char == '"':
+                    in_string = True
+                elif depth == 0 and char in ",]":
+                    end = scan - 1  # leave the separator / closing bracket for the next round
+                    break
+                elif char in "{[":
+                    depth += 1
+                elif char in "}]":
+                    depth -= 1
+                    if depth <= 0:
+                        end = scan
+                        break
+            if end is None:
+                break  # incomplete element, wait for more data
+            element, pos, scan = buffer[pos:end], end, None
+            try:
+                record = decoder.decode(element)
+            except ValueError as e:
+                yield RecordError(f"Invalid JSON: {e}")
+                continue
+            yield record if isinstance(record, dict) else RecordError("Array items must be JSON objects")
+    if scan is not None or buffer[pos:].strip():
+        yield RecordError("Invalid or truncated JSON array")
+
+
+async def iter_csv(chunks: AsyncIterator[bytes]) -> AsyncIterator[Record]:
+    header: List[str] = []
+    pending = ""
+    async for line in _iter_lines(chunks):
+        # Quoted cells may contain newlines; keep reading until the row is complete
+        line = line.rstrip("\r")
+        pending = f"{pending}\n{line}" if pending else line
+        if pending.count('"') % 2:
+            continue
+        row_text, pending = pending, ""
+        if not row_text.strip():
+            continue
+        row = next(csv.reader([row_text]))
+        if not header:
+            header = [name.strip() for name in row]
+            continue
+        # Empty cells mean "not provided" so schema defaults apply
+        yield {name: value for name, value in zip(header, row) if value != ""}
+    if pending:
+        yield RecordError("Unterminated quoted CSV field")
+
+
+def iter_records(content_type: str, chunks: AsyncIterator[bytes]) -> AsyncIterator[Record]:
+    media_type = (content_type or "").split(";")[0].strip().lower()
+    if media_type in CSV_TYPES:
+        return iter_csv(chunks)
+    if media_type in NDJSON_TYPES:
+        return iter_ndjson(chunks)
+    if media_type in JSON_TYPES:
+        return iter_json_array(chunks)
+    raise HTTPException(
+        status_code=415,
+        detail="Content-Type must be text/csv, application/json or application/x-ndjson",
+    )
@@ -0,0 +1,81 @@
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Dict, Hashable, Optional
+
+from fastapi import Response
+
+from app.core.etag import etag_matches, not_modified
+
+# シリアライズ済みレスポンスの LRU キャッシュ
+# キーにはデータのバージョン（更新のたびに増えるカウンタ等）を含めるため、
+# 古いエントリは明示的に消さなくても参照されなくなり、LRU で追い出されます。
+
+
+@dataclass
+class CachedResponse:
+    body: bytes
+    etag: str
+    headers: Dict[str, str] = field(default_factory=dict)
+    media_type: str = "application/json"
+
+    def to_response(self, if_none_match: Optional[str] = None) -> Response:
+        if etag_matches(if_none_match, self.etag):
+            return not_modified(self.etag)
+        return Response(
+            content=self.body,
+            media_type=self.media_type,
+            headers={"ETag": self.etag, **self.headers},
+        )
+
+
+class ResponseCache:
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[Hashable, CachedResponse]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.not_modified = 0
+        self.evictions = 0
+
+    def get(self, key: Hashable) -> Optional[CachedResponse]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry
+
+    def put(self, key: Hashable, entry: CachedResponse) -> CachedResponse:
+        if self.max_entries <= 0:
+            return entry
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+        return entry
+
+    def record_not_modified(self) -> None:
+        with self._lock:
+            self.not_modified += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, float]:
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / total, 4) if total else 0.0,
+                "not_modified": self.not_modified,
+                "evictions": self.evictions,
+            }
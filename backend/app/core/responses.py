@@ -0,0 +1,33 @@
+import decimal
+import enum
+from datetime import date, datetime, time
+from typing import Any
+
+import orjson
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel
+
+# API 全体の既定レスポンスクラス（main.py の FastAPI(default_response_class=...) で指定）
+# orjson で JSON を生成します。標準の json.dumps と同じく日本語はエスケープせず UTF-8 のまま出力し、
+# Enum は値、date / datetime は ISO 8601（タイムゾーン付きならオフセットも）になります。
+# orjson は必須の依存関係です（requirements.txt）。
+
+
+def _default(value: Any) -> Any:
+    # orjson が直接扱えない型（通常は FastAPI の jsonable_encoder で変換済み）
+    if isinstance(value, BaseModel):
+        return value.model_dump(mode="json")
+    if isinstance(value, decimal.Decimal):
+        return int(value) if value == value.to_integral_value() else float(value)
+    if isinstance(value, (set, frozenset)):
+        return list(value)
+    if isinstance(value, enum.Enum):
+        return value.value
+    if isinstance(value, (date, datetime, time)):
+        return value.isoformat()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+class FastJSONResponse(JSONResponse):
+    def render(self, content: Any) -> bytes:
+        return orjson.dumps(content, default=_default, option=orjson.OPT_NON_STR_KEYS)
@@ -1,8 +1,13 @@
+import time
 from datetime import datetime, timedelta
-from typing import Any, Union
-from jose import jwt
+from typing import Any, Optional, Union
+from jose import jwt, JWTError
 import bcrypt
 from app.core.config import settings
+from app.core.auth_executor import auth_executor
+
+# 招待中ユーザー等、ログインできないアカウントに設定する値（bcrypt を通さない）
+UNUSABLE_PASSWORD_PREFIX = "!"
 
 def create_access_token(subject: Union[str, Any], expires_delta: timedelta = None) -> str:
     if expires_delta:
@@ -14,10 +19,73 @@ def create_access_token(subject: Union[str, Any], expires_delta: timedelta = Non
     encoded_jwt = jwt.encode(to_encode, settings.SECRET_KEY, algorithm=settings.ALGORITHM)
     return encoded_jwt
 
-def verify_password(plain_password: str, hashed_password: str) -> bool:
+# /static/ のファイル 1 つだけに使える短命トークン（<img> / <a> は Authorization ヘッダーを送れないため）
+FILE_TOKEN_TYPE = "file"
+STATIC_URL_PREFIX = "/static/"
+
+def create_file_token(user_id: int, path: str) -> str:
+    """
+    Token that lets `user_id` fetch /static/<path> and nothing else.
+    The expiry is rounded up to the FILE_TOKEN_MINUTES window, so the same user gets
+    the same URL (and browser cache entry) for a file within a window.
+    """
+    window = max(60, settings.FILE_TOKEN_MINUTES * 60)
+    expire = (int(time.time()) // window + 2) * window
+    to_encode = {"exp": expire, "sub": str(user_id), "path": path, "typ": FILE_TOKEN_TYPE}
+    return jwt.encode(to_encode, settings.SECRET_KEY, algorithm=settings.ALGORITHM)
+
+def user_id_from_file_token(token: str, path: str) -> Optional[int]:
+    """The user id of a valid file token for `path`, else None."""
+    try:
+        payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
+        if payload.get("typ") != FILE_TOKEN_TYPE or payload.get("path") != path:
+            return None
+        return int(payload["sub"])
+    except (JWTError, KeyError, TypeError, ValueError):
+        return None
+
+def signed_file_url(url: Optional[str], user_id: int) -> Optional[str]:
+    """Add a file token to a /static/ URL; other URLs are returned unchanged."""
+    if not url or not url.startswith(STATIC_URL_PREFIX):
+        return url
+    return f"{url}?token={create_file_token(user_id, url[len(STATIC_URL_PREFIX):])}"
+
+def _checkpw(plain_password: str, hashed_password: str) -> bool:
     # bcrypt.checkpw expects bytes
     return bcrypt.checkpw(plain_password.encode('utf-8'), hashed_password.encode('utf-8'))
 
-def get_password_hash(password: str) -> str:
+def _hashpw(password: str) -> str:
     # bcrypt.hashpw returns bytes, so we decode to store as string
-    return bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt()).decode('utf-8')
+    return bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt(rounds=settings.BCRYPT_ROUNDS)).decode('utf-8')
+
+def is_password_usable(hashed_password: str) -> bool:
+    return bool(hashed_password) and not hashed_password.startswith(UNUSABLE_PASSWORD_PREFIX)
+
+def make_unusable_password() -> str:
+    return UNUSABLE_PASSWORD_PREFIX
+
+def needs_rehash(hashed_password: str) -> bool:
+    """True when the stored hash was made with a different BCRYPT_ROUNDS than configured."""
+    if not is_password_usable(hashed_password):
+        return False
+    try:
+        # $2b$12$<salt+hash>
+        return int(hashed_password.split("$")[2]) != settings.BCRYPT_ROUNDS
+    except (IndexError, ValueError):
+        return False
+
+def verify_password(plain_password: str, hashed_password: str) -> bool:
+    if not is_password_usable(hashed_password):
+        return False
+    return auth_executor.run(_checkpw, plain_password, hashed_password)
+
+def get_password_hash(password: str) -> str:
+    return auth_executor.run(_hashpw, password)
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    if not is_password_usable(hashed_password):
+        return False
+    return await auth_executor.run_async(_checkpw, plain_password, hashed_password)
+
+async def get_password_hash_async(password: str) -> str:
+    return await auth_executor.run_async(_hashpw, password)
@@ -0,0 +1,216 @@
+import hashlib
+import logging
+import os
+import re
+import tempfile
+from collections import Counter
+from dataclasses import dataclass
+from typing import BinaryIO, Dict, Iterable, Optional
+
+from fastapi import HTTPException
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.models.issue import Blob
+
+# アップロードファイルのローカル保存処理（コンテンツアドレス方式）
+# ファイルは SHA-256 をキーに uploads/blobs/ab/cd/<sha256><ext> へ1度だけ保存し、
+# Attachment 行からの参照数を blobs.ref_count で管理します。
+# 同期 I/O なので、async エンドポイントからは run_in_threadpool 経由で呼び出してください。
+
+logger = logging.getLogger(__name__)
+
+UPLOAD_DIR = settings.UPLOAD_DIR
+
+# 拡張子ごとのマジックバイト（先頭数バイト）
+# xlsx/docx は ZIP、xls/doc は OLE2 コンテナ
+_ZIP = (b"PK\x03\x04",)
+_OLE2 = (b"\xd0\xcf\x11\xe0\xa1\xb1\x1a\xe1",)
+MAGIC_SIGNATURES = {
+    ".png": (b"\x89PNG\r\n\x1a\n",),
+    ".jpg": (b"\xff\xd8\xff",),
+    ".jpeg": (b"\xff\xd8\xff",),
+    ".pdf": (b"%PDF-",),
+    ".xlsx": _ZIP,
+    ".docx": _ZIP,
+    ".xls": _OLE2,
+    ".doc": _OLE2,
+}
+ALLOWED_EXTENSIONS = set(MAGIC_SIGNATURES)
+_SNIFF_BYTES = max(len(sig) for sigs in MAGIC_SIGNATURES.values() for sig in sigs)
+
+
+BLOB_DIR = "blobs"
+_BLOB_PATH_RE = re.compile(r"/blobs/[0-9a-f]{2}/[0-9a-f]{2}/([0-9a-f]{64})\.[a-z0-9]+$")
+
+
+@dataclass
+class StoredUpload:
+    sha256: str
+    size: int
+    file_ext: str
+    deduplicated: bool = False  # True when an identical blob was already on disk
+
+    @property
+    def relative_path(self) -> str:
+        return blob_relative_path(self.sha256, self.file_ext)
+
+    @property
+    def url(self) -> str:
+        return blob_url(self.sha256, self.file_ext)
+
+
+def max_upload_bytes() -> int:
+    return settings.MAX_UPLOAD_SIZE_MB * 1024 * 1024
+
+
+def too_large_exception() -> HTTPException:
+    return HTTPException(
+        status_code=413,
+        detail=f"File too large (max {settings.MAX_UPLOAD_SIZE_MB}MB)",
+    )
+
+
+def matches_magic(ext: str, head: bytes) -> bool:
+    return any(head.startswith(sig) for sig in MAGIC_SIGNATURES.get(ext, ()))
+
+
+def blob_relative_path(sha256: str, ext: str) -> str:
+    # 1ディレクトリに大量のファイルが溜まらないよう、ハッシュ先頭2+2文字でシャーディング
+    return f"{BLOB_DIR}/{sha256[:2]}/{sha256[2:4]}/{sha256}{ext}"
+
+
+def blob_url(sha256: str, ext: str) -> str:
+    return f"/static/{blob_relative_path(sha256, ext)}"
+
+
+def blob_disk_path(sha256: str, ext: str) -> str:
+    return os.path.join(UPLOAD_DIR, *blob_relative_path(sha256, ext).split("/"))
+
+
+def sha256_from_path(file_path: Optional[str]) -> Optional[str]:
+    """Extract the blob hash from a /static/blobs/... URL (None for legacy uuid uploads)."""
+    if not file_path:
+        return None
+    match = _BLOB_PATH_RE.search(file_path)
+    return match.group(1) if match else None
+
+
+def _stream_to_temp(source: BinaryIO, ext: str, max_bytes: int):
+    """
+    Copy `source` to a temp file in fixed-size chunks.
+    Size limit, SHA-256 and magic-byte check happen in the same pass.
+    Returns (tmp_path, size, sha256); the caller owns tmp_path.
+    """
+    os.makedirs(UPLOAD_DIR, exist_ok=True)
+    digest = hashlib.sha256()
+    size = 0
+    head = b""
+    fd, tmp_path = tempfile.mkstemp(dir=UPLOAD_DIR, prefix=".upload-", suffix=".part")
+    try:
+        with os.fdopen(fd, "wb") as buffer:
+            while True:
+                chunk = source.read(settings.UPLOAD_CHUNK_SIZE)
+                if not chunk:
+                    break
+                size += len(chunk)
+                if size > max_bytes:
+                    raise too_large_exception()
+                if len(head) < _SNIFF_BYTES:
+                    head += chunk[:_SNIFF_BYTES - len(head)]
+                    if len(head) >= _SNIFF_BYTES and not matches_magic(ext, head):
+                        raise HTTPException(status_code=400, detail="File content does not match its type")
+                digest.update(chunk)
+                buffer.write(chunk)
+        # 短いファイルはループ内で判定されないのでここで確認
+        if not matches_magic(ext, head):
+            raise HTTPException(status_code=400, detail="File content does not match its type")
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    return tmp_path, size, digest.hexdigest()
+
+
+def touch_blob(sha256: str, ext: str) -> None:
+    # 再利用される blob の mtime を更新し、掃除 (app.db.upload_gc) の猶予期間を延ばす
+    try:
+        os.utime(blob_disk_path(sha256, ext))
+    except FileNotFoundError:
+        pass
+
+
+def store_blob(source: BinaryIO, ext: str, max_bytes: Optional[int] = None) -> StoredUpload:
+    """
+    Stream `source` into the content-addressed store.
+    The temp file is renamed into place atomically; if the same content is
+    already stored the temp file is simply discarded.
+    """
+    if max_bytes is None:
+        max_bytes = max_upload_bytes()
+    tmp_path, size, sha256 = _stream_to_temp(source, ext, max_bytes)
+    target = blob_disk_path(sha256, ext)
+    try:
+        if os.path.exists(target):
+            os.remove(tmp_path)
+            touch_blob(sha256, ext)
+            return StoredUpload(sha256=sha256, size=size, file_ext=ext, deduplicated=True)
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        os.replace(tmp_path, target)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    return StoredUpload(sha256=sha256, size=size, file_ext=ext)
+
+
+# --- Blob rows and reference counts ---
+
+def register_blob(db: Session, stored: StoredUpload, user_id: int) -> None:
+    """Ensure a Blob row exists for a stored file (ref_count starts at 0), uploaded by `user_id`."""
+    blob = db.get(Blob, stored.sha256)
+    if blob is not None:
+        # 内容をアップロードした（持っている）ことが確かなので、未添付の間はこのユーザーが読める
+        if blob.uploaded_by != user_id:
+            blob.uploaded_by = user_id
+            db.commit()
+        return
+    db.add(Blob(sha256=stored.sha256, size=stored.size, file_ext=stored.file_ext, ref_count=0, uploaded_by=user_id))
+    try:
+        db.commit()
+    except IntegrityError:
+        # 同じ内容が別リクエストで同時に登録された
+        db.rollback()
+
+
+def get_stored_blob(db: Session, sha256: str) -> Optional[Blob]:
+    """Return the Blob when both the row and the file on disk exist."""
+    blob = db.get(Blob, sha256)
+    if blob is None or not os.path.exists(blob_disk_path(blob.sha256, blob.file_ext)):
+        return None
+    return blob
+
+
+def known_blobs(db: Session, file_paths: Iterable[Optional[str]]) -> Dict[str, Blob]:
+    """Map sha256 -> Blob for every blob-backed path in `file_paths` (one query)."""
+    shas = {sha for sha in (sha256_from_path(p) for p in file_paths) if sha}
+    if not shas:
+        return {}
+    return {blob.sha256: blob for blob in db.query(Blob).filter(Blob.sha256.in_(shas)).all()}
+
+
+def _adjust_ref_counts(db: Session, shas: Iterable[Optional[str]], sign: int) -> None:
+    # UPDATE ... SET ref_count = ref_count + n で加算するので同時更新でも値を失わない
+    for sha, count in Counter(sha for sha in shas if sha).items():
+        db.query(Blob).filter(Blob.sha256 == sha).update(
+            {Blob.ref_count: Blob.ref_count + sign * count}, synchronize_session=False
+        )
+
+
+def add_blob_refs(db: Session, shas: Iterable[Optional[str]]) -> None:
+    _adjust_ref_counts(db, shas, 1)
+
+
+def release_blob_refs(db: Session, shas: Iterable[Optional[str]]) -> None:
+    _adjust_ref_counts(db, shas, -1)
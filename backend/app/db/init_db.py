@@ -1,10 +1,11 @@
 import logging
 import datetime
 from sqlalchemy.orm import Session
-from app.db.session import engine, SessionLocal
-from app.models.user import Base, User, Company, UserRole, CompanyType
+from app.core.config import settings
+from app.models.user import User, Company, UserRole, CompanyType
 from app.models.issue import Issue, IssueStatus, Urgency
 from app.core.security import get_password_hash
+from app.db.search import index_issues
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -100,24 +101,20 @@ def create_initial_data(db: Session) -> None:
             is_sample_provided=False
         )
         db.add(issue2)
-        
+        db.flush()
+        index_issues(db, [issue1.id, issue2.id])
+
         db.commit()
         logger.info("Created Sample Issues")
 
 def init_db():
-    # Create tables (with error handling for concurrent workers)
-    try:
-        Base.metadata.create_all(bind=engine)
-        logger.info("Database tables created successfully")
-    except Exception as e:
-        logger.warning(f"Table creation skipped or failed: {e}")
-        # Continue even if tables already exist
-    
-    # Create initial data
-    db = SessionLocal()
-    try:
-        create_initial_data(db)
-    except Exception as e:
-        logger.error(f"Failed to create initial data: {e}")
-    finally:
-        db.close()
+    # ワーカー起動時の処理。テーブル作成・初期データ投入はデプロイ時に `python -m app.db.migrate` で 1 回だけ行い、
+    # ここではスキーマのバージョンを確認するだけ（DDL も bcrypt も行わない）
+    from app.db.migrate import check_schema, migrate, seed
+
+    if settings.DB_MIGRATE_ON_STARTUP:
+        # ローカル開発・テスト用: 起動時にマイグレーションと初期データ投入も行う（プロセス間ロック付き）
+        migrate()
+        seed()
+    version = check_schema()
+    logger.info(f"Database schema version {version}")
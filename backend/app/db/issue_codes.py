@@ -0,0 +1,92 @@
+import os
+import threading
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import select
+
+from app.core.config import settings
+from app.db.session import SessionLocal
+from app.db.upsert import upsert_increment
+from app.models.issue import IssueCodeCounter
+
+# 課題コード (REQ-2025-0001) の採番
+# issue_code_counters の該当行を「ブロックサイズ分」加算する短いトランザクションで番号をまとめて予約し、
+# 以降はワーカー内のメモリから払い出します。課題作成のトランザクションとは別接続で行うため、
+# カウンタ行のロックは予約の一瞬だけで、テーブル全体をロックすることもありません。
+# 予約済みで使われなかった番号（ワーカー再起動時など）は欠番になります。
+
+
+def code_scope(year: int, company_id: Optional[int]) -> str:
+    if settings.ISSUE_CODE_PER_COMPANY:
+        return f"{year}:{company_id or 0}"
+    return str(year)
+
+
+def format_issue_code(year: int, company_id: Optional[int], number: int) -> str:
+    if settings.ISSUE_CODE_PER_COMPANY:
+        return f"REQ-{year}-{company_id or 0}-{number:04d}"
+    return f"REQ-{year}-{number:04d}"
+
+
+def reserve_block(scope: str, size: int) -> Tuple[int, int]:
+    """Reserve `size` consecutive numbers for `scope` in a short transaction of its own; returns (first, last)."""
+    db = SessionLocal()
+    try:
+        upsert_increment(db, IssueCodeCounter, [{"scope": scope}], "last_value", size)
+        # 同じトランザクション内で読むので、加算した行ロック（SQLite はDBロック）の内側の値になる
+        last = db.execute(select(IssueCodeCounter.last_value).where(IssueCodeCounter.scope == scope)).scalar_one()
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+    return last - size + 1, last
+
+
+class IssueCodeAllocator:
+    """
+    Hands out issue-code numbers per scope from blocks reserved in issue_code_counters.
+    Thread-safe within a worker; numbers never repeat across workers.
+    """
+
+    def __init__(self, block_size: int) -> None:
+        self.block_size = max(1, block_size)
+        self._blocks: Dict[str, Tuple[int, int]] = {}  # scope -> (next, last)
+        self._lock = threading.Lock()
+        self.reservations = 0
+
+    def allocate(self, scope: str, count: int = 1) -> List[int]:
+        numbers: List[int] = []
+        with self._lock:
+            while len(numbers) < count:
+                next_number, last = self._blocks.get(scope, (1, 0))
+                if next_number > last:
+                    # Bulk requests reserve what they need in one go
+                    next_number, last = reserve_block(scope, max(self.block_size, count - len(numbers)))
+                    self.reservations += 1
+                take = min(last - next_number + 1, count - len(numbers))
+                numbers.extend(range(next_number, next_number + take))
+                self._blocks[scope] = (next_number + take, last)
+        return numbers
+
+    def reset(self) -> None:
+        # A forked worker must not hand out numbers from its parent's block
+        self._blocks = {}
+        self._lock = threading.Lock()
+
+
+issue_code_allocator = IssueCodeAllocator(settings.ISSUE_CODE_BLOCK_SIZE)
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=issue_code_allocator.reset)
+
+
+def allocate_issue_codes(company_id: Optional[int], count: int = 1) -> List[str]:
+    """
+    Allocate `count` new issue codes. Call before the request's own writes:
+    on SQLite the reservation needs the database write lock.
+    """
+    year = datetime.now().year
+    numbers = issue_code_allocator.allocate(code_scope(year, company_id), count)
+    return [format_issue_code(year, company_id, number) for number in numbers]
@@ -0,0 +1,90 @@
+import logging
+from typing import Dict, Optional
+
+from sqlalchemy import func, select
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+
+from app.db.session import SessionLocal, engine
+from app.db.upsert import upsert_increment
+from app.models.issue import Issue, IssueStat, IssueStatus, BallHolder, Urgency
+import app.models.user  # noqa: F401 - registers Company / User for the Issue relationships (needed when run as a CLI)
+
+# ダッシュボード用の集計テーブル (issue_stats) の維持
+# 課題の作成・更新と同じトランザクションで該当行の件数を ±1 します。
+# ずれが生じた場合は `python -m app.db.issue_stats` で issues テーブルから再構築できます。
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+StatKey = Dict[str, object]
+
+
+def stat_key(company_id: Optional[int], status, ball_holder, urgency) -> StatKey:
+    # Column defaults are applied on INSERT, so fall back to them for unflushed issues
+    return {
+        "company_id": company_id or 0,
+        "status": status or IssueStatus.UNTOUCHED,
+        "ball_holder": ball_holder or BallHolder.UNITEC,
+        "urgency": urgency or Urgency.MIDDLE,
+    }
+
+
+def issue_stat_key(issue: Issue) -> StatKey:
+    return stat_key(issue.company_id, issue.status, issue.ball_holder, issue.urgency)
+
+
+def record_issue_created(db: Session, issue: Issue) -> None:
+    upsert_increment(db, IssueStat, [issue_stat_key(issue)], "count", 1)
+
+
+def record_issue_changed(db: Session, old_key: StatKey, new_key: StatKey) -> None:
+    if old_key == new_key:
+        return
+    upsert_increment(db, IssueStat, [old_key], "count", -1)
+    upsert_increment(db, IssueStat, [new_key], "count", 1)
+
+
+def rebuild_issue_stats(db: Session) -> int:
+    """Recompute issue_stats from the issues table. Returns the number of summary rows."""
+    rows = db.execute(
+        select(Issue.company_id, Issue.status, Issue.ball_holder, Issue.urgency, func.count(Issue.id))
+        .group_by(Issue.company_id, Issue.status, Issue.ball_holder, Issue.urgency)
+    ).all()
+    totals: Dict[tuple, int] = {}
+    for company_id, status, ball_holder, urgency, count in rows:
+        key = tuple(stat_key(company_id, status, ball_holder, urgency).values())
+        totals[key] = totals.get(key, 0) + count
+
+    db.query(IssueStat).delete()
+    db.add_all(
+        IssueStat(company_id=company_id, status=status, ball_holder=ball_holder, urgency=urgency, count=count)
+        for (company_id, status, ball_holder, urgency), count in totals.items()
+    )
+    db.commit()
+    return len(totals)
+
+
+def ensure_issue_stats(bind: Engine = engine) -> None:
+    """Build the summary once when it is empty but issues already exist."""
+    db = SessionLocal(bind=bind)
+    try:
+        if db.query(IssueStat).first() is None and db.query(Issue.id).first() is not None:
+            rows = rebuild_issue_stats(db)
+            logger.info(f"Built issue_stats ({rows} rows)")
+    finally:
+        db.close()
+
+
+def main() -> None:
+    logger.info("Rebuilding issue_stats")
+    db = SessionLocal()
+    try:
+        rows = rebuild_issue_stats(db)
+    finally:
+        db.close()
+    logger.info(f"issue_stats rebuilt ({rows} rows)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,434 @@
+import argparse
+import logging
+import os
+import tempfile
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Callable, Iterator, List, Optional
+
+from sqlalchemy import (
+    Boolean, Column, Date, DateTime, Enum as SQLEnum, ForeignKey, Integer, MetaData, String, Table, Text,
+    func, inspect, select, text,
+)
+from sqlalchemy.engine import Engine
+
+from app.db.session import engine as default_engine, SessionLocal
+from app.db.init_db import create_initial_data
+from app.db.issue_stats import ensure_issue_stats
+from app.db.search import ensure_search_index
+from app.models.issue import BallHolder, IssueStatus, Urgency
+from app.models.user import CompanyType, UserRole
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - Windows
+    fcntl = None
+
+# スキーマのバージョン管理と初期データ投入（デプロイごとに 1 回実行）
+#   python -m app.db.migrate            # migrate + seed
+#   python -m app.db.migrate migrate    # 未適用のマイグレーションだけ
+#   python -m app.db.migrate seed       # 初期データだけ（bcrypt を使うのはここだけ）
+#   python -m app.db.migrate status     # 現在のバージョンと未適用の一覧
+# 複数のインスタンス・ワーカーから同時に実行されても、DB ロック（MySQL: GET_LOCK / PostgreSQL: advisory lock /
+# SQLite: DB ファイル横のロックファイル）で 1 プロセスずつ順に実行され、適用済みのものは飛ばされます。
+# ワーカー起動時 (init_db) は schema_migrations のバージョンを確認するだけで、DDL も bcrypt も行いません。
+#
+# スキーマを変更するときは、モデルを変更したうえで MIGRATIONS の末尾に新しい番号で関数を追加してください。
+# 各マイグレーションはその時点の DDL を自分で持ちます（モデルを参照しないので、後でモデルが変わっても結果は同じ）。
+# 適用済みのマイグレーションは書き換えず、変更は必ず新しい番号で追加します。
+# MySQL の DDL は自動コミットされるため、各マイグレーションは途中で失敗しても再実行できるように
+# （既にあるテーブル・カラム・インデックスは作らないように）書きます。
+# schema_migrations 導入前の DB（起動時の create_all で作られたもの）も、同じ理由でそのまま 1 から適用できます。
+
+logger = logging.getLogger(__name__)
+
+LOCK_NAME = "unitec_schema_migrate"
+
+_metadata = MetaData()
+schema_migrations = Table(
+    "schema_migrations",
+    _metadata,
+    Column("version", Integer, primary_key=True, autoincrement=False),
+    Column("name", String(100), nullable=False),
+    Column("applied_at", DateTime(timezone=True), server_default=func.now()),
+)
+
+
+@dataclass
+class Migration:
+    version: int
+    name: str
+    apply: Callable[[Engine], None]
+
+
+# --- Schema snapshots used by the migrations (never edit one that has been released) ---
+
+_history = MetaData()
+
+# Version 1: the schema as first deployed
+Table(
+    "companies", _history,
+    Column("id", Integer, primary_key=True, index=True),
+    Column("name", String(255), index=True),
+    Column("representative_email", String(255)),
+    Column("type", SQLEnum(CompanyType)),
+    Column("address_default", Text, nullable=True),
+    Column("is_active", Boolean),
+    Column("created_at", DateTime(timezone=True), server_default=func.now()),
+)
+Table(
+    "users", _history,
+    Column("id", Integer, primary_key=True, index=True),
+    Column("email", String(255), unique=True, index=True),
+    Column("password_hash", String(255)),
+    Column("name", String(255)),
+    Column("is_active", Boolean),
+    Column("role", SQLEnum(UserRole)),
+    Column("invitation_token", String(255), nullable=True, index=True),
+    Column("company_id", Integer, ForeignKey("companies.id")),
+    Column("created_at", DateTime(timezone=True), server_default=func.now()),
+)
+Table(
+    "issues", _history,
+    Column("id", Integer, primary_key=True, index=True),
+    Column("issue_code", String(255), unique=True, index=True),
+    Column("company_id", Integer, ForeignKey("companies.id")),
+    Column("creator_id", Integer, ForeignKey("users.id")),
+    Column("assignee_id", Integer, ForeignKey("users.id"), nullable=True),
+    Column("status", SQLEnum(IssueStatus), index=True),
+    Column("ball_holder", SQLEnum(BallHolder)),
+    Column("category", String(255), index=True),
+    Column("title", String(255)),
+    Column("product_name", String(255)),
+    Column("description", Text),
+    Column("urgency", SQLEnum(Urgency)),
+    Column("client_arbitrary_code", String(255), nullable=True),
+    Column("desired_deadline", Date, nullable=True),
+    Column("is_sample_provided", Boolean),
+    Column("sample_shipping_info", Text, nullable=True),
+    Column("created_at", DateTime(timezone=True), server_default=func.now()),
+    Column("updated_at", DateTime(timezone=True), server_default=func.now()),
+)
+Table(
+    "ingredients", _history,
+    Column("id", Integer, primary_key=True, index=True),
+    Column("issue_id", Integer, ForeignKey("issues.id")),
+    Column("name", String(255)),
+    Column("amount", String(255)),
+)
+Table(
+    "messages", _history,
+    Column("id", Integer, primary_key=True, index=True),
+    Column("issue_id", Integer, ForeignKey("issues.id")),
+    Column("sender_id", Integer, ForeignKey("users.id")),
+    Column("content", Text),
+    Column("has_attachment", Boolean),
+    Column("sent_at", DateTime(timezone=True), server_default=func.now()),
+)
+Table(
+    "internal_notes", _history,
+    Column("id", Integer, primary_key=True, index=True),
+    Column("issue_id", Integer, ForeignKey("issues.id")),
+    Column("author_id", Integer, ForeignKey("users.id")),
+    Column("content", Text),
+    Column("created_at", DateTime(timezone=True), server_default=func.now()),
+)
+Table(
+    "additional_questions", _history,
+    Column("id", Integer, primary_key=True, index=True),
+    Column("issue_id", Integer, ForeignKey("issues.id")),
+    Column("question_text", Text),
+    Column("answer_text", Text, nullable=True),
+    Column("is_answered", Boolean),
+    Column("created_at", DateTime(timezone=True), server_default=func.now()),
+    Column("answered_at", DateTime(timezone=True), nullable=True),
+)
+Table(
+    "attachments", _history,
+    Column("id", Integer, primary_key=True, index=True),
+    Column("issue_id", Integer, ForeignKey("issues.id")),
+    Column("file_name", String(255)),
+    Column("file_path", String(500)),
+    Column("file_type", String(100), nullable=True),
+    Column("uploaded_at", DateTime(timezone=True), server_default=func.now()),
+)
+BASELINE_TABLES = (
+    "companies", "users", "issues", "ingredients", "messages", "internal_notes", "additional_questions", "attachments",
+)
+
+# Version 3
+Table(
+    "blobs", _history,
+    Column("sha256", String(64), primary_key=True),
+    Column("size", Integer),
+    Column("file_ext", String(16)),
+    Column("ref_count", Integer, nullable=False),
+    Column("created_at", DateTime(timezone=True), server_default=func.now()),
+    Column("updated_at", DateTime(timezone=True), server_default=func.now()),
+)
+
+# Version 5
+Table(
+    "issue_list_versions", _history,
+    Column("scope", String(64), primary_key=True),
+    Column("version", Integer, nullable=False),
+)
+
+# Version 7
+Table(
+    "issue_stats", _history,
+    Column("company_id", Integer, primary_key=True, autoincrement=False),
+    Column("status", SQLEnum(IssueStatus), primary_key=True),
+    Column("ball_holder", SQLEnum(BallHolder), primary_key=True),
+    Column("urgency", SQLEnum(Urgency), primary_key=True),
+    Column("count", Integer, nullable=False),
+)
+
+# Version 9
+Table(
+    "issue_code_counters", _history,
+    Column("scope", String(64), primary_key=True),
+    Column("last_value", Integer, nullable=False),
+)
+
+
+# --- Idempotent DDL helpers ---
+
+def _create_tables(bind: Engine, *names: str) -> None:
+    _history.create_all(bind=bind, tables=[_history.tables[name] for name in names], checkfirst=True)
+
+
+def _add_column(bind: Engine, table: str, column: str, ddl: str) -> bool:
+    """ALTER TABLE ... ADD COLUMN unless the column exists. Returns True if it was added."""
+    if column in {col["name"] for col in inspect(bind).get_columns(table)}:
+        return False
+    with bind.begin() as conn:
+        conn.execute(text(f"ALTER TABLE {table} ADD COLUMN {column} {ddl}"))
+    logger.info(f"Added column {table}.{column}")
+    return True
+
+
+def _create_index(bind: Engine, table: str, name: str, columns: str) -> None:
+    if name in {index["name"] for index in inspect(bind).get_indexes(table)}:
+        return
+    with bind.begin() as conn:
+        conn.execute(text(f"CREATE INDEX {name} ON {table} ({columns})"))
+    logger.info(f"Created index {name}")
+
+
+# --- Migrations ---
+
+def _baseline(bind: Engine) -> None:
+    _create_tables(bind, *BASELINE_TABLES)
+
+
+def _issue_list_keyset_indexes(bind: Engine) -> None:
+    _create_index(bind, "issues", "ix_issues_company_created_id", "company_id, created_at, id")
+    _create_index(bind, "issues", "ix_issues_created_id", "created_at, id")
+
+
+def _content_addressed_blobs(bind: Engine) -> None:
+    _create_tables(bind, "blobs")
+    if bind.dialect.name == "mysql":
+        # MySQL はカラム定義中の REFERENCES を無視するので、外部キーは別に追加する
+        _add_column(bind, "attachments", "sha256", "VARCHAR(64)")
+        _create_index(bind, "attachments", "ix_attachments_sha256", "sha256")
+        foreign_keys = inspect(bind).get_foreign_keys("attachments")
+        if not any(fk["constrained_columns"] == ["sha256"] for fk in foreign_keys):
+            with bind.begin() as conn:
+                conn.execute(text(
+                    "ALTER TABLE attachments ADD CONSTRAINT fk_attachments_sha256 "
+                    "FOREIGN KEY (sha256) REFERENCES blobs (sha256)"
+                ))
+    else:
+        _add_column(bind, "attachments", "sha256", "VARCHAR(64) REFERENCES blobs (sha256)")
+        _create_index(bind, "attachments", "ix_attachments_sha256", "sha256")
+    _add_column(bind, "attachments", "file_size", "INTEGER")
+
+
+def _message_thread_index(bind: Engine) -> None:
+    _create_index(bind, "messages", "ix_messages_issue_sent_id", "issue_id, sent_at, id")
+
+
+def _issue_list_versions(bind: Engine) -> None:
+    _create_tables(bind, "issue_list_versions")
+
+
+def _issue_stats(bind: Engine) -> None:
+    _create_tables(bind, "issue_stats")
+    ensure_issue_stats(bind)
+
+
+def _issue_version(bind: Engine) -> None:
+    # 既存の行は NULL のまま（アプリ側で 0 として扱う）
+    _add_column(bind, "issues", "version", "INTEGER")
+
+
+def _issue_code_counters(bind: Engine) -> None:
+    _create_tables(bind, "issue_code_counters")
+
+
+def _backfill_issue_version(bind: Engine) -> None:
+    # issues.version は ORM の version_id_col（UPDATE の WHERE に入る）なので NULL の行を残さない
+    with bind.begin() as conn:
+        conn.execute(text("UPDATE issues SET version = 1 WHERE version IS NULL"))
+
+
+def _blob_uploader(bind: Engine) -> None:
+    # 既存の未添付 blob はアップロード者が分からないので、スタッフ以外は読めなくなる（再アップロードで復帰）
+    _add_column(bind, "blobs", "uploaded_by", "INTEGER REFERENCES users (id)")
+
+
+MIGRATIONS: List[Migration] = [
+    Migration(1, "baseline schema", _baseline),
+    Migration(2, "issues keyset pagination indexes", _issue_list_keyset_indexes),
+    Migration(3, "blobs table, attachments.sha256 / file_size", _content_addressed_blobs),
+    Migration(4, "messages thread index", _message_thread_index),
+    Migration(5, "issue_list_versions table", _issue_list_versions),
+    Migration(6, "issue full-text search index", ensure_search_index),
+    Migration(7, "issue_stats summary table", _issue_stats),
+    Migration(8, "issues.version", _issue_version),
+    Migration(9, "issue_code_counters table", _issue_code_counters),
+    Migration(10, "backfill issues.version", _backfill_issue_version),
+    Migration(11, "blobs.uploaded_by", _blob_uploader),
+]
+
+SCHEMA_VERSION = MIGRATIONS[-1].version
+
+
+class SchemaOutOfDate(RuntimeError):
+    pass
+
+
+def current_version(bind: Engine = default_engine) -> Optional[int]:
+    """Highest applied migration, or None when the database has never been migrated."""
+    try:
+        with bind.connect() as conn:
+            return conn.execute(select(func.max(schema_migrations.c.version))).scalar() or 0
+    except Exception:
+        if schema_migrations.name not in inspect(bind).get_table_names():
+            return None
+        raise
+
+
+def check_schema(bind: Engine = default_engine) -> int:
+    """Cheap startup check: raise SchemaOutOfDate unless all migrations of this code are applied."""
+    version = current_version(bind)
+    if version is None or version < SCHEMA_VERSION:
+        raise SchemaOutOfDate(
+            f"Database schema is at version {version or 0}, this code needs {SCHEMA_VERSION}. "
+            "Run `python -m app.db.migrate` before starting the workers."
+        )
+    return version
+
+
+def _sqlite_lock_path(bind: Engine) -> str:
+    database = bind.url.database
+    if database and database != ":memory:":
+        return os.path.abspath(database) + ".migrate.lock"
+    return os.path.join(tempfile.gettempdir(), f"{LOCK_NAME}.lock")
+
+
+@contextmanager
+def migration_lock(bind: Engine = default_engine, timeout: float = 300) -> Iterator[None]:
+    """Hold a cross-process lock on the database while migrating / seeding."""
+    dialect = bind.dialect.name
+    if dialect == "mysql":
+        with bind.connect() as conn:
+            if conn.execute(text("SELECT GET_LOCK(:name, :timeout)"), {"name": LOCK_NAME, "timeout": int(timeout)}).scalar() != 1:
+                raise TimeoutError(f"Could not acquire the migration lock within {timeout:.0f}s")
+            try:
+                yield
+            finally:
+                conn.execute(text("SELECT RELEASE_LOCK(:name)"), {"name": LOCK_NAME})
+    elif dialect == "postgresql":
+        key = int.from_bytes(LOCK_NAME.encode("utf-8")[:8], "big") & 0x7FFFFFFFFFFFFFFF
+        with bind.connect() as conn:
+            deadline = time.monotonic() + timeout
+            while not conn.execute(text("SELECT pg_try_advisory_lock(:key)"), {"key": key}).scalar():
+                if time.monotonic() > deadline:
+                    raise TimeoutError(f"Could not acquire the migration lock within {timeout:.0f}s")
+                time.sleep(0.2)
+            try:
+                yield
+            finally:
+                conn.execute(text("SELECT pg_advisory_unlock(:key)"), {"key": key})
+    elif fcntl is not None:
+        with open(_sqlite_lock_path(bind), "a") as lock_file:
+            deadline = time.monotonic() + timeout
+            while True:
+                try:
+                    fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                    break
+                except BlockingIOError:
+                    if time.monotonic() > deadline:
+                        raise TimeoutError(f"Could not acquire the migration lock within {timeout:.0f}s")
+                    time.sleep(0.1)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+    else:
+        logger.warning("No cross-process lock available; run migrations from a single process")
+        yield
+
+
+def pending_migrations(bind: Engine = default_engine) -> List[Migration]:
+    version = current_version(bind) or 0
+    return [migration for migration in MIGRATIONS if migration.version > version]
+
+
+def migrate(bind: Engine = default_engine, lock_timeout: float = 300) -> List[Migration]:
+    """Apply pending migrations under the migration lock; returns what was applied."""
+    applied = []
+    with migration_lock(bind, lock_timeout):
+        _metadata.create_all(bind=bind)
+        # ロック待ちの間に他のプロセスが適用していれば、ここで何も残っていない
+        for migration in pending_migrations(bind):
+            started = time.perf_counter()
+            migration.apply(bind)
+            with bind.begin() as conn:
+                conn.execute(schema_migrations.insert().values(version=migration.version, name=migration.name))
+            logger.info(f"Applied migration {migration.version} ({migration.name}) in {time.perf_counter() - started:.1f}s")
+            applied.append(migration)
+    return applied
+
+
+def seed(bind: Engine = default_engine, lock_timeout: float = 300) -> None:
+    """Create the initial companies / users / sample issues if missing (idempotent)."""
+    with migration_lock(bind, lock_timeout):
+        db = SessionLocal(bind=bind)
+        try:
+            create_initial_data(db)
+        finally:
+            db.close()
+        # 集計テーブルは増分更新のため、既存データから一度だけ作る
+        ensure_issue_stats(bind)
+
+
+def main() -> None:
+    logging.basicConfig(level=logging.INFO)
+    parser = argparse.ArgumentParser(description="Apply schema migrations and seed initial data (once per deployment).")
+    parser.add_argument("command", nargs="?", default="all", choices=["all", "migrate", "seed", "status"])
+    parser.add_argument("--lock-timeout", type=float, default=300, help="seconds to wait for another migrating process")
+    args = parser.parse_args()
+
+    if args.command == "status":
+        version = current_version()
+        pending = pending_migrations()
+        print(f"schema version: {'not initialized' if version is None else version} (code expects {SCHEMA_VERSION})")
+        for migration in pending:
+            print(f"  pending {migration.version}: {migration.name}")
+        return
+
+    if args.command in ("all", "migrate"):
+        applied = migrate(lock_timeout=args.lock_timeout)
+        logger.info(f"Schema at version {SCHEMA_VERSION} ({len(applied)} migration(s) applied)")
+    if args.command in ("all", "seed"):
+        seed(lock_timeout=args.lock_timeout)
+        logger.info("Initial data ensured")
+
+
+if __name__ == "__main__":
+    main()
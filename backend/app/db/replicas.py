@@ -0,0 +1,176 @@
+import itertools
+import logging
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+from jose import jwt, JWTError
+
+from app.core.broker import broker
+from app.core.principal_cache import principal_cache
+
+# 読み取りレプリカへの振り分け（DATABASE_READ_URLS を設定した場合のみ有効）
+# 一覧・詳細・メッセージ取得などの読み取り専用エンドポイントは get_read_db / get_async_read_db で
+# レプリカのセッションを受け取ります。書き込みは従来どおり get_db（プライマリ）です。
+# レプリカは非同期に追従するため、本人が書き込んだ直後（DB_READ_AFTER_WRITE_SECONDS 秒間）は
+# その本人の読み取りをプライマリに送り、自分の変更が見えない状態を避けます。
+# 書き込みの記録はブローカー経由で同じホストの他のワーカーにも共有されます。
+# 接続できないレプリカは DB_REPLICA_RETRY_SECONDS 秒間外し、残りのレプリカ（全滅ならプライマリ）を使います。
+
+logger = logging.getLogger(__name__)
+
+WRITE_TOPIC = "db:writes"
+SAFE_METHODS = {"GET", "HEAD", "OPTIONS"}
+
+
+class RecentWriters:
+    """User ids that wrote within the last `window` seconds (reads from them go to the primary)."""
+
+    def __init__(self, window: float, max_entries: int = 10000):
+        self.window = window
+        self.max_entries = max_entries
+        self._until: Dict[int, float] = {}
+        self._lock = threading.Lock()
+
+    def record(self, user_id: int, until: Optional[float] = None) -> None:
+        until = until or time.time() + self.window
+        with self._lock:
+            if len(self._until) >= self.max_entries:
+                now = time.time()
+                self._until = {uid: t for uid, t in self._until.items() if t > now}
+            if until > self._until.get(user_id, 0):
+                self._until[user_id] = until
+
+    def wrote_recently(self, user_id: Optional[int]) -> bool:
+        if user_id is None:
+            return False
+        with self._lock:
+            until = self._until.get(user_id)
+        return until is not None and until > time.time()
+
+
+class ReplicaPool:
+    """
+    Picks a replica session factory per request: round-robin, or the replica with the
+    fewest sessions open from this worker ("least_connections").
+    """
+
+    def __init__(self, strategy: str = "round_robin", retry_after: float = 30.0):
+        self.strategy = strategy
+        self.retry_after = retry_after
+        self.names: List[str] = []
+        self.factories: List[Callable[[], Any]] = []
+        self._in_use: List[int] = []
+        self._down_until: List[float] = []
+        self._served: List[int] = []
+        self._round_robin = itertools.count()
+        self._lock = threading.Lock()
+        self.primary_fallbacks = 0
+
+    def __bool__(self) -> bool:
+        return bool(self.factories)
+
+    def add(self, name: str, factory: Callable[[], Any]) -> None:
+        self.names.append(name)
+        self.factories.append(factory)
+        self._in_use.append(0)
+        self._down_until.append(0.0)
+        self._served.append(0)
+
+    def acquire(self, prefer: Optional[int] = None) -> Optional[int]:
+        """
+        Index of the replica to use (counted as in use until release()), or None if all are down.
+        `prefer` pins the choice to a replica already used by the same request while it is up.
+        """
+        now = time.time()
+        with self._lock:
+            candidates = [i for i, until in enumerate(self._down_until) if until <= now]
+            if not candidates:
+                return None
+            if prefer in candidates:
+                index = prefer
+            elif self.strategy == "least_connections":
+                index = min(candidates, key=lambda i: (self._in_use[i], self._served[i]))
+            else:
+                index = candidates[next(self._round_robin) % len(candidates)]
+            self._in_use[index] += 1
+            self._served[index] += 1
+            return index
+
+    def release(self, index: int) -> None:
+        with self._lock:
+            self._in_use[index] -= 1
+
+    def mark_down(self, index: int, error: Exception) -> None:
+        logger.warning(f"Read replica {self.names[index]} unavailable for {self.retry_after:.0f}s: {error}")
+        with self._lock:
+            self._down_until[index] = time.time() + self.retry_after
+
+    def record_primary_fallback(self) -> None:
+        with self._lock:
+            self.primary_fallbacks += 1
+
+    def stats(self) -> Dict[str, Any]:
+        now = time.time()
+        with self._lock:
+            return {
+                "strategy": self.strategy,
+                "replicas": [
+                    {"name": name, "in_use": in_use, "served": served, "up": down_until <= now}
+                    for name, in_use, served, down_until in zip(self.names, self._in_use, self._served, self._down_until)
+                ],
+                "primary_fallbacks": self.primary_fallbacks,
+            }
+
+
+def user_id_from_authorization(value: Optional[str]) -> Optional[int]:
+    """User id of a bearer token, for routing only (the request itself has already been authenticated)."""
+    if not value or not value.lower().startswith("bearer "):
+        return None
+    token = value[7:].strip()
+    user_id = principal_cache.get_user_id(token)
+    if user_id is not None:
+        return user_id
+    try:
+        return int(jwt.get_unverified_claims(token).get("sub"))
+    except (JWTError, TypeError, ValueError):
+        return None
+
+
+def listen_for_writes(recent_writers: RecentWriters) -> None:
+    """Apply writes recorded by other workers. Call once per worker at startup (after fork)."""
+    def on_write(data: str) -> None:
+        user_id, until = data.split(":")
+        recent_writers.record(int(user_id), float(until))
+
+    broker.add_listener(WRITE_TOPIC, on_write)
+
+
+class ReadYourWritesMiddleware:
+    """Records users whose unsafe request (POST / PUT / PATCH / DELETE) succeeded."""
+
+    def __init__(self, app, recent_writers: RecentWriters):
+        self.app = app
+        self.recent_writers = recent_writers
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] in SAFE_METHODS:
+            await self.app(scope, receive, send)
+            return
+
+        async def send_wrapper(message):
+            # 応答を返す前に記録する（クライアントが直後に送る読み取りに間に合わせる）
+            if message["type"] == "http.response.start" and message["status"] < 400:
+                self._record(scope)
+            await send(message)
+
+        await self.app(scope, receive, send_wrapper)
+
+    def _record(self, scope) -> None:
+        headers = dict(scope.get("headers") or ())
+        user_id = user_id_from_authorization(headers.get(b"authorization", b"").decode("latin-1"))
+        if user_id is None:
+            return
+        until = time.time() + self.recent_writers.window
+        self.recent_writers.record(user_id, until)
+        broker.publish(WRITE_TOPIC, f"{user_id}:{until}")
@@ -0,0 +1,139 @@
+import logging
+from typing import List, Optional
+
+from sqlalchemy import inspect, text
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+
+# 課題の全文検索インデックス
+# SQLite: FTS5 仮想テーブル (trigram トークナイザ)、MySQL: FULLTEXT インデックス (ngram パーサ)。
+# どちらも日本語を分かち書きせずに検索できます。1課題 = 1ドキュメントで、
+# create_issue / update_issue から index_issue() を呼んで差分更新します。
+
+logger = logging.getLogger(__name__)
+
+SEARCH_TABLE = "issue_search"
+SEARCH_COLUMNS = ("title", "description", "product_name", "client_arbitrary_code", "ingredients")
+
+# trigram は 3 文字未満の語をインデックスで引けないので、短い語は部分一致で絞り込む
+_MIN_INDEXED_TERM = 3
+
+_SQLITE_DDL = f"""
+CREATE VIRTUAL TABLE {SEARCH_TABLE} USING fts5(
+    company_id UNINDEXED, {", ".join(SEARCH_COLUMNS)}, tokenize = 'trigram'
+)
+"""
+
+_MYSQL_DDL = f"""
+CREATE TABLE {SEARCH_TABLE} (
+    issue_id INT PRIMARY KEY,
+    company_id INT,
+    {", ".join(f"{col} TEXT" for col in SEARCH_COLUMNS)},
+    INDEX ix_issue_search_company (company_id),
+    FULLTEXT KEY ft_issue_search ({", ".join(SEARCH_COLUMNS)}) WITH PARSER ngram
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4
+"""
+
+
+def _doc_select(dialect: str, where: str) -> str:
+    if dialect == "mysql":
+        ingredients = "(SELECT GROUP_CONCAT(ing.name SEPARATOR ' ') FROM ingredients ing WHERE ing.issue_id = i.id)"
+    else:
+        ingredients = "(SELECT group_concat(ing.name, ' ') FROM ingredients ing WHERE ing.issue_id = i.id)"
+    return f"""
+        SELECT i.id, i.company_id, COALESCE(i.title, ''), COALESCE(i.description, ''),
+               COALESCE(i.product_name, ''), COALESCE(i.client_arbitrary_code, ''),
+               COALESCE({ingredients}, '')
+        FROM issues i {where}
+    """
+
+
+def _id_column(dialect: str) -> str:
+    return "issue_id" if dialect == "mysql" else "rowid"
+
+
+def _insert_docs(conn, dialect: str, where: str, params: dict) -> None:
+    columns = ", ".join((_id_column(dialect), "company_id") + SEARCH_COLUMNS)
+    conn.execute(text(f"INSERT INTO {SEARCH_TABLE} ({columns}) {_doc_select(dialect, where)}"), params)
+
+
+def ensure_search_index(engine: Engine) -> None:
+    """Create the search table if missing and index all existing issues."""
+    dialect = engine.dialect.name
+    if dialect not in ("sqlite", "mysql"):
+        logger.warning(f"Full-text search is not supported on {dialect}")
+        return
+    if SEARCH_TABLE in inspect(engine).get_table_names():
+        return
+    with engine.begin() as conn:
+        conn.execute(text(_SQLITE_DDL if dialect == "sqlite" else _MYSQL_DDL))
+        _insert_docs(conn, dialect, "", {})
+    logger.info("Created full-text search index")
+
+
+def index_issue(db: Session, issue_id: int) -> None:
+    """Refresh the search document of one issue (call before commit)."""
+    dialect = db.get_bind().dialect.name
+    if dialect not in ("sqlite", "mysql"):
+        return
+    db.flush()
+    db.execute(text(f"DELETE FROM {SEARCH_TABLE} WHERE {_id_column(dialect)} = :id"), {"id": issue_id})
+    _insert_docs(db, dialect, "WHERE i.id = :id", {"id": issue_id})
+
+
+def index_issues(db: Session, issue_ids: List[int]) -> None:
+    """Refresh the search documents of many issues with two statements (call before commit)."""
+    dialect = db.get_bind().dialect.name
+    if dialect not in ("sqlite", "mysql") or not issue_ids:
+        return
+    db.flush()
+    params = {f"id{n}": issue_id for n, issue_id in enumerate(issue_ids)}
+    placeholders = ", ".join(f":{name}" for name in params)
+    db.execute(text(f"DELETE FROM {SEARCH_TABLE} WHERE {_id_column(dialect)} IN ({placeholders})"), params)
+    _insert_docs(db, dialect, f"WHERE i.id IN ({placeholders})", params)
+
+
+def _quote(term: str) -> str:
+    return '"' + term.replace('"', '""') + '"'
+
+
+def search_issue_ids(db: Session, q: str, company_id: Optional[int], limit: int) -> List[int]:
+    """
+    Return matching issue ids, best match first. Every whitespace-separated term must match.
+    `company_id` restricts the search to one company (client users).
+    """
+    terms = [term for term in q.split() if term]
+    if not terms:
+        return []
+    dialect = db.get_bind().dialect.name
+    id_col = _id_column(dialect)
+    conditions = []
+    params = {"limit": limit}
+    order_by = f"{id_col} DESC"
+
+    if dialect == "mysql":
+        # ngram パーサなので 2 文字語もインデックスで引ける
+        params["q"] = " ".join("+" + _quote(term) for term in terms)
+        match = f"MATCH ({', '.join(SEARCH_COLUMNS)}) AGAINST (:q IN BOOLEAN MODE)"
+        conditions.append(match)
+        order_by = f"{match} DESC"
+    elif dialect == "sqlite":
+        long_terms = [term for term in terms if len(term) >= _MIN_INDEXED_TERM]
+        short_terms = [term for term in terms if len(term) < _MIN_INDEXED_TERM]
+        if long_terms:
+            params["q"] = " AND ".join(_quote(term) for term in long_terms)
+            conditions.append(f"{SEARCH_TABLE} MATCH :q")
+            order_by = f"bm25({SEARCH_TABLE})"
+        haystack = " || ' ' || ".join(SEARCH_COLUMNS)
+        for n, term in enumerate(short_terms):
+            params[f"t{n}"] = term
+            conditions.append(f"instr({haystack}, :t{n}) > 0")
+    else:
+        return []
+
+    if company_id is not None:
+        params["company_id"] = company_id
+        conditions.append("company_id = :company_id")
+
+    sql = f"SELECT {id_col} FROM {SEARCH_TABLE} WHERE {' AND '.join(conditions)} ORDER BY {order_by} LIMIT :limit"
+    return [row[0] for row in db.execute(text(sql), params)]
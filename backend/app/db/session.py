@@ -1,42 +1,80 @@
+from typing import Optional
 from sqlalchemy import create_engine
+from sqlalchemy.engine import make_url
+from sqlalchemy.exc import OperationalError
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 import os
+import ssl
 from dotenv import load_dotenv
 
+from app.core.metrics import instrument_engine, timed_pool_class
+from app.db.replicas import RecentWriters, ReplicaPool
+
 load_dotenv()
 
 # For local development, we'll use SQLite if DATABASE_URL is not set
 SQLALCHEMY_DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./sql_app.db")
 
-# MySQL用の追加設定
-connect_args = {}
-engine_kwargs = {}
+# 非同期 DB スタック（オプトイン）。USE_ASYNC_DB=true で有効化
+USE_ASYNC_DB = os.getenv("USE_ASYNC_DB", "false").lower() in ("1", "true", "yes")
+
+# リクエスト・SQL のメトリクス (/metrics) を記録するか
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "true").lower() in ("1", "true", "yes")
+
+# コネクションプール設定（同期・非同期エンジン共通）
+POOL_SETTINGS = {
+    "pool_pre_ping": os.getenv("DB_POOL_PRE_PING", "true").lower() in ("1", "true", "yes"),  # 接続を使用する前にpingして確認
+    "pool_recycle": int(os.getenv("DB_POOL_RECYCLE", "3600")),   # 1時間ごとに接続を再作成
+    "pool_size": int(os.getenv("DB_POOL_SIZE", "10")),           # コネクションプールのサイズ
+    "max_overflow": int(os.getenv("DB_MAX_OVERFLOW", "20")),     # プールが満杯時の追加接続数
+    "pool_timeout": int(os.getenv("DB_POOL_TIMEOUT", "30")),     # プールから接続を待つ最大秒数
+}
+
+# 読み取りレプリカ（任意）。カンマ区切りの接続URL。未設定なら読み取りもプライマリ
+DATABASE_READ_URLS = [url.strip() for url in os.getenv("DATABASE_READ_URLS", "").split(",") if url.strip()]
+DB_READ_STRATEGY = os.getenv("DB_READ_STRATEGY", "round_robin")  # round_robin / least_connections
+DB_READ_AFTER_WRITE_SECONDS = float(os.getenv("DB_READ_AFTER_WRITE_SECONDS", "5"))
+DB_REPLICA_RETRY_SECONDS = float(os.getenv("DB_REPLICA_RETRY_SECONDS", "30"))
 
-if "sqlite" in SQLALCHEMY_DATABASE_URL:
-    # SQLite用の設定
-    connect_args = {"check_same_thread": False}
-else:
+
+def sync_engine_options(url: str) -> dict:
+    if "sqlite" in url:
+        # SQLite用の設定
+        return {"connect_args": {"check_same_thread": False}}
     # MySQL用の設定
-    connect_args = {
-        "ssl_mode": "REQUIRED",  # SSL接続を必須にする
-        "ssl": {
-            "check_hostname": False,  # ホスト名検証を無効化（Azureの証明書の問題を回避）
-        }
-    }
-    engine_kwargs = {
-        "pool_pre_ping": True,  # 接続を使用する前にpingして確認
-        "pool_recycle": 3600,   # 1時間ごとに接続を再作成
-        "pool_size": 10,        # コネクションプールのサイズ
-        "max_overflow": 20,     # プールが満杯時の追加接続数
+    return {
+        "connect_args": {
+            "ssl_mode": "REQUIRED",  # SSL接続を必須にする
+            "ssl": {
+                "check_hostname": False,  # ホスト名検証を無効化（Azureの証明書の問題を回避）
+            }
+        },
+        **POOL_SETTINGS,
     }
 
+
+def metrics_engine_options(url: str, name: str) -> dict:
+    # プールからの接続取得の待ち時間を計測するプールクラス（/metrics 無効時は既定のまま）
+    return {"poolclass": timed_pool_class(url, name)} if METRICS_ENABLED else {}
+
+
 engine = create_engine(
-    SQLALCHEMY_DATABASE_URL, 
-    connect_args=connect_args,
-    **engine_kwargs
+    SQLALCHEMY_DATABASE_URL,
+    **sync_engine_options(SQLALCHEMY_DATABASE_URL),
+    **metrics_engine_options(SQLALCHEMY_DATABASE_URL, "sync"),
 )
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+if METRICS_ENABLED:
+    instrument_engine(engine)
+
+recent_writers = RecentWriters(window=DB_READ_AFTER_WRITE_SECONDS)
+read_replicas = ReplicaPool(strategy=DB_READ_STRATEGY, retry_after=DB_REPLICA_RETRY_SECONDS)
+for _index, _url in enumerate(DATABASE_READ_URLS):
+    _replica_engine = create_engine(_url, **sync_engine_options(_url), **metrics_engine_options(_url, f"replica{_index}"))
+    read_replicas.add(f"replica{_index}", sessionmaker(autocommit=False, autoflush=False, bind=_replica_engine))
+    if METRICS_ENABLED:
+        instrument_engine(_replica_engine, f"replica{_index}")
 
 Base = declarative_base()
 
@@ -47,3 +85,133 @@ def get_db():
     finally:
         db.close()
 
+def open_read_session(user_id: Optional[int], prefer: Optional[int] = None):
+    """
+    Session for a read-only request: a replica, or the primary when no replica is
+    configured / reachable or the user has just written. Returns (session, replica index or None).
+    Pass `prefer` to read from the same replica as another session of the request.
+    """
+    if read_replicas and not recent_writers.wrote_recently(user_id):
+        while True:
+            index = read_replicas.acquire(prefer)
+            if index is None:
+                break
+            db = read_replicas.factories[index]()
+            try:
+                db.connection()  # 接続できないレプリカはここで外す
+                return db, index
+            except OperationalError as e:
+                db.close()
+                read_replicas.release(index)
+                read_replicas.mark_down(index, e)
+        read_replicas.record_primary_fallback()
+    return SessionLocal(), None
+
+def close_read_session(db, index: Optional[int]) -> None:
+    db.close()
+    if index is not None:
+        read_replicas.release(index)
+
+def get_read_db_for(user_id: Optional[int]):
+    db, index = open_read_session(user_id)
+    try:
+        yield db
+    finally:
+        close_read_session(db, index)
+
+
+def async_driver_url(url: str) -> str:
+    """Map a sync database URL onto its async driver (aiosqlite / aiomysql)."""
+    parsed = make_url(url)
+    if parsed.get_backend_name() == "sqlite":
+        return parsed.set(drivername="sqlite+aiosqlite").render_as_string(hide_password=False)
+    if parsed.get_backend_name() == "mysql":
+        return parsed.set(drivername="mysql+aiomysql").render_as_string(hide_password=False)
+    raise ValueError(f"Async engine is not supported for {parsed.get_backend_name()}")
+
+
+def get_async_database_url(url: str) -> str:
+    """
+    Map the sync DATABASE_URL onto its async driver (aiosqlite / aiomysql).
+    ASYNC_DATABASE_URL overrides the derived value.
+    """
+    override = os.getenv("ASYNC_DATABASE_URL")
+    if override:
+        return override
+    return async_driver_url(url)
+
+
+def async_engine_options(url: str) -> dict:
+    if "sqlite" in url:
+        return {"connect_args": {"check_same_thread": False}}
+    # aiomysql は SSLContext を受け取る（ssl_mode=REQUIRED 相当：暗号化のみ、証明書検証なし）
+    ssl_context = ssl.create_default_context()
+    ssl_context.check_hostname = False
+    ssl_context.verify_mode = ssl.CERT_NONE
+    return {"connect_args": {"ssl": ssl_context}, **POOL_SETTINGS}
+
+
+async_engine = None
+AsyncSessionLocal = None
+async_read_replicas = ReplicaPool(strategy=DB_READ_STRATEGY, retry_after=DB_REPLICA_RETRY_SECONDS)
+
+if USE_ASYNC_DB:
+    from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+    ASYNC_DATABASE_URL = get_async_database_url(SQLALCHEMY_DATABASE_URL)
+    async_engine = create_async_engine(
+        ASYNC_DATABASE_URL,
+        **async_engine_options(ASYNC_DATABASE_URL),
+        **metrics_engine_options(ASYNC_DATABASE_URL, "async"),
+    )
+    AsyncSessionLocal = async_sessionmaker(
+        async_engine, class_=AsyncSession, autoflush=False, expire_on_commit=False
+    )
+    if METRICS_ENABLED:
+        instrument_engine(async_engine.sync_engine, "async")
+
+    for _index, _url in enumerate(DATABASE_READ_URLS):
+        _async_url = async_driver_url(_url)
+        _replica_engine = create_async_engine(
+            _async_url, **async_engine_options(_async_url), **metrics_engine_options(_async_url, f"async-replica{_index}")
+        )
+        async_read_replicas.add(
+            f"replica{_index}",
+            async_sessionmaker(_replica_engine, class_=AsyncSession, autoflush=False, expire_on_commit=False),
+        )
+        if METRICS_ENABLED:
+            instrument_engine(_replica_engine.sync_engine, f"async-replica{_index}")
+
+
+async def get_async_db():
+    if AsyncSessionLocal is None:
+        raise RuntimeError("Async DB is disabled. Set USE_ASYNC_DB=true to enable it.")
+    async with AsyncSessionLocal() as db:
+        yield db
+
+
+async def get_async_read_db_for(user_id: Optional[int]):
+    if AsyncSessionLocal is None:
+        raise RuntimeError("Async DB is disabled. Set USE_ASYNC_DB=true to enable it.")
+    if async_read_replicas and not recent_writers.wrote_recently(user_id):
+        while True:
+            index = async_read_replicas.acquire()
+            if index is None:
+                break
+            db = async_read_replicas.factories[index]()
+            try:
+                await db.connection()  # 接続できないレプリカはここで外す
+            except OperationalError as e:
+                await db.close()
+                async_read_replicas.release(index)
+                async_read_replicas.mark_down(index, e)
+                continue
+            try:
+                yield db
+            finally:
+                await db.close()
+                async_read_replicas.release(index)
+            return
+        async_read_replicas.record_primary_fallback()
+    async with AsyncSessionLocal() as db:
+        yield db
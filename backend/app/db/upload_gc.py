@@ -0,0 +1,232 @@
+import argparse
+import logging
+import os
+import re
+import time
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from sqlalchemy import delete, func, select
+from sqlalchemy.orm import Session
+
+from app.core import storage
+from app.core.config import settings
+from app.core.previews import PREVIEW_SUFFIX
+from app.db.session import SessionLocal
+from app.models.issue import Attachment, Blob
+import app.models.user  # noqa: F401 - registers Company / User for the Issue relationships (needed when run as a CLI)
+
+# uploads/ の不要ファイル掃除 (`python -m app.db.upload_gc`)
+# アップロード後に課題へ添付されなかったファイルや、添付から外されて参照数 0 になった blob を、
+# 猶予期間 (UPLOAD_GC_GRACE_HOURS) を過ぎてから削除します。
+# ディレクトリは os.scandir で順に読み、DB 照会は BATCH 件ずつの IN 句で行うため、
+# ファイル数・添付数が多くてもメモリ使用量は一定です。cron 等で定期実行してください。
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+_BLOB_FILE_RE = re.compile(r"^(?P<sha>[0-9a-f]{64})(?P<suffix>\.[a-z0-9]+)(?P<derived>\.gz|)$")
+_PREVIEW_FILE_RE = re.compile(r"^(?P<sha>[0-9a-f]{64})" + re.escape(PREVIEW_SUFFIX) + r"$")
+_TEMP_FILE_RE = re.compile(r"(^\.upload-.*\.part$|\.tmp$)")
+
+
+@dataclass
+class GcReport:
+    dry_run: bool
+    scanned_files: int = 0
+    deleted_files: int = 0
+    reclaimed_bytes: int = 0
+    deleted_blob_rows: int = 0
+    deleted_by_kind: Dict[str, int] = field(default_factory=dict)
+
+    def record(self, kind: str, size: int) -> None:
+        self.deleted_files += 1
+        self.reclaimed_bytes += size
+        self.deleted_by_kind[kind] = self.deleted_by_kind.get(kind, 0) + 1
+
+
+def _scan_files(root: str) -> Iterator[os.DirEntry]:
+    """Walk `root` depth-first with os.scandir, yielding regular files one at a time."""
+    try:
+        with os.scandir(root) as entries:
+            for entry in entries:
+                if entry.is_dir(follow_symlinks=False):
+                    yield from _scan_files(entry.path)
+                elif entry.is_file(follow_symlinks=False):
+                    yield entry
+    except FileNotFoundError:
+        return
+
+
+def _batched(entries: Iterator, size: int) -> Iterator[List]:
+    batch: List = []
+    for entry in entries:
+        batch.append(entry)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+class UploadGarbageCollector:
+    def __init__(self, db: Session, grace: timedelta, batch_size: int, dry_run: bool):
+        self.db = db
+        self.batch_size = max(1, batch_size)
+        self.report = GcReport(dry_run=dry_run)
+        self.file_cutoff = time.time() - grace.total_seconds()
+        # blobs.updated_at は DB のタイムゾーンで記録されるので、基準時刻も DB から取る
+        self.row_cutoff: datetime = db.execute(select(func.now())).scalar() - grace
+
+    def _remove(self, entry: os.DirEntry, kind: str) -> None:
+        size = entry.stat(follow_symlinks=False).st_size
+        if not self.report.dry_run:
+            try:
+                os.remove(entry.path)
+            except FileNotFoundError:
+                return
+        self.report.record(kind, size)
+
+    def _is_old(self, entry: os.DirEntry) -> bool:
+        return entry.stat(follow_symlinks=False).st_mtime < self.file_cutoff
+
+    # --- blobs/ (content-addressed files and their previews / gzip variants) ---
+
+    def _referenced_shas(self, shas: List[str]) -> Tuple[Dict[str, Blob], set]:
+        rows = {
+            blob.sha256: blob
+            for blob in self.db.execute(select(Blob).where(Blob.sha256.in_(shas))).scalars()
+        }
+        attached = set(
+            self.db.execute(select(Attachment.sha256).where(Attachment.sha256.in_(shas)).distinct()).scalars()
+        )
+        return rows, attached
+
+    def _collect_blob_batch(self, entries: List[os.DirEntry]) -> None:
+        parsed = []
+        for entry in entries:
+            match = _BLOB_FILE_RE.match(entry.name) or _PREVIEW_FILE_RE.match(entry.name)
+            if match:
+                parsed.append((entry, match))
+            elif _TEMP_FILE_RE.search(entry.name) and self._is_old(entry):
+                self._remove(entry, "temp")
+        if not parsed:
+            return
+        rows, attached = self._referenced_shas(list({match.group("sha") for _, match in parsed}))
+        for entry, match in parsed:
+            sha = match.group("sha")
+            blob = rows.get(sha)
+            if sha in attached or (blob is not None and blob.ref_count > 0) or not self._is_old(entry):
+                continue
+            if blob is not None and blob.updated_at is not None and blob.updated_at > self.row_cutoff:
+                continue  # 添付から外されたばかり
+            is_original = "suffix" in match.groupdict() and not match.group("derived")
+            if is_original and blob is not None and not self._delete_blob_row(sha):
+                continue  # 掃除中に再び添付された
+            self._remove(entry, "blob" if is_original else "derived")
+        self.db.commit()
+
+    def _delete_blob_row(self, sha: str) -> bool:
+        if self.report.dry_run:
+            return True
+        # 参照数 0 のままの場合だけ消す（同時に添付されたら残す）
+        result = self.db.execute(delete(Blob).where(Blob.sha256 == sha, Blob.ref_count <= 0))
+        self.report.deleted_blob_rows += result.rowcount
+        return result.rowcount == 1
+
+    # --- files directly under uploads/ (uuid-named uploads from before content addressing) ---
+
+    def _collect_legacy_batch(self, entries: List[os.DirEntry]) -> None:
+        candidates = [entry for entry in entries if self._is_old(entry)]
+        if not candidates:
+            return
+        paths = [f"/static/{entry.name}" for entry in candidates]
+        referenced = set(
+            self.db.execute(select(Attachment.file_path).where(Attachment.file_path.in_(paths)).distinct()).scalars()
+        )
+        for entry, path in zip(candidates, paths):
+            if path not in referenced:
+                self._remove(entry, "temp" if _TEMP_FILE_RE.search(entry.name) else "legacy")
+
+    def _top_level_files(self) -> Iterator[os.DirEntry]:
+        try:
+            with os.scandir(storage.UPLOAD_DIR) as entries:
+                for entry in entries:
+                    if entry.is_file(follow_symlinks=False):
+                        yield entry
+        except FileNotFoundError:
+            return
+
+    # --- blob rows whose file is already gone ---
+
+    def _collect_missing_blob_rows(self) -> None:
+        last_sha = ""
+        while True:
+            blobs = self.db.execute(
+                select(Blob)
+                .where(Blob.ref_count <= 0, Blob.sha256 > last_sha)
+                .order_by(Blob.sha256)
+                .limit(self.batch_size)
+            ).scalars().all()
+            if not blobs:
+                return
+            last_sha = blobs[-1].sha256
+            for blob in blobs:
+                if os.path.exists(storage.blob_disk_path(blob.sha256, blob.file_ext)):
+                    continue
+                if blob.updated_at is not None and blob.updated_at > self.row_cutoff:
+                    continue
+                if not self.report.dry_run:
+                    self._delete_blob_row(blob.sha256)
+            self.db.commit()
+            self.db.expunge_all()
+
+    def run(self) -> GcReport:
+        blob_root = os.path.join(storage.UPLOAD_DIR, storage.BLOB_DIR)
+        for batch in _batched(_scan_files(blob_root), self.batch_size):
+            self.report.scanned_files += len(batch)
+            self._collect_blob_batch(batch)
+            self.db.expunge_all()
+        for batch in _batched(self._top_level_files(), self.batch_size):
+            self.report.scanned_files += len(batch)
+            self._collect_legacy_batch(batch)
+        self._collect_missing_blob_rows()
+        return self.report
+
+
+def collect_garbage(
+    grace_hours: Optional[float] = None,
+    batch_size: int = 500,
+    dry_run: bool = False,
+) -> GcReport:
+    """Delete unreferenced upload files older than the grace period and return what was reclaimed."""
+    if grace_hours is None:
+        grace_hours = settings.UPLOAD_GC_GRACE_HOURS
+    db = SessionLocal()
+    try:
+        return UploadGarbageCollector(db, timedelta(hours=grace_hours), batch_size, dry_run).run()
+    finally:
+        db.close()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Delete unreferenced files under UPLOAD_DIR.")
+    parser.add_argument("--grace-hours", type=float, default=settings.UPLOAD_GC_GRACE_HOURS,
+                        help="only delete files untouched for this long (default: UPLOAD_GC_GRACE_HOURS)")
+    parser.add_argument("--batch-size", type=int, default=500, help="files checked per DB query")
+    parser.add_argument("--dry-run", action="store_true", help="report what would be deleted without deleting")
+    args = parser.parse_args()
+
+    logger.info(f"Sweeping {storage.UPLOAD_DIR} (grace {args.grace_hours}h{', dry run' if args.dry_run else ''})")
+    report = collect_garbage(args.grace_hours, args.batch_size, args.dry_run)
+    logger.info(
+        f"Scanned {report.scanned_files} files, "
+        f"{'would delete' if report.dry_run else 'deleted'} {report.deleted_files} "
+        f"({report.reclaimed_bytes / (1024 * 1024):.1f} MB, {report.deleted_by_kind}), "
+        f"removed {report.deleted_blob_rows} blob rows"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,39 @@
+from typing import Any, Dict, List
+
+from sqlalchemy import update
+from sqlalchemy.dialects.mysql import insert as mysql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.orm import Session
+
+# カウンタ行の「なければ作成・あれば加算」を 1 文で行うヘルパー
+# SQLite は INSERT ... ON CONFLICT DO UPDATE、MySQL は INSERT ... ON DUPLICATE KEY UPDATE を使うため、
+# 複数ワーカーから同時に加算しても値を失いません。
+
+
+def upsert_increment(db: Session, model: Any, rows: List[Dict[str, Any]], column: str, amount: int = 1) -> None:
+    """
+    For each row (primary-key values), insert it with `column` = amount,
+    or add `amount` to `column` if the row already exists.
+    """
+    if not rows:
+        return
+    table = model.__table__
+    counter = table.c[column]
+    dialect = db.get_bind().dialect.name
+    values = [{**row, column: amount} for row in rows]
+
+    if dialect == "sqlite":
+        pk_columns = [col.name for col in table.primary_key.columns]
+        stmt = sqlite_insert(table).values(values)
+        stmt = stmt.on_conflict_do_update(index_elements=pk_columns, set_={column: counter + amount})
+        db.execute(stmt)
+    elif dialect == "mysql":
+        stmt = mysql_insert(table).values(values)
+        stmt = stmt.on_duplicate_key_update({column: counter + amount})
+        db.execute(stmt)
+    else:
+        for row in rows:
+            conditions = [table.c[key] == value for key, value in row.items()]
+            result = db.execute(update(table).where(*conditions).values({column: counter + amount}))
+            if result.rowcount == 0:
+                db.execute(table.insert().values({**row, column: amount}))
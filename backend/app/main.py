@@ -1,9 +1,19 @@
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.staticfiles import StaticFiles
+from fastapi.responses import PlainTextResponse
 from app.db.init_db import init_db
 from app.api.v1.api import api_router
+from app.api.v1.endpoints import static_files
+from app.api.v1.endpoints.issues import issue_list_cache
 from app.core.config import settings
+from app.core.pagination import NEXT_CURSOR_HEADER
+from app.core.principal_cache import principal_cache
+from app.core.auth_executor import auth_executor
+from app.core.previews import preview_worker
+from app.core.metrics import MetricsMiddleware, registry as metrics_registry
+from app.core.responses import FastJSONResponse
+from app.db.session import METRICS_ENABLED, async_read_replicas, read_replicas, recent_writers
+from app.db.replicas import ReadYourWritesMiddleware, listen_for_writes
 import os
 import logging
 
@@ -11,7 +21,7 @@ import logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-app = FastAPI(title=settings.PROJECT_NAME, version="1.0")
+app = FastAPI(title=settings.PROJECT_NAME, version="1.0", default_response_class=FastJSONResponse)
 
 # CORS Configuration - 緊急対応: 全オリジン許可・クレデンシャルなし
 # ブラウザからのリクエストで Access-Control-Allow-Origin: * を返す
@@ -22,19 +32,29 @@ app.add_middleware(
     allow_credentials=False,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[NEXT_CURSOR_HEADER, "ETag", "Content-Range", "Accept-Ranges"],  # カーソル・ETag をフロントから読めるようにする
 )
 logger.info("CORS middleware added (allow_origins='*', allow_credentials=False)")
 
-# Mount uploads directory to /static
-if not os.path.exists("uploads"):
-    os.makedirs("uploads")
-app.mount("/static", StaticFiles(directory="uploads"), name="static")
+if METRICS_ENABLED:
+    app.add_middleware(MetricsMiddleware)
+
+# 読み取りレプリカ使用時は、書き込んだユーザーの直後の読み取りをプライマリに回す
+if read_replicas or async_read_replicas:
+    app.add_middleware(ReadYourWritesMiddleware, recent_writers=recent_writers)
+
+# Serve uploads under /static (authorized, long-lived caching for content-addressed files)
+if not os.path.exists(settings.UPLOAD_DIR):
+    os.makedirs(settings.UPLOAD_DIR)
+app.include_router(static_files.router, prefix="/static", tags=["static"])
 
 @app.on_event("startup")
 def on_startup():
     logger.info("Starting up... Calling init_db()")
     init_db()
     logger.info("init_db() called.")
+    if read_replicas or async_read_replicas:
+        listen_for_writes(recent_writers)
 
 app.include_router(api_router, prefix=settings.API_V1_STR)
 
@@ -42,6 +62,19 @@ app.include_router(api_router, prefix=settings.API_V1_STR)
 def read_root():
     return {"message": "Hello World from FastAPI"}
 
+@app.get("/metrics", include_in_schema=False)
+def read_metrics():
+    # Prometheus text exposition format (per worker process)
+    return PlainTextResponse(metrics_registry.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
 @app.get("/health")
 def health_check():
-    return {"status": "ok"}
+    return {
+        "status": "ok",
+        "auth_cache": principal_cache.stats(),
+        "auth_executor": auth_executor.stats(),
+        "issue_list_cache": issue_list_cache.stats(),
+        "previews": preview_worker.stats(),
+        "read_replicas": read_replicas.stats(),
+        "async_read_replicas": async_read_replicas.stats(),
+    }
@@ -1,4 +1,5 @@
-from sqlalchemy import Boolean, Column, ForeignKey, Integer, String, Text, DateTime, Date, Enum as SQLEnum
+from sqlalchemy import Boolean, Column, ForeignKey, Integer, String, Text, DateTime, Date, Index, Enum as SQLEnum
+from sqlalchemy.dialects import sqlite
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from app.db.session import Base
@@ -23,8 +24,19 @@ class Urgency(str, enum.Enum):
     MIDDLE = "middle"
     LOW = "low"
 
+# SQLite では server_default の CURRENT_TIMESTAMP がマイクロ秒なしの文字列で保存されるため、
+# バインドするパラメータも同じ形式に揃えないとカーソル比較 (created_at, id) がずれる
+CursorDateTime = DateTime(timezone=True).with_variant(
+    sqlite.DATETIME(truncate_microseconds=True), "sqlite"
+)
+
 class Issue(Base):
     __tablename__ = "issues"
+    __table_args__ = (
+        # キーセットページネーション用 (read_issues)
+        Index("ix_issues_company_created_id", "company_id", "created_at", "id"),
+        Index("ix_issues_created_id", "created_at", "id"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     issue_code = Column(String(255), unique=True, index=True) # e.g. REQ-2025-0001
@@ -48,8 +60,13 @@ class Issue(Base):
     is_sample_provided = Column(Boolean, default=False)
     sample_shipping_info = Column(Text, nullable=True)
     
-    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    created_at = Column(CursorDateTime, server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now(), server_default=func.now())
+    # 内容が変わる更新ごとに +1 (ETag / If-Match 用)。既存 DB への追加カラムのため NULL 許容
+    version = Column(Integer, nullable=True, default=1)
+
+    # UPDATE は WHERE version = <読み込んだ値> 付きで発行される（値の更新は update_issue が行う）
+    __mapper_args__ = {"version_id_col": version, "version_id_generator": False}
 
     # Relationships
     company = relationship("Company", back_populates="issues")
@@ -76,6 +93,10 @@ class Ingredient(Base):
 
 class Message(Base):
     __tablename__ = "messages"
+    __table_args__ = (
+        # スレッド単位の取得・差分取得・ETag 計算用 (read_messages)
+        Index("ix_messages_issue_sent_id", "issue_id", "sent_at", "id"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     issue_id = Column(Integer, ForeignKey("issues.id"))
@@ -115,6 +136,19 @@ class AdditionalQuestion(Base):
     issue = relationship("Issue", back_populates="additional_questions")
 
 
+class Blob(Base):
+    """Content-addressed file under uploads/blobs/, shared by every Attachment with the same SHA-256."""
+    __tablename__ = "blobs"
+
+    sha256 = Column(String(64), primary_key=True)
+    size = Column(Integer)
+    file_ext = Column(String(16)) # e.g. ".pdf"
+    ref_count = Column(Integer, default=0, nullable=False) # Number of Attachment rows pointing here
+    uploaded_by = Column(Integer, ForeignKey("users.id"), nullable=True) # Last user who uploaded the content; may read it while unattached
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    updated_at = Column(DateTime(timezone=True), onupdate=func.now(), server_default=func.now())
+
+
 class Attachment(Base):
     __tablename__ = "attachments"
 
@@ -123,6 +157,44 @@ class Attachment(Base):
     file_name = Column(String(255))
     file_path = Column(String(500)) # Stored path or URL
     file_type = Column(String(100), nullable=True) # MIME type
+    sha256 = Column(String(64), ForeignKey("blobs.sha256"), nullable=True, index=True) # Null for legacy uuid uploads
+    file_size = Column(Integer, nullable=True)
     uploaded_at = Column(DateTime(timezone=True), server_default=func.now())
 
     issue = relationship("Issue", back_populates="attachments")
+
+
+class IssueCodeCounter(Base):
+    """
+    Last reserved issue-code number per scope ("2025" or "2025:<company_id>").
+    Workers reserve numbers from here in blocks (see app.db.issue_codes).
+    """
+    __tablename__ = "issue_code_counters"
+
+    scope = Column(String(64), primary_key=True)
+    last_value = Column(Integer, default=0, nullable=False)
+
+
+class IssueListVersion(Base):
+    """
+    Per-scope change counter for the issue list ("all" and "company:<id>").
+    Bumped in the same transaction as issue writes; used to validate list caches / ETags.
+    """
+    __tablename__ = "issue_list_versions"
+
+    scope = Column(String(64), primary_key=True)
+    version = Column(Integer, default=0, nullable=False)
+
+
+class IssueStat(Base):
+    """
+    Issue counts per (company, status, ball holder, urgency) for the dashboard.
+    Maintained incrementally by create_issue / update_issue; rebuild with `python -m app.db.issue_stats`.
+    """
+    __tablename__ = "issue_stats"
+
+    company_id = Column(Integer, primary_key=True, autoincrement=False) # 0 when the issue has no company
+    status = Column(SQLEnum(IssueStatus), primary_key=True)
+    ball_holder = Column(SQLEnum(BallHolder), primary_key=True)
+    urgency = Column(SQLEnum(Urgency), primary_key=True)
+    count = Column(Integer, default=0, nullable=False)
@@ -0,0 +1,16 @@
+import os
+import tempfile
+
+# 性能計測用ツール（クエリ数バジェット・ベンチマーク）
+# app.db.session は import 時に DATABASE_URL からエンジンを作るため、
+# 各 CLI は use_scratch_database() を呼んでから app のモジュールを import します。
+
+
+def use_scratch_database(directory: str = None) -> str:
+    """Point DATABASE_URL / UPLOAD_DIR at a throwaway SQLite database unless DATABASE_URL is already set."""
+    directory = directory or tempfile.mkdtemp(prefix="unitec-perf-")
+    os.makedirs(directory, exist_ok=True)
+    os.environ.setdefault("DATABASE_URL", f"sqlite:///{os.path.join(directory, 'perf.db')}")
+    os.environ.setdefault("UPLOAD_DIR", os.path.join(directory, "uploads"))
+    os.environ.setdefault("DB_MIGRATE_ON_STARTUP", "true")
+    return directory
@@ -0,0 +1,270 @@
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import sys
+import time
+from dataclasses import asdict, dataclass
+from datetime import datetime, timezone
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from app.perf import use_scratch_database
+
+# エンドポイントのベンチマーク (`python -m app.perf.bench`)
+# 合成データ（会社数・課題数・メッセージ数を指定、数百万件のメッセージまで可）を SQLite に一括投入し、
+# ASGI アプリをプロセス内で（httpx.ASGITransport 経由、ネットワークなし）叩いて
+# シナリオごとの p50/p95/p99 レイテンシとスループットを表示します。
+# --save-baseline で結果を JSON に保存し、--compare でその JSON と比べて p95 が --tolerance 以上
+# 悪化したシナリオがあれば終了コード 1 を返します。
+# 大きなデータを何度も使う場合は --data-dir を指定すると 2 回目以降は投入を省略します。
+#
+#   python -m app.perf.bench --companies 50 --issues-per-company 200 --messages-per-issue 100 \
+#       --data-dir /tmp/unitec-bench --save-baseline perf-baseline.json
+
+
+@dataclass
+class ScenarioResult:
+    name: str
+    requests: int
+    errors: int
+    seconds: float
+    mean_ms: float
+    p50_ms: float
+    p95_ms: float
+    p99_ms: float
+
+    @property
+    def throughput(self) -> float:
+        return self.requests / self.seconds if self.seconds else 0.0
+
+
+def percentile(sorted_values: List[float], pct: float) -> float:
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, -(-len(sorted_values) * pct // 100))  # ceil
+    return sorted_values[int(rank) - 1]
+
+
+def summarize(name: str, latencies: List[float], errors: int, seconds: float) -> ScenarioResult:
+    ordered = sorted(latencies)
+    return ScenarioResult(
+        name=name,
+        requests=len(ordered),
+        errors=errors,
+        seconds=seconds,
+        mean_ms=sum(ordered) / len(ordered) * 1000 if ordered else 0.0,
+        p50_ms=percentile(ordered, 50) * 1000,
+        p95_ms=percentile(ordered, 95) * 1000,
+        p99_ms=percentile(ordered, 99) * 1000,
+    )
+
+
+async def run_scenario(
+    name: str,
+    call: Callable[[int], Awaitable[Any]],
+    requests: int,
+    concurrency: int,
+) -> ScenarioResult:
+    """Issue `requests` calls with up to `concurrency` in flight; `call(n)` returns an httpx.Response."""
+    latencies: List[float] = []
+    errors = 0
+    counter = iter(range(requests))
+
+    async def worker() -> None:
+        nonlocal errors
+        for n in counter:
+            started = time.perf_counter()
+            response = await call(n)
+            latencies.append(time.perf_counter() - started)
+            if response.status_code >= 400:
+                errors += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(max(1, concurrency))))
+    return summarize(name, latencies, errors, time.perf_counter() - started)
+
+
+def print_results(results: List[ScenarioResult], baseline: Optional[Dict[str, dict]] = None) -> None:
+    header = f"{'scenario':<16}{'reqs':>7}{'errors':>7}{'req/s':>9}{'mean':>9}{'p50':>9}{'p95':>9}{'p99':>9}"
+    if baseline:
+        header += f"{'p95 vs base':>13}"
+    print(header + "   (latency in ms)")
+    for result in results:
+        line = (
+            f"{result.name:<16}{result.requests:>7}{result.errors:>7}{result.throughput:>9.1f}"
+            f"{result.mean_ms:>9.2f}{result.p50_ms:>9.2f}{result.p95_ms:>9.2f}{result.p99_ms:>9.2f}"
+        )
+        base = (baseline or {}).get(result.name)
+        if base and base.get("p95_ms"):
+            line += f"{(result.p95_ms / base['p95_ms'] - 1) * 100:>+12.1f}%"
+        print(line)
+
+
+def regressions(results: List[ScenarioResult], baseline: Dict[str, dict], tolerance: float) -> List[str]:
+    slower = []
+    for result in results:
+        base = baseline.get(result.name)
+        if base and base.get("p95_ms") and result.p95_ms > base["p95_ms"] * (1 + tolerance):
+            slower.append(result.name)
+    return slower
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark the main API endpoints in-process against seeded SQLite data.")
+    parser.add_argument("--companies", type=int, default=10)
+    parser.add_argument("--users-per-company", type=int, default=3)
+    parser.add_argument("--issues-per-company", type=int, default=50)
+    parser.add_argument("--ingredients-per-issue", type=int, default=3)
+    parser.add_argument("--attachments-per-issue", type=int, default=1)
+    parser.add_argument("--messages-per-issue", type=int, default=20)
+    parser.add_argument("--requests", type=int, default=200, help="requests per scenario")
+    parser.add_argument("--login-requests", type=int, default=20, help="requests for the login scenario (bcrypt bound)")
+    parser.add_argument("--concurrency", type=int, default=8, help="requests in flight at once")
+    parser.add_argument("--data-dir", help="keep the SQLite database here and reuse it on later runs")
+    parser.add_argument("--save-baseline", metavar="PATH", help="write the results as JSON")
+    parser.add_argument("--compare", metavar="PATH", help="compare with a saved baseline")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="allowed p95 slowdown vs the baseline (0.25 = 25%%)")
+    parser.add_argument("--seed", type=int, default=1, help="random seed for picking users and issues")
+    args = parser.parse_args()
+
+    use_scratch_database(args.data_dir)
+    os.environ.setdefault("METRICS_ENABLED", "false")
+
+    import httpx
+    import sqlalchemy
+
+    from app.main import app
+    from app.db.session import SessionLocal
+    from app.perf.seed import PERF_PASSWORD, SeedSpec, load_seeded, seed
+
+    spec = SeedSpec(
+        companies=args.companies,
+        users_per_company=args.users_per_company,
+        issues_per_company=args.issues_per_company,
+        ingredients_per_issue=args.ingredients_per_issue,
+        attachments_per_issue=args.attachments_per_issue,
+        messages_per_issue=args.messages_per_issue,
+    )
+    rng = random.Random(args.seed)
+
+    async def run() -> List[ScenarioResult]:
+        # ASGITransport は lifespan を実行しないので、起動処理（init_db）はここで呼ぶ
+        await app.router.startup()
+        db = SessionLocal()
+        try:
+            companies = load_seeded(db)
+            if companies:
+                print(f"Reusing {len(companies)} seeded companies in {os.environ['DATABASE_URL']}")
+            else:
+                started = time.perf_counter()
+                companies = seed(db, spec, progress=print)
+                print(f"Seeding took {time.perf_counter() - started:.1f}s")
+        finally:
+            db.close()
+        companies = [company for company in companies if company.issue_ids]
+        if not companies:
+            raise SystemExit("No seeded issues to benchmark (use --issues-per-company > 0)")
+
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+            api = "/api/v1"
+
+            async def login(email: str) -> httpx.Response:
+                return await client.post(
+                    f"{api}/auth/login/access-token", data={"username": email, "password": PERF_PASSWORD}
+                )
+
+            # 各社の先頭ユーザーのトークンを用意（ログインそのものは login シナリオで計測）
+            headers = {}
+            for company in companies:
+                response = await login(company.user_emails[0])
+                response.raise_for_status()
+                headers[company.id] = {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+            def pick():
+                company = rng.choice(companies)
+                return company, headers[company.id], rng.choice(company.issue_ids)
+
+            async def read_issues(n: int) -> httpx.Response:
+                _, auth, _ = pick()
+                return await client.get(f"{api}/issues/", headers=auth)
+
+            async def read_issue(n: int) -> httpx.Response:
+                _, auth, issue_id = pick()
+                return await client.get(f"{api}/issues/{issue_id}", headers=auth)
+
+            async def read_messages(n: int) -> httpx.Response:
+                _, auth, issue_id = pick()
+                return await client.get(f"{api}/issues/{issue_id}/messages", headers=auth)
+
+            async def create_issue(n: int) -> httpx.Response:
+                _, auth, _ = pick()
+                return await client.post(f"{api}/issues/", headers=auth, json={
+                    "title": f"Bench issue {n}",
+                    "category": "flavor",
+                    "product_name": "Bench product",
+                    "description": "ベンチマーク用の課題",
+                    "ingredients": [{"name": "Sugar", "amount": "1g"}, {"name": "Salt", "amount": "2g"}],
+                })
+
+            async def create_message(n: int) -> httpx.Response:
+                _, auth, issue_id = pick()
+                return await client.post(
+                    f"{api}/issues/{issue_id}/messages", headers=auth, json={"content": f"Bench message {n}"}
+                )
+
+            async def login_scenario(n: int) -> httpx.Response:
+                return await login(rng.choice(companies).user_emails[0])
+
+            scenarios = [
+                ("read_issues", read_issues, args.requests),
+                ("read_issue", read_issue, args.requests),
+                ("read_messages", read_messages, args.requests),
+                ("create_issue", create_issue, args.requests),
+                ("create_message", create_message, args.requests),
+                ("login", login_scenario, args.login_requests),
+            ]
+            results = []
+            for name, call, requests in scenarios:
+                if requests <= 0:
+                    continue
+                await call(-1)  # ウォームアップ（初回のみのインポート・キャッシュ作成を計測に含めない）
+                results.append(await run_scenario(name, call, requests, args.concurrency))
+        await app.router.shutdown()
+        return results
+
+    results = asyncio.run(run())
+
+    baseline = None
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            saved = json.load(f)
+        baseline = {result["name"]: result for result in saved["results"]}
+        if saved.get("seed") != asdict(spec) or saved.get("concurrency") != args.concurrency:
+            print("Warning: the baseline was recorded with a different data size or concurrency")
+    print_results(results, baseline)
+
+    if args.save_baseline:
+        with open(args.save_baseline, "w", encoding="utf-8") as f:
+            json.dump({
+                "created_at": datetime.now(timezone.utc).isoformat(),
+                "python": platform.python_version(),
+                "sqlalchemy": sqlalchemy.__version__,
+                "seed": asdict(spec),
+                "concurrency": args.concurrency,
+                "results": [dict(asdict(result), throughput=result.throughput) for result in results],
+            }, f, indent=2)
+        print(f"Saved baseline to {args.save_baseline}")
+
+    if baseline:
+        slower = regressions(results, baseline, args.tolerance)
+        if slower:
+            print(f"p95 regressed by more than {args.tolerance:.0%}: {', '.join(slower)}")
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+import argparse
+import json
+import time
+from datetime import date, datetime, timedelta, timezone
+from typing import Any, Callable, Dict, List
+
+from fastapi.responses import JSONResponse
+
+from app.core.responses import FastJSONResponse
+from app.models.issue import BallHolder, IssueStatus, Urgency
+from app.schemas.issue import IssueRead
+from app.schemas.message import MessageRead
+
+# レスポンスの JSON 生成だけを比べるマイクロベンチマーク (`python -m app.perf.json_encoding`)
+# FastAPI がレスポンスクラスに渡すのと同じ形（response_model で JSON 互換に変換済みの dict / list）を、
+# 標準の JSONResponse と FastJSONResponse でそれぞれ描画し、1 レスポンスあたりの時間と出力の一致を確認します。
+# エンドポイント全体での効果は `python -m app.perf.bench --compare` で確認してください。
+
+JST = timezone(timedelta(hours=9))
+
+
+def sample_issue(ingredients: int, attachments: int) -> IssueRead:
+    now = datetime(2025, 4, 1, 9, 30, tzinfo=JST)
+    return IssueRead(
+        id=1234,
+        issue_code="REQ-2025-0042",
+        title="新商品のフレーバー検討（柚子・山椒）",
+        category="flavor",
+        product_name="柚子こしょうドレッシング",
+        description="香りの立ち上がりを強くしたい。サンプルは冷蔵で送付します。\n" * 5,
+        urgency=Urgency.HIGH,
+        desired_deadline=date(2025, 5, 31),
+        client_arbitrary_code="CL-0099",
+        is_sample_provided=True,
+        sample_shipping_info="クール便 4/3 着",
+        status=IssueStatus.IN_PROGRESS,
+        ball_holder=BallHolder.UNITEC,
+        created_at=now,
+        updated_at=now + timedelta(days=2),
+        ingredients=[{"id": n, "name": f"原料 {n}（国産）", "amount": f"{n * 1.5:.1f}g"} for n in range(ingredients)],
+        attachments=[
+            {
+                "id": n,
+                "file_name": f"仕様書_{n}.pdf",
+                "file_path": f"/static/blobs/ab/cd/{'0' * 63}{n}.pdf",
+                "file_type": "application/pdf",
+                "file_size": 123456,
+                "sha256": "0" * 63 + str(n),
+                "preview_url": None,
+                "uploaded_at": now,
+            }
+            for n in range(attachments)
+        ],
+        creator_name="山田 太郎",
+        company_name="株式会社サンプル食品",
+    )
+
+
+def sample_messages(count: int) -> List[MessageRead]:
+    start = datetime(2025, 4, 1, 0, 0, tzinfo=timezone.utc)
+    return [
+        MessageRead(
+            id=n,
+            content=f"ご確認ありがとうございます。{n} 回目の試作品を本日発送しました。",
+            sender_id=n % 3 + 1,
+            sender_name="ユニテック 担当",
+            sent_at=start + timedelta(minutes=n),
+        )
+        for n in range(count)
+    ]
+
+
+def time_render(response_class: Callable[[Any], JSONResponse], content: Any, rounds: int) -> float:
+    started = time.perf_counter()
+    for _ in range(rounds):
+        response_class(content)
+    return (time.perf_counter() - started) / rounds
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Compare JSON rendering of the default JSONResponse and FastJSONResponse.")
+    parser.add_argument("--rounds", type=int, default=2000)
+    args = parser.parse_args()
+
+    payloads: Dict[str, Any] = {
+        "issue detail (20 ingredients, 5 attachments)": sample_issue(20, 5).model_dump(mode="json"),
+        "issue detail (100 ingredients, 20 attachments)": sample_issue(100, 20).model_dump(mode="json"),
+        "messages (200)": [message.model_dump(mode="json") for message in sample_messages(200)],
+    }
+    print(f"{'payload':<48}{'bytes':>8}{'json us':>10}{'orjson us':>11}{'saved':>8}")
+    for name, content in payloads.items():
+        standard = JSONResponse(content).body
+        fast = FastJSONResponse(content).body
+        if json.loads(standard) != json.loads(fast):
+            raise SystemExit(f"{name}: FastJSONResponse output differs from JSONResponse")
+        before = time_render(JSONResponse, content, args.rounds)
+        after = time_render(FastJSONResponse, content, args.rounds)
+        print(f"{name:<48}{len(fast):>8}{before * 1e6:>10.1f}{after * 1e6:>11.1f}{1 - after / before:>8.0%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,185 @@
+import argparse
+import functools
+import os
+import sys
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from app.perf import use_scratch_database
+
+# SQL 発行数のバジェットチェック（N+1 の検出）
+# `python -m app.perf.query_budget` で、小さいデータ（会社 A）と大きいデータ（会社 B: 課題・配合・添付・
+# メッセージ・ユーザーが多い）を一時 SQLite に投入し、各ルートの SQL 発行数を数えます。
+# 件数によって発行数が変わる（= 結果件数に比例してクエリが増える）か、ROUTE_BUDGETS の上限を超えると
+# 終了コード 1 で失敗します。tests/test_query_budget.py がこの CLI を実行するので、pytest（CI）で N+1 の再発を検出できます。
+# count_queries() / query_budget() は単体でも使えます（テストでは count_queries フィクスチャ）。
+
+
+class QueryBudgetExceeded(AssertionError):
+    pass
+
+
+class QueryCounter:
+    """Context manager that records every SQL statement sent through `engine`."""
+
+    def __init__(self, engine: Optional[Engine] = None):
+        if engine is None:
+            from app.db.session import engine as default_engine
+            engine = default_engine
+        self.engine = engine
+        self.statements: List[str] = []
+
+    @property
+    def count(self) -> int:
+        return len(self.statements)
+
+    def _record(self, conn, cursor, statement, parameters, context, executemany) -> None:
+        self.statements.append(statement)
+
+    def __enter__(self) -> "QueryCounter":
+        event.listen(self.engine, "before_cursor_execute", self._record)
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        event.remove(self.engine, "before_cursor_execute", self._record)
+
+
+def count_queries(engine: Optional[Engine] = None) -> QueryCounter:
+    return QueryCounter(engine)
+
+
+def query_budget(max_queries: int, engine: Optional[Engine] = None) -> Callable:
+    """Decorator: raise QueryBudgetExceeded when the wrapped call issues more than `max_queries` statements."""
+    def decorator(fn: Callable) -> Callable:
+        @functools.wraps(fn)
+        def wrapper(*args: Any, **kwargs: Any) -> Any:
+            with count_queries(engine) as counter:
+                result = fn(*args, **kwargs)
+            if counter.count > max_queries:
+                raise QueryBudgetExceeded(
+                    f"{fn.__name__} issued {counter.count} SQL statements (budget {max_queries}):\n"
+                    + "\n".join(counter.statements)
+                )
+            return result
+        return wrapper
+    return decorator
+
+
+# --- Route budgets ---
+
+@dataclass
+class RouteCheck:
+    name: str
+    method: str
+    path: str  # {issue_id} is filled with the acting company's first issue
+    as_staff: bool
+    budget: int
+    json: Optional[dict] = None
+
+
+ISSUE_BODY = {
+    "title": "Budget check",
+    "category": "flavor",
+    "product_name": "Budget product",
+    "ingredients": [{"name": "Sugar", "amount": "1g"}, {"name": "Salt", "amount": "2g"}],
+    "attachments": [{"file_name": "spec.pdf", "file_path": "/static/budget-spec.pdf"}],
+}
+
+ROUTE_BUDGETS: List[RouteCheck] = [
+    RouteCheck("users/me", "GET", "/api/v1/users/me", False, 0),
+    RouteCheck("users/company", "GET", "/api/v1/users/company", False, 2),
+    RouteCheck("companies (staff)", "GET", "/api/v1/companies/", True, 2),
+    RouteCheck("issues list (client)", "GET", "/api/v1/issues/", False, 2),
+    RouteCheck("issues list (staff)", "GET", "/api/v1/issues/", True, 2),
+    RouteCheck("issue detail", "GET", "/api/v1/issues/{issue_id}", False, 1),
+    RouteCheck("messages (client)", "GET", "/api/v1/issues/{issue_id}/messages", False, 3),
+    RouteCheck("messages (staff)", "GET", "/api/v1/issues/{issue_id}/messages", True, 3),
+    RouteCheck("search", "GET", "/api/v1/issues/search?q=Perf", True, 2),
+    RouteCheck("stats", "GET", "/api/v1/issues/stats", True, 2),
+    RouteCheck("create issue", "POST", "/api/v1/issues/", False, 11, ISSUE_BODY),
+    RouteCheck("update issue", "PUT", "/api/v1/issues/{issue_id}", False, 8, {
+        "title": "Budget check (edited)",
+        "ingredients": [{"name": "Sugar", "amount": "3g"}],
+    }),
+    RouteCheck("post message", "POST", "/api/v1/issues/{issue_id}/messages", False, 3, {"content": "budget"}),
+]
+
+# update issue は配合を 1 件に減らすので、どちらのサイズでも「1 件更新 + 残りを削除」になるよう 2 件以上にする
+SMALL = dict(companies=1, users_per_company=2, issues_per_company=3, ingredients_per_issue=2,
+             attachments_per_issue=1, messages_per_issue=2)
+LARGE = dict(companies=1, users_per_company=15, issues_per_company=150, ingredients_per_issue=8,
+             attachments_per_issue=4, messages_per_issue=40)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Check SQL statement counts per route against budgets.")
+    parser.add_argument("--verbose", action="store_true", help="print the SQL of routes that fail")
+    args = parser.parse_args()
+
+    use_scratch_database()
+    os.environ.setdefault("BCRYPT_ROUNDS", "4")
+    os.environ.setdefault("METRICS_ENABLED", "false")
+    # 課題コードのブロック予約（数回に 1 回だけ発生）で発行数がぶれないよう、予約を 1 回にまとめる
+    os.environ.setdefault("ISSUE_CODE_BLOCK_SIZE", "100000")
+
+    from fastapi.testclient import TestClient
+
+    from app.main import app
+    from app.api.v1.endpoints.issues import issue_list_cache
+    from app.db.session import SessionLocal
+    from app.perf.seed import PERF_PASSWORD, SeedSpec, seed
+
+    def login(client: TestClient, email: str, password: str) -> Dict[str, str]:
+        response = client.post("/api/v1/auth/login/access-token", data={"username": email, "password": password})
+        response.raise_for_status()
+        return {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+    def measure(client: TestClient, headers: Dict[str, Dict[str, str]], issue_id: int) -> Dict[str, QueryCounter]:
+        results = {}
+        for check in ROUTE_BUDGETS:
+            request_headers = headers["staff" if check.as_staff else "client"]
+            path = check.path.format(issue_id=issue_id)
+            if check.method == "GET":
+                client.request(check.method, path, headers=request_headers)  # 認証キャッシュ等を温める
+            issue_list_cache.clear()
+            with count_queries() as counter:
+                response = client.request(check.method, path, headers=request_headers, json=check.json)
+            if response.status_code >= 400:
+                raise SystemExit(f"{check.name}: {check.method} {path} returned {response.status_code}: {response.text}")
+            results[check.name] = counter
+        return results
+
+    rounds = {}
+    with TestClient(app) as client:
+        staff_headers = login(client, "admin@unitec.com", "admin123")
+        for label, spec in (("small", SMALL), ("large", LARGE)):
+            db = SessionLocal()
+            try:
+                company = seed(db, SeedSpec(**spec), progress=lambda message: None)[0]
+            finally:
+                db.close()
+            headers = {"staff": staff_headers, "client": login(client, company.user_emails[0], PERF_PASSWORD)}
+            rounds[label] = measure(client, headers, company.issue_ids[0])
+
+    failed = False
+    print(f"{'route':<24}{'small':>7}{'large':>7}{'budget':>8}  result")
+    for check in ROUTE_BUDGETS:
+        small, large = rounds["small"][check.name], rounds["large"][check.name]
+        problems = []
+        if large.count != small.count:
+            problems.append("grows with data size")
+        if max(small.count, large.count) > check.budget:
+            problems.append("over budget")
+        failed = failed or bool(problems)
+        print(f"{check.name:<24}{small.count:>7}{large.count:>7}{check.budget:>8}  {', '.join(problems) or 'ok'}")
+        if problems and args.verbose:
+            for statement in large.statements:
+                print("    " + " ".join(statement.split())[:200])
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
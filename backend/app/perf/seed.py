@@ -0,0 +1,178 @@
+import logging
+from dataclasses import dataclass, field
+from typing import Callable, List, Optional
+
+from sqlalchemy import func, insert, select
+from sqlalchemy.orm import Session
+
+from app.api.v1.endpoints.issues import insert_issue_batch
+from app.core.security import get_password_hash
+from app.models.issue import Issue, Message
+from app.models.user import Company, CompanyType, User, UserRole
+from app.schemas.issue import AttachmentCreate, IngredientCreate, IssueCreate
+
+# 合成データの一括投入（ベンチマーク・クエリ数チェック用）
+# 課題は一括インポートと同じ insert_issue_batch で入れるため、課題コード・集計・検索インデックスも実運用と同じ状態になります。
+# メッセージは件数が桁違いに多くなるので、BATCH_SIZE 行ずつ executemany で直接入れます。
+
+logger = logging.getLogger(__name__)
+
+PERF_PASSWORD = "perf-password"
+BATCH_SIZE = 5000
+
+
+@dataclass
+class SeedSpec:
+    companies: int = 10
+    users_per_company: int = 3
+    issues_per_company: int = 50
+    ingredients_per_issue: int = 3
+    attachments_per_issue: int = 1
+    messages_per_issue: int = 20
+
+
+@dataclass
+class SeededCompany:
+    id: int
+    user_ids: List[int]
+    user_emails: List[str]
+    issue_ids: List[int] = field(default_factory=list)
+
+
+def staff_user_id(db: Session) -> Optional[int]:
+    return db.execute(
+        select(User.id).where(User.role == UserRole.UNITEC_ADMIN).order_by(User.id).limit(1)
+    ).scalar()
+
+
+def seed_companies(db: Session, count: int, users_per_company: int) -> List[SeededCompany]:
+    """Insert client companies with CLIENT_ADMIN / CLIENT_MEMBER users (all with PERF_PASSWORD)."""
+    start = (db.execute(select(func.max(Company.id))).scalar() or 0) + 1
+    names = [f"Perf Company {start + n}" for n in range(count)]
+    db.execute(insert(Company), [
+        {"name": name, "representative_email": f"rep{start + n}@example.com", "type": CompanyType.CLIENT}
+        for n, name in enumerate(names)
+    ])
+    company_ids = dict(db.execute(select(Company.name, Company.id).where(Company.name.in_(names))).all())
+
+    password_hash = get_password_hash(PERF_PASSWORD)  # bcrypt は 1 回だけ
+    companies = []
+    user_rows = []
+    for name in names:
+        company_id = company_ids[name]
+        emails = [f"perf{company_id}-{n}@example.com" for n in range(users_per_company)]
+        companies.append(SeededCompany(id=company_id, user_ids=[], user_emails=emails))
+        user_rows.extend(
+            {
+                "email": email,
+                "password_hash": password_hash,
+                "name": f"Perf User {company_id}-{n}",
+                "role": UserRole.CLIENT_ADMIN if n == 0 else UserRole.CLIENT_MEMBER,
+                "company_id": company_id,
+            }
+            for n, email in enumerate(emails)
+        )
+    for offset in range(0, len(user_rows), BATCH_SIZE):
+        db.execute(insert(User), user_rows[offset:offset + BATCH_SIZE])
+    ids_by_email = dict(
+        db.execute(select(User.email, User.id).where(User.company_id.in_(company_ids.values()))).all()
+    )
+    for company in companies:
+        company.user_ids = [ids_by_email[email] for email in company.user_emails]
+    db.commit()
+    return companies
+
+
+def seed_issues(
+    db: Session,
+    company: SeededCompany,
+    count: int,
+    ingredients_per_issue: int = 3,
+    attachments_per_issue: int = 1,
+    chunk_size: int = 500,
+) -> List[int]:
+    """Add `count` issues (with ingredients / attachments) to a company, created by its first user."""
+    issue_ids: List[int] = []
+    for offset in range(0, count, chunk_size):
+        issues_in = [
+            IssueCreate(
+                title=f"Perf issue {company.id}-{offset + n}",
+                category="flavor",
+                product_name=f"Product {(offset + n) % 97}",
+                description="合成データ description for benchmark " * 4,
+                ingredients=[
+                    IngredientCreate(name=f"Ingredient {i}", amount=f"{i + 1}g") for i in range(ingredients_per_issue)
+                ],
+                attachments=[
+                    AttachmentCreate(file_name=f"spec{i}.pdf", file_path=f"/static/perf-{company.id}-{offset + n}-{i}.pdf")
+                    for i in range(attachments_per_issue)
+                ],
+            )
+            for n in range(min(chunk_size, count - offset))
+        ]
+        issue_ids.extend(insert_issue_batch(db, issues_in, company.id, company.user_ids[0]))
+        db.commit()
+    company.issue_ids.extend(issue_ids)
+    return issue_ids
+
+
+def seed_messages(db: Session, issue_ids: List[int], per_issue: int, sender_ids: List[int]) -> int:
+    """Insert `per_issue` messages into every issue, alternating between `sender_ids`."""
+    rows = []
+    total = 0
+    for issue_id in issue_ids:
+        for n in range(per_issue):
+            rows.append({
+                "issue_id": issue_id,
+                "sender_id": sender_ids[n % len(sender_ids)],
+                "content": f"Message {n} about issue {issue_id}",
+                "has_attachment": False,
+            })
+            if len(rows) >= BATCH_SIZE:
+                db.execute(insert(Message), rows)
+                total += len(rows)
+                rows = []
+    if rows:
+        db.execute(insert(Message), rows)
+        total += len(rows)
+    db.commit()
+    return total
+
+
+def seed(db: Session, spec: SeedSpec, progress: Callable[[str], None] = logger.info) -> List[SeededCompany]:
+    """Seed a whole data set; messages alternate between each company's first user and Unitec staff."""
+    companies = seed_companies(db, spec.companies, spec.users_per_company)
+    progress(f"Seeded {len(companies)} companies / {len(companies) * spec.users_per_company} users")
+    staff_id = staff_user_id(db)
+    messages = 0
+    for n, company in enumerate(companies, 1):
+        issue_ids = seed_issues(db, company, spec.issues_per_company, spec.ingredients_per_issue, spec.attachments_per_issue)
+        senders = [company.user_ids[0]] + ([staff_id] if staff_id else [])
+        messages += seed_messages(db, issue_ids, spec.messages_per_issue, senders)
+        if n % 10 == 0 or n == len(companies):
+            progress(f"Seeded issues and messages for {n}/{len(companies)} companies ({messages} messages)")
+    return companies
+
+
+def load_seeded(db: Session) -> List[SeededCompany]:
+    """Rebuild the SeededCompany list of a database seeded earlier (to reuse it without seeding again)."""
+    companies = {
+        company_id: SeededCompany(id=company_id, user_ids=[], user_emails=[])
+        for company_id in db.execute(
+            select(Company.id).where(Company.name.like("Perf Company %")).order_by(Company.id)
+        ).scalars()
+    }
+    if not companies:
+        return []
+    for company_id, user_id, email in db.execute(
+        select(User.company_id, User.id, User.email)
+        .where(User.company_id.in_(companies), User.email.like("perf%@example.com"))
+        .order_by(User.id)
+    ):
+        companies[company_id].user_ids.append(user_id)
+        companies[company_id].user_emails.append(email)
+    for company_id, issue_id in db.execute(
+        select(Issue.company_id, Issue.id).where(Issue.company_id.in_(companies)).order_by(Issue.id)
+    ):
+        companies[company_id].issue_ids.append(issue_id)
+    return [company for company in companies.values() if company.user_ids]
@@ -1,5 +1,5 @@
 from pydantic import BaseModel, Field
-from typing import List, Optional
+from typing import Dict, List, Optional
 from datetime import date, datetime
 from app.models.issue import IssueStatus, BallHolder, Urgency
 
@@ -26,9 +26,16 @@ class AttachmentBase(BaseModel):
 class AttachmentCreate(AttachmentBase):
     file_path: str # Path returned from upload API
 
+class AttachmentByHash(AttachmentBase):
+    sha256: str = Field(..., pattern=r"^[0-9a-f]{64}$") # Client-side SHA-256 of the file
+
 class AttachmentRead(AttachmentBase):
     id: int
     file_path: str
+    file_size: Optional[int] = None
+    sha256: Optional[str] = None
+    preview_url: Optional[str] = None # Small WebP preview for images / PDFs, once generated
+    download_url: Optional[str] = None # file_path with a short-lived ?token= for <img> / <a> links
     uploaded_at: datetime
     
     class Config:
@@ -98,3 +105,27 @@ class IssueListSummary(BaseModel):
     
     class Config:
         from_attributes = True
+
+# --- 4. Bulk import ---
+class BulkImportRowError(BaseModel):
+    row: int # 1-based record number in the uploaded body (CSV header not counted)
+    errors: List[str]
+
+class BulkImportResult(BaseModel):
+    created: int
+    failed: int
+    issue_ids: List[int] = []
+    errors: List[BulkImportRowError] = []
+
+# --- 5. Dashboard stats ---
+class CompanyIssueCount(BaseModel):
+    company_id: int
+    company_name: Optional[str] = None
+    count: int
+
+class IssueStats(BaseModel):
+    total: int
+    by_status: Dict[IssueStatus, int]
+    by_ball_holder: Dict[BallHolder, int]
+    by_urgency: Dict[Urgency, int]
+    by_company: List[CompanyIssueCount]
@@ -0,0 +1,45 @@
+import os
+from typing import Callable, Dict, Iterator
+
+import pytest
+
+from app.perf import use_scratch_database
+
+# app.db.session は import 時にエンジンを作るので、app を import する前に一時 SQLite を向ける
+use_scratch_database()
+os.environ.setdefault("BCRYPT_ROUNDS", "4")
+os.environ.setdefault("METRICS_ENABLED", "false")
+
+from fastapi.testclient import TestClient  # noqa: E402
+
+from app.main import app  # noqa: E402
+from app.perf.query_budget import QueryCounter  # noqa: E402
+
+
+@pytest.fixture(scope="session")
+def client() -> Iterator[TestClient]:
+    # 起動時にマイグレーションと初期データ投入 (DB_MIGRATE_ON_STARTUP) が走る
+    with TestClient(app) as test_client:
+        yield test_client
+
+
+def _login(client: TestClient, email: str, password: str) -> Dict[str, str]:
+    response = client.post("/api/v1/auth/login/access-token", data={"username": email, "password": password})
+    response.raise_for_status()
+    return {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+
+@pytest.fixture(scope="session")
+def client_headers(client: TestClient) -> Dict[str, str]:
+    return _login(client, "user@client-a.com", "client123")
+
+
+@pytest.fixture(scope="session")
+def staff_headers(client: TestClient) -> Dict[str, str]:
+    return _login(client, "admin@unitec.com", "admin123")
+
+
+@pytest.fixture
+def count_queries() -> Callable[[], QueryCounter]:
+    """`with count_queries() as counter:` records the SQL statements sent to the app's engine."""
+    return QueryCounter
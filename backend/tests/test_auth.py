@@ -0,0 +1,20 @@
+def test_login_returns_token(client):
+    response = client.post(
+        "/api/v1/auth/login/access-token", data={"username": "user@client-a.com", "password": "client123"}
+    )
+    assert response.status_code == 200
+    assert response.json()["token_type"] == "bearer"
+
+
+def test_login_rejects_wrong_password(client):
+    response = client.post(
+        "/api/v1/auth/login/access-token", data={"username": "user@client-a.com", "password": "wrong"}
+    )
+    assert response.status_code == 401
+
+
+def test_login_rejects_unknown_user(client):
+    response = client.post(
+        "/api/v1/auth/login/access-token", data={"username": "nobody@example.com", "password": "client123"}
+    )
+    assert response.status_code == 401
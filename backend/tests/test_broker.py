@@ -0,0 +1,32 @@
+import queue
+
+import pytest
+
+from app.core.broker import MAX_PACKET_BYTES, Broker, UnixSocketBackend
+
+
+@pytest.fixture
+def received(tmp_path):
+    broker = Broker(UnixSocketBackend(str(tmp_path)))
+    events: "queue.Queue[str]" = queue.Queue()
+    broker.add_listener("topic", events.put)
+    return broker, events
+
+
+def test_small_event_is_delivered(received):
+    broker, events = received
+    broker.publish("topic", "hello")
+    assert events.get(timeout=5) == "hello"
+
+
+def test_oversized_event_sends_fallback(received):
+    broker, events = received
+    broker.publish("topic", "x" * (MAX_PACKET_BYTES + 1), fallback='{"id": 1, "ref": true}')
+    assert events.get(timeout=5) == '{"id": 1, "ref": true}'
+
+
+def test_oversized_event_without_fallback_is_not_sent(received):
+    broker, events = received
+    broker.publish("topic", "x" * (MAX_PACKET_BYTES + 1))
+    broker.publish("topic", "after")
+    assert events.get(timeout=5) == "after"
@@ -0,0 +1,92 @@
+from typing import List
+
+import pytest
+
+
+def _ingredient_names(issue: dict) -> List[str]:
+    return [ingredient["name"] for ingredient in issue["ingredients"]]
+
+
+def _ingredients(*names: str) -> List[dict]:
+    return [{"name": name, "amount": "1g"} for name in names]
+
+
+@pytest.fixture
+def issue(client, client_headers) -> dict:
+    response = client.post("/api/v1/issues/", headers=client_headers, json={
+        "title": "Ingredient order",
+        "category": "flavor",
+        "product_name": "Order product",
+        "ingredients": _ingredients("A", "B"),
+    })
+    assert response.status_code == 200, response.text
+    return response.json()
+
+
+def _put(client, headers, issue_id: int, body: dict, etag: str = None):
+    if etag is not None:
+        headers = {**headers, "If-Match": etag}
+    return client.put(f"/api/v1/issues/{issue_id}", headers=headers, json=body)
+
+
+def test_insert_in_the_middle_keeps_order(client, client_headers, issue):
+    etag = client.get(f"/api/v1/issues/{issue['id']}", headers=client_headers).headers["ETag"]
+    response = _put(client, client_headers, issue["id"], {"ingredients": _ingredients("A", "X", "B")}, etag)
+    assert response.status_code == 200
+    assert _ingredient_names(response.json()) == ["A", "X", "B"]
+    assert response.headers["ETag"] != etag
+
+    detail = client.get(f"/api/v1/issues/{issue['id']}", headers=client_headers).json()
+    assert _ingredient_names(detail) == ["A", "X", "B"]
+
+
+def test_pure_reorder_is_saved(client, client_headers, issue):
+    _put(client, client_headers, issue["id"], {"ingredients": _ingredients("A", "X", "B")})
+    etag = client.get(f"/api/v1/issues/{issue['id']}", headers=client_headers).headers["ETag"]
+
+    response = _put(client, client_headers, issue["id"], {"ingredients": _ingredients("B", "A", "X")}, etag)
+    assert response.status_code == 200
+    assert _ingredient_names(response.json()) == ["B", "A", "X"]
+    assert response.headers["ETag"] != etag
+
+    detail = client.get(f"/api/v1/issues/{issue['id']}", headers=client_headers).json()
+    assert _ingredient_names(detail) == ["B", "A", "X"]
+
+
+def test_unchanged_save_keeps_etag(client, client_headers, issue):
+    etag = client.get(f"/api/v1/issues/{issue['id']}", headers=client_headers).headers["ETag"]
+    response = _put(client, client_headers, issue["id"], {"ingredients": _ingredients("A", "B")}, etag)
+    assert response.status_code == 200
+    assert response.headers["ETag"] == etag
+
+
+def test_stale_if_match_is_rejected(client, client_headers, issue):
+    etag = client.get(f"/api/v1/issues/{issue['id']}", headers=client_headers).headers["ETag"]
+    assert _put(client, client_headers, issue["id"], {"title": "first"}, etag).status_code == 200
+    response = _put(client, client_headers, issue["id"], {"title": "second"}, etag)
+    assert response.status_code == 412
+
+    detail = client.get(f"/api/v1/issues/{issue['id']}", headers=client_headers).json()
+    assert detail["title"] == "first"
+
+
+def _last_write(counter) -> str:
+    # コミット後のレスポンス生成で SELECT が続くので、書き込み文のうち最後のものを見る
+    writes = [statement for statement in counter.statements
+              if statement.lstrip().split(None, 1)[0].upper() in ("INSERT", "UPDATE", "DELETE")]
+    return " ".join(writes[-1].split())
+
+
+def test_issue_list_version_is_bumped_last(client, client_headers, count_queries, issue):
+    # 全課題の書き込みで共有する "all" 行のロックをコミット直前まで取らない
+    with count_queries() as counter:
+        response = client.post("/api/v1/issues/", headers=client_headers, json={
+            "title": "Bump order", "category": "flavor", "product_name": "p", "ingredients": _ingredients("A"),
+        })
+    assert response.status_code == 200
+    assert "issue_list_versions" in _last_write(counter)
+
+    with count_queries() as counter:
+        response = _put(client, client_headers, issue["id"], {"title": "Bump order", "ingredients": _ingredients("C")})
+    assert response.status_code == 200
+    assert "issue_list_versions" in _last_write(counter)
@@ -0,0 +1,24 @@
+import os
+import subprocess
+import sys
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def test_issue_detail_is_one_query(client, client_headers, count_queries):
+    issue_id = client.get("/api/v1/issues/", headers=client_headers).json()[0]["id"]
+    client.get(f"/api/v1/issues/{issue_id}", headers=client_headers)  # 認証キャッシュを温める
+    with count_queries() as counter:
+        response = client.get(f"/api/v1/issues/{issue_id}", headers=client_headers)
+    assert response.status_code == 200
+    assert counter.count == 1, counter.statements
+
+
+def test_route_budgets():
+    # CLI は自分で一時 DB を作るので、テスト用の DATABASE_URL / UPLOAD_DIR は渡さない
+    env = {key: value for key, value in os.environ.items() if key not in ("DATABASE_URL", "UPLOAD_DIR")}
+    result = subprocess.run(
+        [sys.executable, "-m", "app.perf.query_budget", "--verbose"],
+        cwd=BACKEND_DIR, env=env, capture_output=True, text=True, timeout=600,
+    )
+    assert result.returncode == 0, result.stdout + result.stderr
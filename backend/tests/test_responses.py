@@ -0,0 +1,7 @@
+from app.core.responses import FastJSONResponse
+from app.models.issue import IssueStatus
+
+
+def test_renders_utf8_and_enum_values():
+    body = FastJSONResponse({"title": "低糖質クッキー", "status": IssueStatus.DRAFT}).body
+    assert body.decode("utf-8") == '{"title":"低糖質クッキー","status":"draft"}'
@@ -0,0 +1,82 @@
+import hashlib
+import uuid
+
+import pytest
+
+from app.core import security
+from app.db.session import SessionLocal
+from app.models.user import Company, CompanyType, User, UserRole
+
+
+@pytest.fixture(scope="module")
+def other_company_headers(client):
+    email = f"other-{uuid.uuid4().hex[:8]}@client-b.com"
+    db = SessionLocal()
+    try:
+        company = Company(name=f"Other {email}", representative_email=email, type=CompanyType.CLIENT)
+        db.add(company)
+        db.flush()
+        db.add(User(email=email, password_hash=security.get_password_hash("other123"), name="Other",
+                    role=UserRole.CLIENT_ADMIN, company_id=company.id))
+        db.commit()
+    finally:
+        db.close()
+    response = client.post("/api/v1/auth/login/access-token", data={"username": email, "password": "other123"})
+    return {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+
+@pytest.fixture
+def uploaded(client, client_headers) -> dict:
+    content = b"%PDF-1.4\n" + uuid.uuid4().bytes
+    response = client.post("/api/v1/upload/", headers=client_headers,
+                           files={"file": ("spec.pdf", content, "application/pdf")})
+    assert response.status_code == 200, response.text
+    body = response.json()
+    assert body["sha256"] == hashlib.sha256(content).hexdigest()
+    return body
+
+
+def test_uploader_reads_unattached_blob(client, client_headers, uploaded):
+    assert client.get(uploaded["file_path"], headers=client_headers).status_code == 200
+
+
+def test_other_company_cannot_read_unattached_blob(client, other_company_headers, uploaded):
+    assert client.get(uploaded["file_path"], headers=other_company_headers).status_code == 404
+    response = client.post("/api/v1/upload/known", headers=other_company_headers,
+                           json={"sha256": uploaded["sha256"], "file_name": "x.pdf"})
+    assert response.status_code == 404
+
+
+def test_staff_reads_unattached_blob(client, staff_headers, uploaded):
+    assert client.get(uploaded["file_path"], headers=staff_headers).status_code == 200
+
+
+def test_signed_download_url(client, uploaded):
+    assert "?token=" in uploaded["download_url"]
+    assert client.get(uploaded["download_url"]).status_code == 200
+
+
+def test_file_token_is_scoped_to_its_path(client, client_headers, uploaded):
+    other_path = uploaded["file_path"][:-len(".pdf")] + ".png"
+    token = uploaded["download_url"].split("?token=")[1]
+    assert client.get(f"{other_path}?token={token}").status_code == 401
+    # ファイルトークンは API の Bearer トークンとしては使えない
+    assert client.get("/api/v1/users/me", headers={"Authorization": f"Bearer {token}"}).status_code == 401
+
+
+def test_access_token_query_is_not_accepted(client, client_headers, uploaded):
+    access_token = client_headers["Authorization"].split()[1]
+    assert client.get(f"{uploaded['file_path']}?access_token={access_token}").status_code == 401
+
+
+def test_issue_detail_returns_signed_urls(client, client_headers, other_company_headers, uploaded):
+    response = client.post("/api/v1/issues/", headers=client_headers, json={
+        "title": "Attachment", "category": "flavor", "product_name": "p",
+        "attachments": [{"file_name": "spec.pdf", "file_path": uploaded["file_path"]}],
+    })
+    issue_id = response.json()["id"]
+    attachment = client.get(f"/api/v1/issues/{issue_id}", headers=client_headers).json()["attachments"][0]
+    assert attachment["file_path"] == uploaded["file_path"]
+    assert client.get(attachment["download_url"]).status_code == 200
+    # 添付された後も、他社のユーザーには見えない
+    assert client.get(uploaded["file_path"], headers=other_company_headers).status_code == 404